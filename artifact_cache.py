@@ -0,0 +1,143 @@
+# artifact_cache.py
+# -------------------------------------------------------
+# ARTIFACT MANIFEST: SKIP TRAINING WHEN NOTHING CHANGED
+# -------------------------------------------------------
+#
+# A training run writes a small JSON manifest next to its artifacts. It
+# records everything the artifacts depend on:
+#   - the sha256 of every input CSV
+#   - the feature column list
+#   - the hyperparameters
+#   - the Python / numpy / pandas / scikit-learn / joblib versions
+# It also records the sha256 of every artifact written.
+#
+# The next run rebuilds the same key. If it matches and the artifacts on
+# disk are the ones recorded, training is skipped. Otherwise stale_reasons()
+# says what changed and the caller retrains.
+#
+# Artifacts and the manifest are written to a temporary file first and
+# then renamed, so an interrupted run never leaves a half-written model
+# behind a valid manifest.
+#
+# model.joblib / label_encoder.joblib are trained by
+# medical_disease_prediction.py, but tune_model.py, stream_train.py and
+# estimators.py can also write them. Those scripts record their artifacts
+# in the same MODEL_MANIFEST next to the model, with themselves as
+# "producer". medical_disease_prediction.py then keeps a model they built
+# from the same dataset instead of retraining over it.
+
+import hashlib
+import json
+import os
+import platform
+import tempfile
+import time
+from importlib import metadata
+
+LIBRARIES = ("numpy", "pandas", "scikit-learn", "joblib")
+MODEL_MANIFEST = "model_manifest.json"
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def library_versions():
+    versions = {"python": platform.python_version()}
+    for name in LIBRARIES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def manifest_key(inputs, feature_cols, params):
+    """Everything a set of trained artifacts depends on, as a JSON-able dict"""
+    return {
+        "inputs": {os.path.basename(path): file_sha256(path) for path in inputs},
+        "feature_cols": list(feature_cols),
+        "params": params,
+        "versions": library_versions(),
+    }
+
+
+def load_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def stale_reasons(manifest_path, key, artifacts):
+    """Why the artifacts must be rebuilt; an empty list means reuse them"""
+    manifest = load_manifest(manifest_path)
+    if manifest is None:
+        return [f"no manifest at {manifest_path}"]
+
+    reasons = [f"{field} changed" for field in ("inputs", "feature_cols", "params", "versions")
+               if manifest.get(field) != json.loads(json.dumps(key[field]))]
+
+    recorded = manifest.get("artifacts", {})
+    for path in artifacts:
+        if not os.path.exists(path):
+            reasons.append(f"{path} is missing")
+        elif recorded.get(os.path.basename(path)) != file_sha256(path):
+            reasons.append(f"{path} does not match the manifest")
+    return reasons
+
+
+def atomic_write(path, write):
+    """Call write(tmp_path), then move tmp_path over path in one step"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=os.path.basename(path))
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_dump(obj, path):
+    """joblib.dump that never leaves a partial file at `path`"""
+    import joblib
+    atomic_write(path, lambda tmp_path: joblib.dump(obj, tmp_path))
+
+
+def manifest_next_to(artifact_path, name=MODEL_MANIFEST):
+    """Path of the manifest in the same directory as artifact_path"""
+    return os.path.join(os.path.dirname(os.path.abspath(artifact_path)), name)
+
+
+def write_manifest(manifest_path, key, artifacts, producer=None):
+    """Record `key` plus the hash of every artifact written with it (and the
+    script that wrote them, if it is not the pipeline's own trainer)"""
+    manifest = {
+        **key,
+        "artifacts": {os.path.basename(path): file_sha256(path) for path in artifacts},
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+    if producer:
+        manifest["producer"] = producer
+
+    def write(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+    atomic_write(manifest_path, write)
+    return manifest
+
+
+def save_artifacts(objects, manifest_path, key, producer=None):
+    """atomic_dump every {path: object}, then record them in the manifest"""
+    for path, obj in objects.items():
+        atomic_dump(obj, path)
+    return write_manifest(manifest_path, key, list(objects), producer)
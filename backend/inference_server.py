@@ -0,0 +1,418 @@
+# inference_server.py
+# -------------------------------------------------------
+# ASYNCIO HTTP INFERENCE SERVICE WITH MICRO-BATCHING
+# -------------------------------------------------------
+#
+# Usage (from the folder holding disease_model.joblib, scaler.joblib,
+# feature_cols.joblib and vitals.csv):
+#   python backend/inference_server.py --port 8000 --max-batch 64 --max-wait-ms 5
+#
+# Endpoints:
+#   GET  /health    model status, batching counters, prediction cache stats
+#   GET  /metrics   stage timings in Prometheus text format (metrics.py)
+#   GET  /drift     incoming features vs the training baseline (drift_monitor.py)
+#   POST /predict   {"vitals": ..., "symptoms": ..., "explain": false}
+#
+# "vitals" and "symptoms" can be free text (parsed like predict_disease) or
+# structured: vitals as {"systolic_bp": 150, ...} (the model sees the text
+# parser's defaults for missing vitals, the vitals.csv rules skip them)
+# and symptoms as ["fever", "cough"] or
+# {"fever": 1, ...} (true/false or 0/1, anything else is a 400). The
+# answer has the same shape as predict_disease:
+#   {"results": [{"disease": ..., "probability": ...}, ...],
+#    "vitals": {...}, "symptoms": {...},
+#    "vital_flags": [{"disease": ..., "vitals": [...]}, ...]}
+# With "explain": true every result also has "drivers": the features that
+# moved that disease the most, [{"feature": ..., "contribution": ...}] in
+# percentage points (explain.py). "vital_flags" lists the diseases whose
+# vitals.csv thresholds the vitals meet (vital_rules.py), checked for the
+# whole micro-batch at once.
+#
+# Requests that arrive within --max-wait-ms of each other (up to
+# --max-batch of them) are scored together in one predict_proba call. The
+# model is loaded once and hot-reloaded by DiseasePredictor when the
+# artifacts change.
+#
+# Every scored row also updates the drift monitor when drift_baseline.json
+# is next to the model. Every --drift-every seconds the server scores it,
+# writes the snapshot to --drift-out (if given) and logs the features
+# whose PSI crossed the drift threshold. /drift scores it on demand.
+#
+# Only the standard library is used for HTTP, so the
+# Next.js API routes can call it with a plain fetch().
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+
+from train_model import (DiseasePredictor, all_symptoms, extract_vitals_from_text,
+                         extract_symptoms_from_text)
+from text_extractor import VITAL_DEFAULTS
+from metrics import registry, count
+from artifact_cache import atomic_write
+
+MAX_BODY_BYTES = 1 << 20
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+# =====================================================
+# PAYLOAD -> FEATURES
+# =====================================================
+
+def parse_vitals(value):
+    """Only the vitals the request gives (DiseasePredictor fills in the rest)"""
+    if value is None:
+        value = ""
+    if isinstance(value, str):
+        vitals = extract_vitals_from_text(value, None, fill_defaults=False)
+    elif not isinstance(value, dict):
+        raise BadRequest("'vitals' must be a string or an object")
+    else:
+        unknown = set(value) - set(VITAL_DEFAULTS)
+        if unknown:
+            raise BadRequest(f"Unknown vital(s): {', '.join(sorted(unknown))}")
+        try:
+            vitals = {name: float(value[name]) for name in VITAL_DEFAULTS if name in value}
+        except (TypeError, ValueError):
+            raise BadRequest("Vitals must be numbers")
+    # 1e999 / "nan" parse as floats, but the model cannot score them and
+    # NaN is not JSON
+    invalid = [name for name, number in vitals.items() if not math.isfinite(number)]
+    if invalid:
+        raise BadRequest(f"Vitals must be finite numbers: {', '.join(invalid)}")
+    return vitals
+
+
+def parse_symptoms(value):
+    if value is None:
+        value = ""
+    if isinstance(value, str):
+        return extract_symptoms_from_text(value)
+    if isinstance(value, list):
+        if not all(isinstance(name, str) for name in value):
+            raise BadRequest("A 'symptoms' list must hold symptom names")
+        value = {name: 1 for name in value}
+    if not isinstance(value, dict):
+        raise BadRequest("'symptoms' must be a string, a list or an object")
+    unknown = set(value) - set(all_symptoms)
+    if unknown:
+        raise BadRequest(f"Unknown symptom(s): {', '.join(sorted(map(str, unknown)))}")
+    # bool is an int subclass, so this accepts true/false and 0/1 only
+    invalid = [name for name, flag in value.items() if not (isinstance(flag, int) and flag in (0, 1))]
+    if invalid:
+        raise BadRequest(f"Symptom values must be true/false or 0/1: {', '.join(sorted(invalid))}")
+    return {name: int(value.get(name, 0)) for name in all_symptoms}
+
+
+def _jsonable(value):
+    # numpy scalars (probabilities, class labels) -> plain Python
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+# =====================================================
+# MICRO-BATCHING
+# =====================================================
+
+class MicroBatcher:
+    """Collects feature rows for up to max_wait seconds (or max_batch rows)
+    and scores them with one predict_features call in a worker thread."""
+
+    def __init__(self, predictor, max_batch=64, max_wait=0.005):
+        self.predictor = predictor
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self.rows = 0
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def predict(self, row, explain=False):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, explain, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Rows that asked for explanations are scored as their own batch
+            for explain in (False, True):
+                group = [(row, future) for row, flag, future in batch if flag == explain]
+                if group:
+                    await self._score(loop, group, explain)
+
+    def _predict_and_flag(self, rows, explain):
+        results = self.predictor.predict_features(rows, explain)
+        return list(zip(results, self.predictor.flag_features(rows)))
+
+    async def _score(self, loop, group, explain):
+        rows = [row for row, _ in group]
+        try:
+            results = await loop.run_in_executor(None, self._predict_and_flag, rows, explain)
+        except Exception as e:  # answer every caller, keep serving
+            if len(group) > 1:
+                # One bad row fails the whole call: retry the rows one by
+                # one, so only the caller that sent it gets the error
+                for item in group:
+                    await self._score(loop, [item], explain)
+                return
+            future = group[0][1]
+            if not future.done():
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.rows += len(rows)
+        count("server_batches_total", help_text="predict_proba batches run by the server")
+        registry.histogram("server_batch_size", "Rows per micro-batch",
+                           buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)).observe(len(rows))
+        for (_, future), result in zip(group, results):
+            if not future.done():
+                future.set_result(result)
+
+
+def _write_json(path, payload):
+    def write(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+
+    atomic_write(path, write)
+
+
+# =====================================================
+# HTTP
+# =====================================================
+
+class InferenceServer:
+    def __init__(self, predictor, max_batch=64, max_wait=0.005, drift_every=60.0, drift_out=None):
+        self.predictor = predictor
+        self.batcher = MicroBatcher(predictor, max_batch, max_wait)
+        self.started = time.time()
+        self.requests = 0
+        self.drift_every = drift_every
+        self.drift_out = drift_out
+        self.drifted = []
+        self._drift_task = None
+
+    def start(self):
+        self.batcher.start()
+        if self.drift_every > 0:
+            self._drift_task = asyncio.get_running_loop().create_task(self._watch_drift())
+
+    async def stop(self):
+        if self._drift_task:
+            self._drift_task.cancel()
+            try:
+                await self._drift_task
+            except asyncio.CancelledError:
+                pass
+        await self.batcher.stop()
+
+    async def _watch_drift(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.drift_every)
+            snapshot = await loop.run_in_executor(None, self.predictor.drift_snapshot)
+            if snapshot is None:
+                continue
+            if self.drift_out:
+                await loop.run_in_executor(None, _write_json, self.drift_out, snapshot)
+            if snapshot["drifted"] != self.drifted and snapshot["drifted"]:
+                print(f"⚠️  Input drift over {snapshot['rows']:,} rows: {', '.join(snapshot['drifted'])}")
+            self.drifted = snapshot["drifted"]
+
+    async def handle_predict(self, body):
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            raise BadRequest("Body must be JSON")
+        if not isinstance(payload, dict):
+            raise BadRequest("Body must be a JSON object")
+
+        vitals = parse_vitals(payload.get("vitals"))
+        symptoms = parse_symptoms(payload.get("symptoms"))
+        explain = payload.get("explain", False)
+        if not isinstance(explain, bool):
+            raise BadRequest("'explain' must be true or false")
+        results, flags = await self.batcher.predict({**vitals, **symptoms}, explain)
+        vitals = {name: vitals.get(name, default) for name, default in VITAL_DEFAULTS.items()}
+        return {"results": results, "vitals": vitals, "symptoms": symptoms, "vital_flags": flags}
+
+    def health(self):
+        return {
+            "status": "ok" if self.predictor.model is not None else "loading",
+            "model_loaded": self.predictor.model is not None,
+            "uptime_s": round(time.time() - self.started, 1),
+            "requests": self.requests,
+            "batches": self.batcher.batches,
+            "mean_batch_size": round(self.batcher.rows / self.batcher.batches, 2) if self.batcher.batches else None,
+            "max_batch": self.batcher.max_batch,
+            "max_wait_ms": self.batcher.max_wait * 1000,
+            "cache": self.predictor.cache.stats() if self.predictor.cache is not None else None,
+            "drifted": self.drifted,
+        }
+
+    async def route(self, method, path, body):
+        path = path.split("?", 1)[0]
+        if path == "/health":
+            if method != "GET":
+                return 405, {"error": "Use GET"}
+            return 200, self.health()
+        if path == "/metrics":
+            return 200, registry.to_prometheus()
+        if path == "/drift":
+            if method != "GET":
+                return 405, {"error": "Use GET"}
+            snapshot = self.predictor.drift_snapshot()
+            if snapshot is None:
+                return 404, {"error": "No drift baseline (drift_baseline.json) for this model"}
+            return 200, snapshot
+        if path == "/predict":
+            if method != "POST":
+                return 405, {"error": "Use POST"}
+            self.requests += 1
+            try:
+                return 200, await self.handle_predict(body)
+            except BadRequest as e:
+                return 400, {"error": str(e)}
+        return 404, {"error": f"No route for {path}"}
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "Malformed request line"}, False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version.upper() == "HTTP/1.1")
+                length = headers.get("content-length") or "0"
+                if not (length.isascii() and length.isdigit()):
+                    # Unknown body length: the next request cannot be found either
+                    await self._respond(writer, 400, {"error": "Invalid Content-Length"}, False)
+                    break
+                length = int(length)
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "Body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                try:
+                    status, payload = await self.route(method.upper(), path, body)
+                except Exception as e:
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        if isinstance(payload, str):
+            body, content_type = payload.encode(), "text/plain; version=0.0.4"
+        else:
+            body, content_type = json.dumps(payload, default=_jsonable).encode(), "application/json"
+        head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+async def serve(host, port, predictor, max_batch, max_wait, drift_every=60.0, drift_out=None):
+    app = InferenceServer(predictor, max_batch, max_wait, drift_every, drift_out)
+    app.start()
+    server = await asyncio.start_server(app.handle_connection, host, port)
+    print(f"🚀 Serving on http://{host}:{port} (max batch {max_batch}, max wait {max_wait * 1000:g} ms)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await app.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP disease prediction service with micro-batching")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch", type=int, default=64, help="most requests scored together")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0,
+                        help="how long the first request of a batch waits for others")
+    parser.add_argument("--model", default="disease_model.joblib")
+    parser.add_argument("--scaler", default="scaler.joblib")
+    parser.add_argument("--feature-cols", default="feature_cols.joblib")
+    parser.add_argument("--vitals", default="vitals.csv")
+    parser.add_argument("--cache-size", type=int, default=4096, help="cached feature rows (0 = off)")
+    parser.add_argument("--cache-ttl", type=float, default=300.0, help="seconds a cached answer is kept")
+    parser.add_argument("--drift-baseline", default="drift_baseline.json")
+    parser.add_argument("--drift-every", type=float, default=60.0, help="seconds between drift checks (0 = off)")
+    parser.add_argument("--drift-out", default=None, help="write every drift snapshot to this JSON file")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.model):
+        print(f"❌ ERROR: {args.model} NOT FOUND. Run train_model.py first.")
+        return 1
+
+    predictor = DiseasePredictor(args.model, args.scaler, args.feature_cols, args.vitals,
+                                 args.cache_size, args.cache_ttl, args.drift_baseline)
+    print("⏳ Loading model...")
+    predictor.ensure_loaded()
+
+    try:
+        asyncio.run(serve(args.host, args.port, predictor, args.max_batch, args.max_wait_ms / 1000,
+                          args.drift_every, args.drift_out))
+    except KeyboardInterrupt:
+        print("\n👋 Server stopped")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
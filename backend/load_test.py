@@ -0,0 +1,120 @@
+# load_test.py
+# -------------------------------------------------------
+# LOCAL LOAD TEST FOR inference_server.py
+# -------------------------------------------------------
+#
+# Usage:
+#   python backend/inference_server.py &
+#   python backend/load_test.py --requests 5000 --concurrency 64
+#   python backend/load_test.py --structured      # JSON vitals/symptoms instead of text
+#
+# Opens --concurrency keep-alive connections and sends --requests POST
+# /predict calls between them as fast as the server answers. Reports
+# req/s, latency percentiles and the server's mean batch size (/health).
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+
+SYMPTOMS = ["fever", "cough", "headache", "fatigue", "chest_pain", "shortness_of_breath",
+            "dizziness", "sore_throat", "runny_nose", "increased_thirst", "blurred_vision"]
+
+
+def make_payloads(n, structured=False, seed=0):
+    rng = random.Random(seed)
+    payloads = []
+    for _ in range(n):
+        symptoms = rng.sample(SYMPTOMS, rng.randint(1, 4))
+        sugar, sys_bp, dia_bp = rng.randint(80, 250), rng.randint(100, 180), rng.randint(60, 110)
+        if structured:
+            payloads.append({"vitals": {"fasting_blood_sugar": sugar, "systolic_bp": sys_bp,
+                                        "diastolic_bp": dia_bp},
+                             "symptoms": symptoms})
+        else:
+            payloads.append({"vitals": f"fasting blood sugar: {sugar}, bp {sys_bp}/{dia_bp}",
+                             "symptoms": "I have " + ", ".join(s.replace("_", " ") for s in symptoms)})
+    return [json.dumps(p).encode() for p in payloads]
+
+
+async def request(reader, writer, host, method, path, body=b""):
+    writer.write((f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"
+                  f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+    return status, await reader.readexactly(length)
+
+
+async def run(host, port, payloads, concurrency):
+    latencies = []
+    errors = 0
+    next_index = 0
+
+    async def client():
+        nonlocal next_index, errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while next_index < len(payloads):
+                body = payloads[next_index]
+                next_index += 1
+                start = time.perf_counter()
+                status, _ = await request(reader, writer, host, "POST", "/predict", body)
+                latencies.append(time.perf_counter() - start)
+                errors += status != 200
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, health = await request(reader, writer, host, "GET", "/health")
+    writer.close()
+    return latencies, errors, elapsed, json.loads(health)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the inference server")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--structured", action="store_true", help="send structured JSON instead of text")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    url = urlparse(args.url)
+    payloads = make_payloads(args.requests, args.structured, args.seed)
+    try:
+        latencies, errors, elapsed, health = asyncio.run(
+            run(url.hostname, url.port or 80, payloads, args.concurrency))
+    except ConnectionError as e:
+        print(f"❌ Cannot reach {args.url}: {e}")
+        return 1
+
+    ms = np.array(latencies) * 1000
+    print(f"\n📊 {len(latencies):,} requests, {args.concurrency} connections, {elapsed:.2f}s")
+    print(f"   throughput     {len(latencies) / elapsed:,.0f} req/s")
+    print(f"   latency p50    {np.percentile(ms, 50):.2f} ms")
+    print(f"   latency p90    {np.percentile(ms, 90):.2f} ms")
+    print(f"   latency p99    {np.percentile(ms, 99):.2f} ms")
+    print(f"   latency max    {ms.max():.2f} ms")
+    print(f"   errors         {errors}")
+    print(f"   server mean batch size {health.get('mean_batch_size')}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+# prediction_cache.py
+# -------------------------------------------------------
+# BOUNDED LRU + TTL CACHE OF PREDICTIONS
+# -------------------------------------------------------
+#
+# Missing vitals are filled with fixed defaults and the symptoms are a
+# 20-bit vector, so many requests end up with exactly the same features.
+# The cache key is (symptom bitmask, vitals tuple): the canonical form of
+# the feature row. A hit skips the DataFrame, the scaling and the forest.
+#
+# Vitals are used exactly by default, so a cached answer is always the one
+# the model would give. vital_precision=N rounds them to N decimals first
+# for a higher hit rate. Two values that round the same way but sit on
+# either side of a split threshold then share one answer.
+#
+# DiseasePredictor clears the cache whenever it (re)loads the artifacts.
+# Each clear() bumps a generation number, and results computed under an
+# older generation are not stored.
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    def __init__(self, maxsize=4096, ttl=300.0, vital_precision=None):
+        if maxsize < 1:
+            raise ValueError("maxsize must be >= 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.vital_precision = vital_precision
+        self.generation = 0
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def make_key(self, row, vital_cols, symptom_cols):
+        """Canonical key of one {feature: value} row"""
+        mask = 0
+        for i, name in enumerate(symptom_cols):
+            if row.get(name):
+                mask |= 1 << i
+        vitals = []
+        for name in vital_cols:
+            value = row.get(name)
+            if value is None or (isinstance(value, float) and math.isnan(value)):
+                vitals.append(None)
+            else:
+                value = float(value)
+                vitals.append(round(value, self.vital_precision) if self.vital_precision is not None else value)
+        return mask, tuple(vitals)
+
+    def get(self, key):
+        """Cached value for key, or None (counted as a miss)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, value, generation=None):
+        """Store value unless the cache was cleared since `generation`"""
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry, e.g. because the model changed"""
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+            self.invalidations += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
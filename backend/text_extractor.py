@@ -0,0 +1,220 @@
+import re
+
+try:
+    import ahocorasick  # pyahocorasick, optional: C Aho-Corasick automaton
+except ImportError:
+    ahocorasick = None
+
+# =====================================================
+# PATTERNS AND KEYWORDS
+# =====================================================
+
+# Vital sign patterns, in priority order for each vital: the first pattern
+# that matches anywhere in the text wins.
+VITAL_PATTERNS = {
+    'fasting_blood_sugar': [r'fasting[_\s]*blood[_\s]*sugar[:\s]*(\d+)', r'fbs[:\s]*(\d+)'],
+    'random_blood_sugar': [r'random[_\s]*blood[_\s]*sugar[:\s]*(\d+)', r'rbs[:\s]*(\d+)', r'blood[_\s]*sugar[:\s]*(\d+)'],
+    'hba1c': [r'hba1c[:\s]*(\d+\.?\d*)', r'a1c[:\s]*(\d+\.?\d*)'],
+    'systolic_bp': [r'systolic[_\s]*bp[:\s]*(\d+)', r'bp[:\s]*(\d+)[/\s]', r'blood[_\s]*pressure[:\s]*(\d+)'],
+    'diastolic_bp': [r'diastolic[_\s]*bp[:\s]*(\d+)', r'bp[:\s]*\d+[/\s]*(\d+)']
+}
+
+# Used for vitals not mentioned in the text (normal range midpoints)
+VITAL_DEFAULTS = {
+    'fasting_blood_sugar': 100,
+    'random_blood_sugar': 120,
+    'hba1c': 5.5,
+    'systolic_bp': 120,
+    'diastolic_bp': 80
+}
+
+SYMPTOM_KEYWORDS = {
+    'fever': ['fever', 'high temperature', 'pyrexia'],
+    'cough': ['cough', 'coughing'],
+    'headache': ['headache', 'head pain', 'migraine'],
+    'fatigue': ['fatigue', 'tired', 'weakness', 'exhausted'],
+    'chest_pain': ['chest pain', 'chest discomfort'],
+    'shortness_of_breath': ['shortness of breath', 'breathless', 'difficulty breathing', 'dyspnea'],
+    'dizziness': ['dizziness', 'dizzy', 'lightheaded'],
+    'nosebleeds': ['nosebleed', 'nose bleed', 'bleeding nose'],
+    'sore_throat': ['sore throat', 'throat pain'],
+    'runny_nose': ['runny nose', 'nasal discharge'],
+    'sneezing': ['sneeze', 'sneezing'],
+    'muscle_aches': ['muscle ache', 'body ache', 'muscle pain'],
+    'increased_thirst': ['thirst', 'thirsty', 'increased thirst'],
+    'frequent_urination': ['frequent urination', 'urinating often', 'pee often'],
+    'blurred_vision': ['blurred vision', 'blurry vision', 'vision problem'],
+    'weight_loss': ['weight loss', 'losing weight'],
+    'numbness': ['numbness', 'numb'],
+    'tingling': ['tingling', 'pins and needles'],
+    'weakness': ['weakness', 'weak'],
+    'hunger': ['hunger', 'hungry', 'increased appetite']
+}
+
+
+# =====================================================
+# COMPILED EXTRACTOR
+# =====================================================
+
+def _literal_prefix(pattern):
+    """Leading literal text of a regex, used as the trigger for that pattern"""
+    return re.match(r'[a-z0-9]+', pattern).group(0)
+
+
+class _Scanner:
+    """Finds every occurrence of a set of trigger words in one pass of a
+    pyahocorasick automaton. Each word maps to (vital pattern indices,
+    symptom bitmask); overlapping words are all reported."""
+
+    def __init__(self, vital_triggers, symptom_triggers):
+        self.automaton = ahocorasick.Automaton()
+        for word in set(vital_triggers) | set(symptom_triggers):
+            mask = 0
+            for i in symptom_triggers.get(word, ()):
+                mask |= 1 << i
+            self.automaton.add_word(word, (len(word) - 1, tuple(vital_triggers.get(word, ())), mask))
+        self.automaton.make_automaton()
+
+    def occurrences(self, text_lower):
+        """Yield (start, vital pattern indices, symptom bitmask) in text order"""
+        for end, (length, pattern_ids, mask) in self.automaton.iter(text_lower):
+            yield end - length, pattern_ids, mask
+
+
+class TextExtractor:
+    """Extract vitals and symptoms from free text in a single scan.
+
+    Every vital pattern starts with a literal word ("fasting", "bp", "a1c",
+    ...). Those words and all symptom keywords go into one scanner, so one
+    pass over the text finds every place a vital or symptom is mentioned.
+    The full vital patterns are then only tried at those positions.
+
+    Without pyahocorasick (or with use_automaton=False) the original scans
+    are used: a substring check per keyword, and re.search per vital
+    pattern, skipped when its literal word is not in the text.
+
+    The results are identical to the original per-pattern re.search and
+    per-keyword substring scans.
+    """
+
+    def __init__(self, vital_patterns=VITAL_PATTERNS, vital_defaults=VITAL_DEFAULTS,
+                 symptom_keywords=SYMPTOM_KEYWORDS, use_automaton=None):
+        self.vital_names = list(vital_patterns)
+        self.vital_defaults = dict(vital_defaults)
+        self.symptom_names = list(symptom_keywords)
+        self._symptom_bits = {1 << i: name for i, name in enumerate(self.symptom_names)}
+
+        # Flatten vital patterns, remembering their priority inside each vital
+        self._patterns = []      # compiled pattern per index
+        self._priority = []      # list of pattern indices per vital
+        vital_triggers = {}
+        for vital in self.vital_names:
+            indices = []
+            for pattern in vital_patterns[vital]:
+                idx = len(self._patterns)
+                self._patterns.append(re.compile(pattern))
+                vital_triggers.setdefault(_literal_prefix(pattern), []).append(idx)
+                indices.append(idx)
+            self._priority.append(indices)
+
+        symptom_triggers = {}
+        for i, symptom in enumerate(self.symptom_names):
+            for keyword in symptom_keywords[symptom]:
+                symptom_triggers.setdefault(keyword, []).append(i)
+
+        if use_automaton is None:
+            use_automaton = ahocorasick is not None
+        if use_automaton:
+            self._vital_scanner = _Scanner(vital_triggers, {})
+            self._symptom_scanner = _Scanner({}, symptom_triggers)
+            self._full_scanner = _Scanner(vital_triggers, symptom_triggers)
+        else:
+            self._vital_scanner = self._symptom_scanner = self._full_scanner = None
+            # (literal word, pattern) per vital in priority order, and
+            # (keyword, symptom bit) pairs for the plain substring checks
+            triggers = {idx: word for word, ids in vital_triggers.items() for idx in ids}
+            self._searches = [[(triggers[idx], self._patterns[idx]) for idx in indices]
+                              for indices in self._priority]
+            self._keyword_bits = [(keyword, 1 << i) for keyword, ids in symptom_triggers.items() for i in ids]
+
+    def _search(self, text_lower, vitals=True, symptoms=True):
+        """_scan() without an automaton: the original per-pattern searches"""
+        values = {}
+        if vitals:
+            for indices, searches in zip(self._priority, self._searches):
+                for idx, (word, pattern) in zip(indices, searches):
+                    if word in text_lower:
+                        match = pattern.search(text_lower)
+                        if match:
+                            values[idx] = float(match.group(1))
+                            break
+        symptom_mask = 0
+        if symptoms:
+            for keyword, bit in self._keyword_bits:
+                if not symptom_mask & bit and keyword in text_lower:
+                    symptom_mask |= bit
+        return values, symptom_mask
+
+    def _scan(self, text_lower, scanner, vitals=True, symptoms=True):
+        """Return ({pattern index: first value}, symptom bitmask) for a text"""
+        if scanner is None:
+            return self._search(text_lower, vitals, symptoms)
+        values = {}
+        symptom_mask = 0
+        patterns = self._patterns
+        for pos, pattern_ids, mask in scanner.occurrences(text_lower):
+            symptom_mask |= mask
+            for idx in pattern_ids:
+                if idx not in values:
+                    match = patterns[idx].match(text_lower, pos)
+                    if match:
+                        values[idx] = float(match.group(1))
+        return values, symptom_mask
+
+    def _vitals_dict(self, values, fill_defaults=True):
+        vitals = {}
+        for vital, indices in zip(self.vital_names, self._priority):
+            for idx in indices:
+                if idx in values:
+                    vitals[vital] = values[idx]
+                    break
+        if not fill_defaults:
+            return vitals
+        # Fill missing vitals with normal range midpoints
+        for vital in self.vital_names:
+            if vital not in vitals:
+                vitals[vital] = self.vital_defaults[vital]
+        return vitals
+
+    def _symptoms_dict(self, mask):
+        symptoms = dict.fromkeys(self.symptom_names, 0)
+        while mask:
+            bit = mask & -mask
+            symptoms[self._symptom_bits[bit]] = 1
+            mask ^= bit
+        return symptoms
+
+    def extract_vitals(self, text, fill_defaults=True):
+        """Extract vital signs from free text input. With fill_defaults=False
+        the vitals the text does not mention are left out."""
+        values, _ = self._scan(text.lower(), self._vital_scanner, symptoms=False)
+        return self._vitals_dict(values, fill_defaults)
+
+    def extract_symptoms(self, text):
+        """Extract symptoms from free text input"""
+        _, mask = self._scan(text.lower(), self._symptom_scanner, vitals=False)
+        return self._symptoms_dict(mask)
+
+    def extract(self, text, fill_defaults=True):
+        """Extract (vitals, symptoms) from one text in a single pass"""
+        values, mask = self._scan(text.lower(), self._full_scanner)
+        return self._vitals_dict(values, fill_defaults), self._symptoms_dict(mask)
+
+    def extract_many(self, texts, fill_defaults=True):
+        """Extract (vitals, symptoms) for every text in an iterable"""
+        extract = self.extract
+        return [extract(text, fill_defaults) for text in texts]
+
+
+# Shared default extractor
+default_extractor = TextExtractor()
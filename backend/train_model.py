@@ -1,239 +1,489 @@
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
 import joblib
 import re
 import os
+import sys
+import threading
+from collections import namedtuple
+
+from text_extractor import default_extractor, VITAL_DEFAULTS
+from prediction_cache import PredictionCache
+
+# Shared helpers (artifact_cache.py, ...) live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from artifact_cache import manifest_key, stale_reasons, atomic_dump, write_manifest
+from metrics import stage, count, profile_request, dump_metrics
+from explain import ForestExplainer, top_drivers
+from vital_rules import compile_rules
+from estimators import make_estimator, is_forest
+from drift_monitor import DriftMonitor, build_baseline, save_baseline, load_baseline
 
 # =====================================================
 # STEP 1: TRAIN THE MODEL (Run this once)
 # =====================================================
 
-def train_model():
+# Binary symptom features used by the model
+all_symptoms = [
+    'fever', 'cough', 'headache', 'fatigue', 'chest_pain',
+    'shortness_of_breath', 'dizziness', 'nosebleeds', 'sore_throat',
+    'runny_nose', 'sneezing', 'muscle_aches', 'increased_thirst',
+    'frequent_urination', 'blurred_vision', 'weight_loss',
+    'numbness', 'tingling', 'weakness', 'hunger'
+]
+
+vital_cols = ['fasting_blood_sugar', 'random_blood_sugar', 'hba1c', 'systolic_bp', 'diastolic_bp']
+
+SAMPLES_PER_DISEASE = 50
+
+# Training inputs ship next to this file, so any working directory works
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+SYMPTOMS_CSV = os.path.join(BACKEND_DIR, "symptoms.csv")
+VITALS_CSV = os.path.join(BACKEND_DIR, "vitals.csv")
+MODEL_PARAMS = {"n_estimators": 200, "random_state": 42, "max_depth": 10}
+ESTIMATOR = "random_forest"   # or extra_trees / hist_gb, see estimators.py
+
+# Own name: model_manifest.json is medical_disease_prediction.py's, and both
+# scripts may run from the same directory
+MANIFEST_FILE = "disease_model_manifest.json"
+DRIFT_BASELINE = "drift_baseline.json"
+ARTIFACTS = ("disease_model.joblib", "scaler.joblib", "feature_cols.joblib", DRIFT_BASELINE)
+
+
+def generate_training_data(symptoms_df, vitals_df, samples_per_disease=SAMPLES_PER_DISEASE, seed=42):
+    """Build the synthetic training set with NumPy array operations.
+
+    The vitals ranges (vital_rules.py) and the symptom -> keyword mapping
+    are parsed once; each disease's block of samples is then drawn in one go
+    from a seeded Generator, so the sample count can go up to 100k per disease.
+    """
+    rng = np.random.default_rng(seed)
+    rules = compile_rules(vitals_df, vital_cols)
+    keywords = [symptom.replace('_', ' ').lower() for symptom in all_symptoms]
+
+    blocks = []
+    for disease in symptoms_df['disease'].unique():
+        # Get symptoms for this disease
+        disease_symptoms = symptoms_df[symptoms_df['disease'] == disease]['symptom'].tolist()
+
+        n = samples_per_disease
+        block = {}
+
+        # Vitals: uniform draws inside each parsed range
+        for col in vital_cols:
+            low, high = rules.sampling_range(disease, col)
+            block[col] = rng.uniform(low, high, size=n)
+
+        # Which of the binary symptom features each disease symptom mentions
+        mentions = np.array([[keyword in s.lower() for keyword in keywords]
+                             for s in disease_symptoms])
+
+        # Randomly select 2-5 symptoms per sample (without replacement): the
+        # first k entries of a random permutation of the disease's symptoms
+        n_symptoms = len(disease_symptoms)
+        low = min(2, n_symptoms)
+        num_selected = rng.integers(low, max(min(6, n_symptoms + 1), low + 1), size=n)
+        ranks = np.argsort(rng.random((n, n_symptoms)), axis=1).argsort(axis=1)
+        selected = ranks < num_selected[:, None]
+
+        # A feature is 1 if any selected symptom contains its keyword
+        features = (selected.astype(np.int32) @ mentions.astype(np.int32)) > 0
+        for j, symptom in enumerate(all_symptoms):
+            block[symptom] = features[:, j].astype(np.int64)
+
+        block['disease'] = np.full(n, disease, dtype=object)
+        blocks.append(pd.DataFrame(block))
+
+    return pd.concat(blocks, ignore_index=True)
+
+
+def train_model(samples_per_disease=SAMPLES_PER_DISEASE, seed=42, estimator=ESTIMATOR):
     """Train model from symptoms and vitals CSV files"""
     
     # Load data
-    symptoms_df = pd.read_csv("dbackend/igital-health-twin/symptoms.csv")
-    vitals_df = pd.read_csv("backend/digital-health-twin/vitals.csv")
-    
-    # Get unique diseases
-    diseases = symptoms_df['disease'].unique()
+    symptoms_df = pd.read_csv(SYMPTOMS_CSV)
+    vitals_df = pd.read_csv(VITALS_CSV)
     
     # Create training dataset
-    training_data = []
-    
-    for disease in diseases:
-        # Get symptoms for this disease
-        disease_symptoms = symptoms_df[symptoms_df['disease'] == disease]['symptom'].tolist()
-        
-        # Get vitals for this disease
-        disease_vitals = vitals_df[vitals_df['disease'] == disease].iloc[0]
-        
-        # Create multiple training samples with variations
-        for _ in range(50):  # 50 samples per disease
-            sample = {}
-            
-            # Parse vitals
-            sample['fasting_blood_sugar'] = parse_vital_range(disease_vitals['fasting_blood_sugar'])
-            sample['random_blood_sugar'] = parse_vital_range(disease_vitals['random_blood_sugar'])
-            sample['hba1c'] = parse_vital_range(disease_vitals['hba1c'])
-            sample['systolic_bp'] = parse_vital_range(disease_vitals['systolic_bp'])
-            sample['diastolic_bp'] = parse_vital_range(disease_vitals['diastolic_bp'])
-            
-            # Add symptom features (randomly select 2-5 symptoms)
-            num_symptoms = np.random.randint(2, min(6, len(disease_symptoms) + 1))
-            selected_symptoms = np.random.choice(disease_symptoms, num_symptoms, replace=False)
-            
-            # Create binary features for common symptoms
-            all_symptoms = [
-                'fever', 'cough', 'headache', 'fatigue', 'chest_pain', 
-                'shortness_of_breath', 'dizziness', 'nosebleeds', 'sore_throat',
-                'runny_nose', 'sneezing', 'muscle_aches', 'increased_thirst',
-                'frequent_urination', 'blurred_vision', 'weight_loss', 
-                'numbness', 'tingling', 'weakness', 'hunger'
-            ]
-            
-            for symptom in all_symptoms:
-                sample[symptom] = 0
-                # Check if any selected symptom contains this keyword
-                for s in selected_symptoms:
-                    if symptom.replace('_', ' ').lower() in s.lower():
-                        sample[symptom] = 1
-                        break
-            
-            sample['disease'] = disease
-            training_data.append(sample)
-    
-    # Create DataFrame
-    df = pd.DataFrame(training_data)
+    df = generate_training_data(symptoms_df, vitals_df, samples_per_disease, seed)
     
     # Separate features and target
     feature_cols = [col for col in df.columns if col != 'disease']
-    X = df[feature_cols]
+    X = df[feature_cols].copy()
     y = df['disease']
     
+    # Training distribution of every input, for drift_monitor.py
+    baseline = build_baseline(X, vital_cols, [col for col in feature_cols if col not in vital_cols])
+
     # Scale numeric features
-    numeric_cols = ['fasting_blood_sugar', 'random_blood_sugar', 'hba1c', 'systolic_bp', 'diastolic_bp']
+    numeric_cols = vital_cols
     scaler = StandardScaler()
     X[numeric_cols] = scaler.fit_transform(X[numeric_cols])
     
     # Train model
-    model = RandomForestClassifier(n_estimators=200, random_state=42, max_depth=10)
+    model = make_estimator(estimator, **MODEL_PARAMS)
     model.fit(X, y)
     
-    # Save model and metadata
-    joblib.dump(model, "disease_model.joblib")
-    joblib.dump(scaler, "scaler.joblib")
-    joblib.dump(feature_cols, "feature_cols.joblib")
+    # Save model and metadata, then record what they were built from
+    atomic_dump(model, "disease_model.joblib")
+    atomic_dump(scaler, "scaler.joblib")
+    atomic_dump(feature_cols, "feature_cols.joblib")
+    save_baseline(baseline, DRIFT_BASELINE)
+    write_manifest(MANIFEST_FILE, training_key(samples_per_disease, seed, feature_cols, estimator), ARTIFACTS)
     
     print("✅ Model trained and saved successfully!")
     return model, scaler, feature_cols
 
 
-def parse_vital_range(value):
-    """Parse vital signs from text and return numeric value with variation"""
+def training_key(samples_per_disease=SAMPLES_PER_DISEASE, seed=42, feature_cols=None, estimator=ESTIMATOR):
+    """Manifest key of a train_model() run: input CSV hashes, features, parameters"""
+    return manifest_key(
+        inputs=[SYMPTOMS_CSV, VITALS_CSV],
+        feature_cols=feature_cols or vital_cols + all_symptoms,
+        params={**MODEL_PARAMS, "estimator": estimator, "samples_per_disease": samples_per_disease, "seed": seed},
+    )
+
+
+def ensure_trained(samples_per_disease=SAMPLES_PER_DISEASE, seed=42, estimator=ESTIMATOR):
+    """Train only if the saved artifacts do not match the current inputs.
+
+    Returns True if the model was (re)trained. Without the input CSVs the
+    saved artifacts are used as they are.
+    """
+    missing = [path for path in (SYMPTOMS_CSV, VITALS_CSV) if not os.path.exists(path)]
+    if missing and all(os.path.exists(path) for path in ARTIFACTS[:3]):
+        print(f"⚠️  {', '.join(missing)} not found: reusing saved model")
+        return False
+    stale = stale_reasons(MANIFEST_FILE, training_key(samples_per_disease, seed, estimator=estimator), ARTIFACTS)
+    if not stale:
+        print("✅ Training data, features, parameters and libraries unchanged: reusing saved model")
+        return False
+    print(f"⚙️  Training model: {'; '.join(stale)}")
+    train_model(samples_per_disease, seed, estimator)
+    return True
+
+
+def vital_range_bounds(value):
+    """Parse a vitals.csv entry into the (low, high) range samples are drawn from"""
     value_str = str(value).lower()
     
     if 'normal' in value_str or 'n/a' in value_str:
-        return np.random.uniform(90, 110)  # Normal range
+        return 90.0, 110.0  # Normal range
     
     # Extract numbers
     numbers = re.findall(r'\d+\.?\d*', value_str)
     if numbers:
         base = float(numbers[0])
         # Add some variation
-        variation = np.random.uniform(-5, 5)
-        return base + variation
+        return base - 5, base + 5
     
-    return 100.0  # Default
+    return 100.0, 100.0  # Default
+
+
+def parse_vital_range(value):
+    """Parse vital signs from text and return numeric value with variation"""
+    low, high = vital_range_bounds(value)
+    return np.random.uniform(low, high)
 
 
 # =====================================================
 # STEP 2: PREDICTION SYSTEM
 # =====================================================
 
-def extract_vitals_from_text(text, vitals_df):
-    """Extract vital signs from free text input"""
-    vitals = {}
-    text_lower = text.lower()
-    
-    # Define patterns for each vital
-    patterns = {
-        'fasting_blood_sugar': [r'fasting[_\s]*blood[_\s]*sugar[:\s]*(\d+)', r'fbs[:\s]*(\d+)'],
-        'random_blood_sugar': [r'random[_\s]*blood[_\s]*sugar[:\s]*(\d+)', r'rbs[:\s]*(\d+)', r'blood[_\s]*sugar[:\s]*(\d+)'],
-        'hba1c': [r'hba1c[:\s]*(\d+\.?\d*)', r'a1c[:\s]*(\d+\.?\d*)'],
-        'systolic_bp': [r'systolic[_\s]*bp[:\s]*(\d+)', r'bp[:\s]*(\d+)[/\s]', r'blood[_\s]*pressure[:\s]*(\d+)'],
-        'diastolic_bp': [r'diastolic[_\s]*bp[:\s]*(\d+)', r'bp[:\s]*\d+[/\s]*(\d+)']
-    }
-    
-    for vital, pattern_list in patterns.items():
-        for pattern in pattern_list:
-            match = re.search(pattern, text_lower)
-            if match:
-                vitals[vital] = float(match.group(1))
-                break
-    
-    # Fill missing vitals with mean from training data
-    for col in ['fasting_blood_sugar', 'random_blood_sugar', 'hba1c', 'systolic_bp', 'diastolic_bp']:
-        if col not in vitals:
-            # Use normal range midpoint as default
-            defaults = {
-                'fasting_blood_sugar': 100,
-                'random_blood_sugar': 120,
-                'hba1c': 5.5,
-                'systolic_bp': 120,
-                'diastolic_bp': 80
-            }
-            vitals[col] = defaults[col]
-    
-    return vitals
+def extract_vitals_from_text(text, vitals_df, fill_defaults=True):
+    """Extract vital signs from free text input (fill_defaults=False leaves
+    out the vitals the text does not mention)"""
+    return default_extractor.extract_vitals(text, fill_defaults)
 
 
 def extract_symptoms_from_text(text):
     """Extract symptoms from free text input"""
-    symptoms = {}
-    text_lower = text.lower()
-    
-    # Define symptom keywords
-    symptom_keywords = {
-        'fever': ['fever', 'high temperature', 'pyrexia'],
-        'cough': ['cough', 'coughing'],
-        'headache': ['headache', 'head pain', 'migraine'],
-        'fatigue': ['fatigue', 'tired', 'weakness', 'exhausted'],
-        'chest_pain': ['chest pain', 'chest discomfort'],
-        'shortness_of_breath': ['shortness of breath', 'breathless', 'difficulty breathing', 'dyspnea'],
-        'dizziness': ['dizziness', 'dizzy', 'lightheaded'],
-        'nosebleeds': ['nosebleed', 'nose bleed', 'bleeding nose'],
-        'sore_throat': ['sore throat', 'throat pain'],
-        'runny_nose': ['runny nose', 'nasal discharge'],
-        'sneezing': ['sneeze', 'sneezing'],
-        'muscle_aches': ['muscle ache', 'body ache', 'muscle pain'],
-        'increased_thirst': ['thirst', 'thirsty', 'increased thirst'],
-        'frequent_urination': ['frequent urination', 'urinating often', 'pee often'],
-        'blurred_vision': ['blurred vision', 'blurry vision', 'vision problem'],
-        'weight_loss': ['weight loss', 'losing weight'],
-        'numbness': ['numbness', 'numb'],
-        'tingling': ['tingling', 'pins and needles'],
-        'weakness': ['weakness', 'weak'],
-        'hunger': ['hunger', 'hungry', 'increased appetite']
-    }
-    
-    for symptom, keywords in symptom_keywords.items():
-        symptoms[symptom] = 0
-        for keyword in keywords:
-            if keyword in text_lower:
-                symptoms[symptom] = 1
-                break
-    
-    return symptoms
+    return default_extractor.extract_symptoms(text)
 
 
-def predict_disease(vitals_text, symptoms_text):
-    """Main prediction function"""
-    
-    # Load model and metadata
-    if not os.path.exists("disease_model.joblib"):
-        print("❌ Model not found. Training model first...")
-        train_model()
-    
-    model = joblib.load("disease_model.joblib")
-    scaler = joblib.load("scaler.joblib")
-    feature_cols = joblib.load("feature_cols.joblib")
-    
-    # Load vitals reference
-    vitals_df = pd.read_csv("vitals.csv")
-    
-    # Extract data from input
-    vitals = extract_vitals_from_text(vitals_text, vitals_df)
-    symptoms = extract_symptoms_from_text(symptoms_text)
-    
-    # Combine into feature vector
-    user_data = {**vitals, **symptoms}
-    
-    # Create DataFrame with correct column order
-    user_df = pd.DataFrame([user_data], columns=feature_cols)
-    
-    # Scale numeric features
+# Everything one load() read from disk. It is replaced as a whole, so a
+# request that took it once never mixes a new model with an old scaler.
+# cache_generation is the prediction cache generation these artifacts
+# fill: a request still scoring with the previous model cannot store its
+# results for the new one.
+LoadedArtifacts = namedtuple("LoadedArtifacts",
+                             "model scaler feature_cols symptom_cols rules drift cache_generation")
+
+
+def _artifact(name):
+    return property(lambda self: getattr(self._artifacts, name, None),
+                    doc=f"{name} of the loaded artifacts (None before the first load)")
+
+
+class DiseasePredictor:
+    """Keeps the model, scaler and feature columns loaded between predictions.
+
+    Artifacts are loaded on first use and reloaded automatically when any of
+    the files on disk change (their mtime moves), so retraining does not
+    require restarting a long-running process. A reload publishes a new
+    LoadedArtifacts; requests already running finish with the one they took.
+
+    Results are cached per distinct feature row (see prediction_cache.py);
+    cache_size=0 turns the cache off. A reload empties it.
+
+    With explain=True every result also lists the features that drove it
+    (explain.py); the explainer is built from the model on first use.
+
+    vitals.csv is compiled into a RuleTable (vital_rules.py) on load;
+    flag_features() checks a batch of rows against it.
+
+    Rows may leave vitals out (or set them to NaN): the model then sees
+    the text parser's defaults (VITAL_DEFAULTS), while the vitals.csv
+    rules only check the vitals that were given.
+
+    When drift_baseline.json (written by train_model) exists, every
+    predicted row also goes into a DriftMonitor (drift_monitor.py);
+    drift_snapshot() compares what has been seen with the training data.
+    Vitals a row leaves out count as missing there.
+    """
+
     numeric_cols = ['fasting_blood_sugar', 'random_blood_sugar', 'hba1c', 'systolic_bp', 'diastolic_bp']
-    user_df[numeric_cols] = scaler.transform(user_df[numeric_cols])
-    
-    # Get prediction probabilities
-    probabilities = model.predict_proba(user_df)[0]
-    classes = model.classes_
-    
-    # Get top 3 predictions
-    top_indices = np.argsort(probabilities)[::-1][:3]
-    
-    results = []
-    for idx in top_indices:
-        if probabilities[idx] > 0.05:  # Only show if >5% probability
-            results.append({
-                'disease': classes[idx],
-                'probability': probabilities[idx] * 100
-            })
-    
-    return results, vitals, symptoms
+    vital_defaults = VITAL_DEFAULTS
+
+    model = _artifact("model")
+    scaler = _artifact("scaler")
+    feature_cols = _artifact("feature_cols")
+    symptom_cols = _artifact("symptom_cols")
+    rules = _artifact("rules")
+    drift = _artifact("drift")
+
+    def __init__(self, model_path="disease_model.joblib", scaler_path="scaler.joblib",
+                 feature_cols_path="feature_cols.joblib", vitals_path="vitals.csv",
+                 cache_size=4096, cache_ttl=300.0, drift_baseline_path=DRIFT_BASELINE):
+        self.model_path = model_path
+        self.scaler_path = scaler_path
+        self.feature_cols_path = feature_cols_path
+        self.vitals_path = vitals_path
+        self.drift_baseline_path = drift_baseline_path
+
+        self._artifacts = None
+        self._explainer = None   # (LoadedArtifacts, ForestExplainer) it was built for
+        self.cache = PredictionCache(cache_size, cache_ttl) if cache_size else None
+        self._mtimes = None
+        self._lock = threading.Lock()
+
+    def _artifact_mtimes(self):
+        paths = (self.model_path, self.scaler_path, self.feature_cols_path, self.vitals_path)
+        return tuple(os.stat(path).st_mtime_ns for path in paths)
+
+    def _changed(self):
+        """True before the first load and when a file on disk has changed"""
+        try:
+            current = self._artifact_mtimes()
+        except FileNotFoundError:
+            current = None
+        return self._mtimes is None or current != self._mtimes
+
+    def load(self):
+        """Load (or reload) every artifact from disk"""
+        with self._lock:
+            self._load()
+        return self._artifacts
+
+    def _load(self):
+        # Caller holds self._lock
+        if not os.path.exists(self.model_path):
+            print("❌ Model not found. Training model first...")
+            train_model()
+
+        mtimes = self._artifact_mtimes()
+        with stage("load_artifacts"):
+            model = joblib.load(self.model_path)
+            scaler = joblib.load(self.scaler_path)
+            feature_cols = joblib.load(self.feature_cols_path)
+        with stage("compile_vital_rules"):
+            rules = compile_rules(self.vitals_path)
+        symptom_cols = [col for col in feature_cols if col not in self.numeric_cols]
+        # A new model comes with its own baseline: start counting again
+        drift = None
+        if self.drift_baseline_path and os.path.exists(self.drift_baseline_path):
+            drift = DriftMonitor(load_baseline(self.drift_baseline_path))
+
+        generation = None
+        if self.cache is not None:
+            if self._mtimes is not None:
+                self.cache.clear()
+            generation = self.cache.generation
+        self._artifacts = LoadedArtifacts(model, scaler, feature_cols, symptom_cols, rules, drift,
+                                          generation)
+        self._mtimes = mtimes
+        count("artifact_loads_total", help_text="Times the model artifacts were (re)loaded")
+
+    def ensure_loaded(self):
+        """Load artifacts on first use and hot-reload them when they change.
+        Returns the LoadedArtifacts to use for this request."""
+        if self._changed():
+            with self._lock:
+                # Another request may have reloaded while this one waited
+                if self._changed():
+                    self._load()
+        return self._artifacts
+
+    def predict(self, vitals_text, symptoms_text, explain=False):
+        """Predict the top 3 diseases from free-text vitals and symptoms"""
+        with stage("ensure_loaded"):
+            artifacts = self.ensure_loaded()
+
+        # Extract data from input
+        with stage("extract_vitals"):
+            measured = extract_vitals_from_text(vitals_text, None, fill_defaults=False)
+        with stage("extract_symptoms"):
+            symptoms = extract_symptoms_from_text(symptoms_text)
+
+        # Combine into feature vector
+        user_data = {**measured, **symptoms}
+
+        results = self._predict_rows(artifacts, [user_data], explain)[0]
+        vitals = {col: measured.get(col, default) for col, default in self.vital_defaults.items()}
+        return results, vitals, symptoms
+
+    def predict_features(self, rows, explain=False):
+        """Top 3 diseases for every {feature: value} dict in `rows`, scored
+        with a single predict_proba call. Missing vitals get their defaults."""
+        with stage("ensure_loaded"):
+            artifacts = self.ensure_loaded()
+        return self._predict_rows(artifacts, rows, explain)
+
+    def flag_features(self, rows):
+        """vitals.csv rules that every row satisfies, per row:
+        [{"disease": ..., "vitals": [...]}] (see vital_rules.py). Rules on
+        vitals a row leaves out (or sets to NaN) are not checked."""
+        with stage("ensure_loaded"):
+            artifacts = self.ensure_loaded()
+        with stage("flag_vitals"):
+            return artifacts.rules.flags(rows)
+
+    def explainer(self, artifacts=None):
+        """ForestExplainer for the loaded model (or the one in `artifacts`),
+        None if it is not a forest"""
+        artifacts = artifacts or self._artifacts
+        built = self._explainer
+        if built is not None and built[0] is artifacts:
+            return built[1]
+        if artifacts is None or not is_forest(artifacts.model):
+            return None
+        with stage("build_explainer"):
+            explainer = ForestExplainer(artifacts.model, artifacts.feature_cols)
+        self._explainer = (artifacts, explainer)
+        return explainer
+
+    def drift_snapshot(self):
+        """DriftMonitor.snapshot() of the rows predicted so far, None without a baseline"""
+        drift = self.drift
+        return drift.snapshot() if drift is not None else None
+
+    def _with_defaults(self, rows):
+        """Rows as the model needs them: missing or NaN vitals get their defaults"""
+        filled = []
+        for row in rows:
+            missing = {col: default for col, default in self.vital_defaults.items()
+                       if row.get(col) is None or row[col] != row[col]}
+            filled.append({**row, **missing} if missing else row)
+        return filled
+
+    def _predict_rows(self, artifacts, rows, explain=False):
+        # Drift sees vitals that were not given as missing, not as defaults
+        drift = artifacts.drift
+        if drift is not None:
+            with stage("drift_update"):
+                drift.update_rows(rows)
+        rows = self._with_defaults(rows)
+
+        cache = self.cache
+        if cache is None:
+            return self._score_rows(artifacts, rows, explain)
+
+        # Serve repeated feature rows from the cache; score the rest together
+        generation = artifacts.cache_generation
+        keys = [(cache.make_key(row, self.numeric_cols, artifacts.symptom_cols), explain) for row in rows]
+        results = [cache.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            scored = self._score_rows(artifacts, [rows[i] for i in missing], explain)
+            for i, result in zip(missing, scored):
+                cache.put(keys[i], result, generation)
+                results[i] = result
+        count("prediction_cache_hits_total", len(rows) - len(missing), "Rows answered from the cache")
+        # Copies, so callers cannot change what is cached
+        return [[self._copy_result(entry) for entry in result] for result in results]
+
+    @staticmethod
+    def _copy_result(entry):
+        if 'drivers' in entry:
+            return {**entry, 'drivers': [dict(driver) for driver in entry['drivers']]}
+        return dict(entry)
+
+    def _score_rows(self, artifacts, rows, explain=False):
+        model, scaler, feature_cols = artifacts.model, artifacts.scaler, artifacts.feature_cols
+
+        # Create DataFrame with correct column order
+        with stage("build_dataframe"):
+            user_df = pd.DataFrame(rows, columns=feature_cols)
+
+        # Scale numeric features
+        with stage("scale"):
+            user_df[self.numeric_cols] = scaler.transform(user_df[self.numeric_cols])
+
+        # Get prediction probabilities (and what drove them)
+        contributions = [None] * len(rows)
+        explainer = self.explainer(artifacts) if explain else None
+        if explainer is not None:
+            with stage("explain"):
+                probabilities, contributions = explainer.contributions(user_df)
+        else:
+            with stage("predict_proba"):
+                probabilities = model.predict_proba(user_df)
+        classes = model.classes_
+
+        # Get top 3 predictions
+        with stage("rank_results"):
+            return [self._top_results(row, classes, contrib, feature_cols)
+                    for row, contrib in zip(probabilities, contributions)]
+
+    @staticmethod
+    def _top_results(probabilities, classes, contributions=None, feature_cols=None):
+        top_indices = np.argsort(probabilities)[::-1][:3]
+
+        results = []
+        for idx in top_indices:
+            if probabilities[idx] > 0.05:  # Only show if >5% probability
+                result = {
+                    'disease': classes[idx],
+                    'probability': probabilities[idx] * 100
+                }
+                if contributions is not None:
+                    # Percentage points each feature added to this disease
+                    result['drivers'] = [
+                        {'feature': name, 'contribution': value * 100}
+                        for name, value in top_drivers(contributions[:, idx], feature_cols, 3)
+                    ]
+                results.append(result)
+        return results
+
+
+# Shared predictor so repeated predict_disease calls reuse the loaded artifacts
+_predictor = None
+
+
+def get_predictor():
+    """Return the module-level DiseasePredictor, creating it on first use"""
+    global _predictor
+    if _predictor is None:
+        _predictor = DiseasePredictor()
+    return _predictor
+
+
+def predict_disease(vitals_text, symptoms_text, explain=False):
+    """Main prediction function"""
+    with profile_request("predict_disease"), stage("predict_disease"):
+        count("predictions_total", help_text="predict_disease calls")
+        return get_predictor().predict(vitals_text, symptoms_text, explain)
 
 
 # =====================================================
@@ -246,10 +496,8 @@ def main():
     print("=" * 60)
     print()
     
-    # Check if model exists, if not train it
-    if not os.path.exists("disease_model.joblib"):
-        print("⚙️  First time setup: Training model...")
-        train_model()
+    # Train unless the saved model matches the current data and settings
+    if ensure_trained():
         print()
     
     # Get user input
@@ -267,7 +515,9 @@ def main():
     print("🔍 Analyzing your data...")
     print()
     
-    results, vitals, symptoms = predict_disease(vitals_input, symptoms_input)
+    results, vitals, symptoms = predict_disease(vitals_input, symptoms_input, explain=True)
+    # Only the vitals that were typed in, not the defaults the model used
+    flags = get_predictor().flag_features([extract_vitals_from_text(vitals_input, None, fill_defaults=False)])[0]
     
     # Display results
     print("=" * 60)
@@ -276,6 +526,8 @@ def main():
     print(f"   Vitals: {vitals}")
     active_symptoms = [k for k, v in symptoms.items() if v == 1]
     print(f"   Symptoms detected: {', '.join(active_symptoms) if active_symptoms else 'None'}")
+    for flag in flags:
+        print(f"   ⚠️  Vitals match the {flag['disease']} criteria in vitals.csv ({', '.join(flag['vitals'])})")
     print()
     
     print("=" * 60)
@@ -285,6 +537,9 @@ def main():
     if results:
         for i, result in enumerate(results, 1):
             print(f"   {i}. {result['disease']:<20} → {result['probability']:.1f}% probability")
+            if result.get('drivers'):
+                drivers = ", ".join(f"{d['feature']} {d['contribution']:+.1f}" for d in result['drivers'])
+                print(f"      driven by: {drivers}")
     else:
         print("   Unable to make a confident prediction with the given data.")
     
@@ -293,6 +548,7 @@ def main():
     print("⚠️  DISCLAIMER: This is for educational purposes only.")
     print("   Please consult a healthcare professional for proper diagnosis.")
     print()
+    dump_metrics()  # only when METRICS_OUT is set
 
 
 if __name__ == "__main__":
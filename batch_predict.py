@@ -0,0 +1,190 @@
+# batch_predict.py
+# -------------------------------------------------------
+# BATCH DISEASE PREDICTION FOR CSV / JSONL FILES OF PATIENTS
+# -------------------------------------------------------
+#
+# Usage:
+#   python batch_predict.py patients.csv predictions.csv --top-k 3
+#   python batch_predict.py patients.jsonl predictions.jsonl --chunk-size 100000
+#
+# The input needs the numeric_cols + symptom_cols columns from
+# medical_data.py. Rows are read in chunks, every chunk is scored with a
+# single predict_proba call and the top-k diseases are appended to the
+# output file, so memory stays flat no matter how big the input is.
+#
+# By default every disease also gets a drivers_<i> column listing the
+# features that pushed it up or down the most ("blood_sugar +49.1,
+# cholesterol +12.4", percentage points, see explain.py). The same pass
+# over the trees gives the probabilities, so this costs about 3.5x a bare
+# predict_proba, with memory that grows with the forest, not with
+# leaves x features. --no-explain turns it off. Models that are not
+# forests (hist_gb, see estimators.py) are scored without drivers.
+#
+# With --history DIR (and --id-col) every scored row is also appended to
+# that patient's history (history_store.py): vitals, symptoms and the full
+# predicted distribution. The time comes from a "timestamp" column if
+# the input has one, otherwise it is the time of scoring.
+#
+# With --rules vitals.csv a vital_flags column lists, for every row, the
+# diseases whose vitals.csv thresholds the row meets, e.g.
+# "Hypertension (systolic_bp, diastolic_bp)". Only rules on vitals the
+# input has are checked (vital_rules.py); the check is vectorized per chunk.
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import joblib
+
+from medical_data import iter_patient_chunks, prepare_features, is_jsonl, numeric_cols, symptom_cols
+from explain import ForestExplainer, driver_strings
+
+
+def top_k_predictions(proba, labels, k=3):
+    """Return (diseases, probabilities) arrays of shape (rows, k), best first"""
+    k = min(k, proba.shape[1])
+    top = np.argsort(-proba, axis=1, kind="stable")[:, :k]
+    top_proba = np.take_along_axis(proba, top, axis=1)
+    return labels[top], top_proba
+
+
+def score_chunk(model, labels, chunk, k=3, id_col=None, explainer=None, drivers=3, history=None,
+                rules=None):
+    """Score one chunk of patients and return the output rows as a DataFrame.
+
+    With an explainer (ForestExplainer of `model`) the rows also get the
+    top `drivers` features of every disease. With a HistoryStore every row
+    is appended to the history of its id_col patient. With a RuleTable
+    (vital_rules.py) the rows get a vital_flags column.
+    """
+    X = prepare_features(chunk)
+    if explainer is None:
+        proba, contrib = model.predict_proba(X), None
+    else:
+        proba, contrib = explainer.contributions(X)
+    if history is not None:
+        ts = None
+        if "timestamp" in chunk:
+            ts = pd.to_datetime(chunk["timestamp"]).to_numpy("datetime64[ns]").astype(np.int64) / 1e9
+        history.append_batch(chunk[id_col].to_numpy(), X[numeric_cols].to_numpy(dtype=np.float32),
+                             X[symptom_cols].to_numpy(), proba, ts)
+    if contrib is None:
+        out = predictions_frame(proba, labels, chunk, k, id_col)
+    else:
+        out = predictions_frame(proba, labels, chunk, k, id_col, contrib, explainer.feature_names, drivers)
+    if rules is not None:
+        out["vital_flags"] = ["; ".join(f"{flag['disease']} ({', '.join(flag['vitals'])})" for flag in row)
+                              for row in rules.flags(chunk)]
+    return out
+
+
+def predictions_frame(proba, labels, chunk, k=3, id_col=None, contrib=None,
+                      feature_names=None, drivers=3):
+    """Output rows (top-k diseases + probabilities in %) for a scored chunk,
+    plus drivers_<i> columns when per-feature contributions are given"""
+    diseases, probabilities = top_k_predictions(proba, labels, k)
+    if contrib is not None:
+        top = np.argsort(-proba, axis=1, kind="stable")[:, :diseases.shape[1]]
+
+    out = {}
+    if id_col:
+        out[id_col] = chunk[id_col].to_numpy()
+    for i in range(diseases.shape[1]):
+        out[f"disease_{i + 1}"] = diseases[:, i]
+        out[f"probability_{i + 1}"] = np.round(probabilities[:, i] * 100, 2)
+        if contrib is not None:
+            picked = np.take_along_axis(contrib, top[:, None, i:i + 1], axis=2)[:, :, 0]
+            out[f"drivers_{i + 1}"] = driver_strings(picked, feature_names, drivers)
+    return pd.DataFrame(out, index=chunk.index)
+
+
+def batch_predict(input_path, output_path, model_path="model.joblib",
+                  encoder_path="label_encoder.joblib", k=3, chunksize=50_000,
+                  id_col=None, explain=True, drivers=3, history_dir=None, rules_path=None):
+    """Stream predictions for every patient in input_path into output_path.
+
+    Returns the number of rows scored.
+    """
+    if history_dir and not id_col:
+        raise ValueError("--history needs --id-col to know whose history a row belongs to")
+    model = joblib.load(model_path)
+    le = joblib.load(encoder_path)
+    labels = le.inverse_transform(model.classes_)
+    explainer = None
+    if explain:
+        try:
+            explainer = ForestExplainer.from_pipeline(model)
+        except ValueError as e:
+            print(f"⚠️  {e}: writing predictions without drivers")
+    history = None
+    if history_dir:
+        from history_store import HistoryStore
+        history = HistoryStore(history_dir, classes=labels)
+    rules = None
+    if rules_path:
+        from vital_rules import compile_rules
+        rules = compile_rules(rules_path)
+
+    jsonl = is_jsonl(output_path)
+    rows = 0
+    try:
+        with open(output_path, "w", newline="", encoding="utf-8") as f:
+            for chunk in iter_patient_chunks(input_path, chunksize):
+                out = score_chunk(model, labels, chunk, k, id_col, explainer, drivers, history, rules)
+                if jsonl:
+                    if len(out):
+                        f.write(out.to_json(orient="records", lines=True).rstrip("\n") + "\n")
+                else:
+                    out.to_csv(f, index=False, header=(rows == 0))
+                rows += len(out)
+    finally:
+        # Also on errors: flush and close the history files written so far
+        if history is not None:
+            history.close()
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV/JSONL file of patients in chunks")
+    parser.add_argument("input", help="CSV or JSONL file with the medical_dataset.csv columns")
+    parser.add_argument("output", help="where to write predictions (.csv or .jsonl)")
+    parser.add_argument("--model", default="model.joblib")
+    parser.add_argument("--encoder", default="label_encoder.joblib")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--id-col", default=None, help="input column copied to the output (e.g. patient_id)")
+    parser.add_argument("--explain", action=argparse.BooleanOptionalAction, default=True,
+                        help="add the features behind every disease (drivers_<i> columns)")
+    parser.add_argument("--drivers", type=int, default=3, help="features listed per disease")
+    parser.add_argument("--history", default=None,
+                        help="also append every row to this per-patient history store (needs --id-col)")
+    parser.add_argument("--rules", default=None,
+                        help="vitals.csv whose thresholds are checked for every row (vital_flags column)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        print(f"❌ ERROR: {args.input} NOT FOUND.")
+        return 1
+
+    print(f"⏳ Scoring {args.input} in chunks of {args.chunk_size:,} rows...")
+    start = time.perf_counter()
+    try:
+        rows = batch_predict(args.input, args.output, args.model, args.encoder,
+                             args.top_k, args.chunk_size, args.id_col, args.explain, args.drivers,
+                             args.history, args.rules)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    elapsed = time.perf_counter() - start
+
+    print(f"✅ Scored {rows:,} patients in {elapsed:.2f}s "
+          f"({rows / max(elapsed, 1e-9):,.0f} rows/sec)")
+    print(f"💾 Predictions saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+# bench_extractor.py
+# -------------------------------------------------------
+# THROUGHPUT BENCHMARK: COMPILED TEXT EXTRACTOR VS ORIGINAL LOOPS
+# -------------------------------------------------------
+#
+# Usage:
+#   python benchmarks/bench_extractor.py --texts 20000
+#
+# Builds a random free-text corpus, checks that the compiled extractor
+# returns exactly the same dicts as the original per-pattern functions and
+# reports texts/sec for the original functions and each scanner backend.
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from text_extractor import TextExtractor, VITAL_DEFAULTS, SYMPTOM_KEYWORDS, ahocorasick  # noqa: E402
+
+
+# =====================================================
+# ORIGINAL IMPLEMENTATIONS (reference)
+# =====================================================
+
+def legacy_extract_vitals(text):
+    vitals = {}
+    text_lower = text.lower()
+
+    patterns = {
+        'fasting_blood_sugar': [r'fasting[_\s]*blood[_\s]*sugar[:\s]*(\d+)', r'fbs[:\s]*(\d+)'],
+        'random_blood_sugar': [r'random[_\s]*blood[_\s]*sugar[:\s]*(\d+)', r'rbs[:\s]*(\d+)', r'blood[_\s]*sugar[:\s]*(\d+)'],
+        'hba1c': [r'hba1c[:\s]*(\d+\.?\d*)', r'a1c[:\s]*(\d+\.?\d*)'],
+        'systolic_bp': [r'systolic[_\s]*bp[:\s]*(\d+)', r'bp[:\s]*(\d+)[/\s]', r'blood[_\s]*pressure[:\s]*(\d+)'],
+        'diastolic_bp': [r'diastolic[_\s]*bp[:\s]*(\d+)', r'bp[:\s]*\d+[/\s]*(\d+)']
+    }
+
+    for vital, pattern_list in patterns.items():
+        for pattern in pattern_list:
+            match = re.search(pattern, text_lower)
+            if match:
+                vitals[vital] = float(match.group(1))
+                break
+
+    for col in VITAL_DEFAULTS:
+        if col not in vitals:
+            vitals[col] = VITAL_DEFAULTS[col]
+
+    return vitals
+
+
+def legacy_extract_symptoms(text):
+    symptoms = {}
+    text_lower = text.lower()
+
+    for symptom, keywords in SYMPTOM_KEYWORDS.items():
+        symptoms[symptom] = 0
+        for keyword in keywords:
+            if keyword in text_lower:
+                symptoms[symptom] = 1
+                break
+
+    return symptoms
+
+
+# =====================================================
+# CORPUS
+# =====================================================
+
+VITAL_FRAGMENTS = [
+    "fasting blood sugar: {a}", "FBS {a}", "random blood sugar {a}", "rbs:{a}",
+    "blood sugar {a}", "HbA1c: {b}", "a1c {b}", "systolic bp {a}", "diastolic bp: {c}",
+    "bp {a}/{c}", "BP: {a} {c}", "blood pressure {a}", "bp {a}", "blood_sugar:{a}",
+]
+
+FILLER = [
+    "patient reports", "since yesterday", "and", "also", "feeling", "no history of",
+    "mild", "severe", "at night", "after meals", "", "overall ok", "bpm 80",
+    "seen today in clinic", "sleeping poorly", "appetite reduced", "taking metformin",
+    "no known allergies", "review of systems otherwise negative", "follow up in two weeks",
+]
+
+
+def make_corpus(n, seed=0, notes=False):
+    """Random texts. `notes` gives longer, mostly filler clinical-style notes."""
+    rng = random.Random(seed)
+    keywords = [k for words in SYMPTOM_KEYWORDS.values() for k in words]
+    texts = []
+    for _ in range(n):
+        parts = []
+        for _ in range(rng.randint(30, 90) if notes else rng.randint(3, 12)):
+            kind = rng.random() * (6 if notes else 1)
+            if kind < 0.35:
+                parts.append(rng.choice(VITAL_FRAGMENTS).format(
+                    a=rng.randint(60, 300), b=round(rng.uniform(4, 12), 1), c=rng.randint(50, 120)))
+            elif kind < 0.7:
+                word = rng.choice(keywords)
+                parts.append(word.upper() if rng.random() < 0.1 else word)
+            else:
+                parts.append(rng.choice(FILLER))
+        texts.append(", ".join(parts))
+    return texts
+
+
+def time_it(fn, texts, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(texts)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark vitals/symptom text extraction")
+    parser.add_argument("--texts", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--notes", action="store_true", help="long, mostly filler texts")
+    args = parser.parse_args(argv)
+
+    texts = make_corpus(args.texts, args.seed, args.notes)
+    avg_len = sum(map(len, texts)) / len(texts)
+    print(f"📄 {len(texts):,} texts, {avg_len:.0f} characters on average")
+
+    extractors = {"fallback (no automaton)": TextExtractor(use_automaton=False)}
+    if ahocorasick is not None:
+        extractors["compiled (automaton)"] = TextExtractor(use_automaton=True)
+    else:
+        print("   (pyahocorasick not installed, skipping the automaton backend)")
+
+    # Correctness: same dicts (and same key order) as the original functions
+    expected = [(legacy_extract_vitals(t), legacy_extract_symptoms(t)) for t in texts]
+    for name, extractor in extractors.items():
+        for text, want in zip(texts, expected):
+            got = extractor.extract(text)
+            separate = (extractor.extract_vitals(text), extractor.extract_symptoms(text))
+            if (got != want or separate != want
+                    or [list(d) for d in got] != [list(d) for d in want]):
+                print(f"❌ {name} mismatch for text: {text!r}")
+                print(f"   expected: {want}")
+                print(f"   got:      {got}")
+                return 1
+    print(f"✅ Outputs identical to the original functions ({', '.join(extractors)})")
+
+    legacy = time_it(lambda ts: [(legacy_extract_vitals(t), legacy_extract_symptoms(t)) for t in ts],
+                     texts, args.repeat)
+    print(f"   {'original loops':<23}: {len(texts) / legacy:>10,.0f} texts/sec")
+    for name, extractor in extractors.items():
+        elapsed = time_it(extractor.extract_many, texts, args.repeat)
+        print(f"   {name:<23}: {len(texts) / elapsed:>10,.0f} texts/sec ({legacy / elapsed:.2f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+# importtime.py
+# -------------------------------------------------------
+# IMPORT-TIME BREAKDOWN OF A ONE-SHOT PREDICTION (python -X importtime)
+# -------------------------------------------------------
+#
+# Usage (from the folder holding the model artifacts):
+#   python benchmarks/importtime.py
+#   python benchmarks/importtime.py --top 15 -- --vitals "age: 60" --symptoms "fever"
+#
+# Runs predict_cli.py under `python -X importtime`, sums the self time of
+# every imported module per top-level package and prints the heaviest ones
+# plus the total wall time of the process. For comparison it does the same
+# for the imports the older scripts pull in up front (pandas, sklearn,
+# joblib).
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+HEAVY_IMPORTS = "import numpy, pandas, joblib, sklearn.ensemble, sklearn.preprocessing"
+
+
+def run_importtime(cmd):
+    """Run a python command under -X importtime; returns (wall_s, lines)"""
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", *cmd],
+                          capture_output=True, text=True, env=env)
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "command failed")
+    return wall, proc.stderr.splitlines()
+
+
+def breakdown(lines):
+    """Self time in ms per top-level package, and total import time in ms"""
+    per_package = {}
+    total_us = 0
+    for line in lines:
+        m = LINE_RE.match(line)
+        if not m:
+            continue
+        self_us, name = int(m.group(1)), m.group(4)
+        package = name.split(".")[0]
+        per_package[package] = per_package.get(package, 0) + self_us
+        total_us += self_us
+    return {k: v / 1000 for k, v in per_package.items()}, total_us / 1000
+
+
+def report(title, wall, lines, top):
+    per_package, total_ms = breakdown(lines)
+    print(f"\n📦 {title}")
+    print(f"   wall time {wall * 1000:,.0f} ms, imports {total_ms:,.0f} ms")
+    for package, ms in sorted(per_package.items(), key=lambda kv: -kv[1])[:top]:
+        print(f"   {package:<24} {ms:>9.1f} ms  {100 * ms / max(total_ms, 1e-9):5.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="python -X importtime breakdown of predict_cli.py")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("cli_args", nargs="*",
+                        help="arguments for predict_cli.py (after --)")
+    args = parser.parse_args(argv)
+
+    cli_args = args.cli_args or ["--vitals", "age: 60, blood_sugar: 180", "--symptoms", "fever, cough"]
+    cli = os.path.join(ROOT, "predict_cli.py")
+
+    # First run warms the .pyc cache (and compiles the artifact if missing)
+    run_importtime([cli, *cli_args])
+    report("predict_cli.py", *run_importtime([cli, *cli_args]), args.top)
+    report(f"python -c \"{HEAVY_IMPORTS}\"", *run_importtime(["-c", HEAVY_IMPORTS]), args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,425 @@
+# run_benchmarks.py
+# -------------------------------------------------------
+# BENCHMARK SUITE WITH JSON RESULTS AND BASELINE COMPARISON
+# -------------------------------------------------------
+#
+# Usage:
+#   python benchmarks/run_benchmarks.py                      # full run -> benchmark_results.json
+#   python benchmarks/run_benchmarks.py --quick              # smaller sizes, for CI
+#   python benchmarks/run_benchmarks.py --save-baseline      # store as benchmarks/baseline.json
+#   python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json --tolerance 0.15
+#
+# Benchmarks (all seeded, all artifacts written to a temporary directory):
+#   train          backend train_model() end to end (generation, fit, save),
+#                  plus generate_training_data() on its own
+#   artifact_load  joblib.load of every artifact (median of --repeat loads)
+#   extraction     extract_vitals_from_text / extract_symptoms_from_text on a corpus
+#   predict        single-row predict_disease latency, p50 / p99, with the
+#                  prediction cache off so every call is scored
+#   batch          predict_proba throughput on medical_dataset.csv rows,
+#                  tiled up to --rows (1M by default) and scored in chunks
+#   explain        the same with per-feature contributions (explain.py),
+#                  on at most 100k rows, next to predict_proba on those rows
+#
+# Memory is tracked with tracemalloc (peak Python/NumPy allocations of one
+# representative run, *_peak_mb) and the process RSS after each benchmark
+# (rss_mb). Compiled extension code that calls malloc directly is not seen
+# by tracemalloc, so RSS is reported next to it.
+#
+# Metric names carry their direction: *_per_sec is better when higher;
+# *_s, *_ms, *_us, *_mb and *_bytes are better when lower. Against a
+# baseline, a metric that is worse by more than --tolerance is a
+# regression, and the script exits with status 1.
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import joblib  # noqa: E402
+
+from artifact_cache import library_versions  # noqa: E402
+from bench_extractor import make_corpus  # noqa: E402
+from resource_usage import current_rss_mb  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+
+
+# =====================================================
+# HELPERS
+# =====================================================
+
+def traced(fn, *args, **kwargs):
+    """Run fn once under tracemalloc; returns (result, peak MB)"""
+    tracemalloc.start()
+    try:
+        result = fn(*args, **kwargs)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, peak / (1024 * 1024)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def percentile(values, q):
+    return float(np.percentile(np.asarray(values), q))
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# =====================================================
+# BENCHMARKS
+# =====================================================
+
+def bench_train(workdir, samples_per_disease, seed):
+    """backend train_model(): data generation, fit and saving the artifacts
+    into workdir (the working directory). Generation is also timed alone."""
+    import train_model as tm
+
+    symptoms_df = pd.read_csv(tm.SYMPTOMS_CSV)
+    vitals_df = pd.read_csv(tm.VITALS_CSV)
+
+    df, generate_s = timed(tm.generate_training_data, symptoms_df, vitals_df, samples_per_disease, seed)
+    _, generate_peak = traced(tm.generate_training_data, symptoms_df, vitals_df, samples_per_disease, seed)
+
+    _, train_s = timed(tm.train_model, samples_per_disease, seed)
+    _, train_peak = traced(tm.train_model, samples_per_disease, seed)
+    shutil.copy(tm.VITALS_CSV, workdir)
+
+    return {
+        "rows": len(df),
+        "generate_s": generate_s,
+        "generate_peak_mb": generate_peak,
+        "train_s": train_s,
+        "train_peak_mb": train_peak,
+        "rss_mb": current_rss_mb(),
+    }
+
+
+def bench_artifact_load(paths, repeat):
+    results = {}
+    for path in paths:
+        name = os.path.basename(path).replace(".joblib", "")
+        times = [timed(joblib.load, path)[1] for _ in range(repeat)]
+        _, peak = traced(joblib.load, path)
+        results[f"{name}_load_ms"] = 1000 * statistics.median(times)
+        results[f"{name}_peak_mb"] = peak
+        results[f"{name}_bytes"] = os.path.getsize(path)
+    results["rss_mb"] = current_rss_mb()
+    return results
+
+
+def bench_extraction(texts, repeat, vitals_df):
+    import train_model as tm
+
+    def run_vitals():
+        for text in texts:
+            tm.extract_vitals_from_text(text, vitals_df)
+
+    def run_symptoms():
+        for text in texts:
+            tm.extract_symptoms_from_text(text)
+
+    vitals_s = min(timed(run_vitals)[1] for _ in range(repeat))
+    symptoms_s = min(timed(run_symptoms)[1] for _ in range(repeat))
+    _, peak = traced(run_symptoms)
+    return {
+        "texts": len(texts),
+        "vitals_texts_per_sec": len(texts) / vitals_s,
+        "symptoms_texts_per_sec": len(texts) / symptoms_s,
+        "symptoms_peak_mb": peak,
+        "rss_mb": current_rss_mb(),
+    }
+
+
+def bench_predict(texts, calls):
+    """predict_disease from the working directory holding the artifacts,
+    uncached: the texts repeat, and cache hits would hide the scoring"""
+    import train_model as tm
+
+    previous, tm._predictor = tm._predictor, tm.DiseasePredictor(cache_size=0)
+    try:
+        _, first_s = timed(tm.predict_disease, texts[0], texts[1])  # includes loading
+        latencies = []
+        for i in range(calls):
+            start = time.perf_counter()
+            tm.predict_disease(texts[i % len(texts)], texts[(i + 1) % len(texts)])
+            latencies.append(time.perf_counter() - start)
+        _, peak = traced(tm.predict_disease, texts[0], texts[1])
+    finally:
+        tm._predictor = previous
+
+    latencies_ms = [1000 * t for t in latencies]
+    return {
+        "calls": calls,
+        "first_call_ms": 1000 * first_s,
+        "p50_ms": percentile(latencies_ms, 50),
+        "p99_ms": percentile(latencies_ms, 99),
+        "mean_ms": statistics.fmean(latencies_ms),
+        "call_peak_mb": peak,
+        "rss_mb": current_rss_mb(),
+    }
+
+
+def load_batch_model(dataset, model_path, encoder_path, workdir, seed):
+    """model.joblib if it exists, otherwise a pipeline trained on the dataset"""
+    from medical_data import clean_chunk
+
+    X, y = clean_chunk(pd.read_csv(dataset))
+    if X.empty:
+        raise ValueError(f"No usable rows in {dataset} after cleaning")
+    if os.path.exists(model_path):
+        return joblib.load(model_path), X, model_path
+
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import LabelEncoder
+    from tune_model import make_preprocess
+
+    model = Pipeline([("pre", make_preprocess()),
+                      ("clf", RandomForestClassifier(n_estimators=200, random_state=seed))])
+    model.fit(X, LabelEncoder().fit_transform(y))
+    model_path = os.path.join(workdir, "model.joblib")
+    joblib.dump(model, model_path)
+    return model, X, model_path
+
+
+def bench_batch(model, X, rows, chunksize):
+    """predict_proba on the dataset tiled up to `rows` rows, chunk by chunk"""
+    base = X.to_numpy(dtype=np.float64)
+    columns = list(X.columns)
+    total_s = 0.0
+    peak = 0.0
+    for start in range(0, rows, chunksize):
+        index = np.arange(start, min(start + chunksize, rows)) % len(base)
+        chunk = pd.DataFrame(base[index], columns=columns)
+        _, elapsed = timed(model.predict_proba, chunk)
+        total_s += elapsed
+        if start == 0:
+            _, peak = traced(model.predict_proba, chunk)
+    return {
+        "rows": rows,
+        "chunk_rows": chunksize,
+        "rows_per_sec": rows / total_s,
+        "total_s": total_s,
+        "chunk_peak_mb": peak,
+        "rss_mb": current_rss_mb(),
+    }
+
+
+def bench_explain(model, X, rows, chunksize):
+    """ForestExplainer.contributions vs predict_proba on the same chunks"""
+    from explain import ForestExplainer
+
+    explainer, build_s = timed(ForestExplainer.from_pipeline, model)
+    base = X.to_numpy(dtype=np.float64)
+    columns = list(X.columns)
+    explain_s = predict_s = 0.0
+    for start in range(0, rows, chunksize):
+        index = np.arange(start, min(start + chunksize, rows)) % len(base)
+        chunk = pd.DataFrame(base[index], columns=columns)
+        explain_s += timed(explainer.contributions, chunk)[1]
+        predict_s += timed(model.predict_proba, chunk)[1]
+    return {
+        "rows": rows,
+        "build_s": build_s,
+        "table_mb": explainer.nbytes / (1024 * 1024),
+        "rows_per_sec": rows / explain_s,
+        "predict_proba_rows_per_sec": rows / predict_s,
+    }
+
+
+# =====================================================
+# BASELINE COMPARISON
+# =====================================================
+
+LOWER_IS_BETTER = ("_s", "_ms", "_us", "_mb", "_bytes")
+
+
+def direction(metric):
+    """+1 if higher is better, -1 if lower is better, 0 if informational"""
+    if metric.endswith("_per_sec"):
+        return 1
+    if metric.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def compare(results, baseline, tolerance):
+    """Returns a list of (benchmark, metric, baseline, current, change, regressed)"""
+    rows = []
+    for bench, metrics in results.items():
+        for metric, current in metrics.items():
+            old = baseline.get(bench, {}).get(metric)
+            sign = direction(metric)
+            if sign == 0 or old in (None, 0) or current is None:
+                continue
+            change = (current - old) / abs(old)
+            rows.append((bench, metric, old, current, change, sign * change < -tolerance))
+    return rows
+
+
+def print_comparison(rows, tolerance):
+    print(f"\n📈 Compared with baseline (tolerance ±{tolerance:.0%}):")
+    for bench, metric, old, current, change, regressed in rows:
+        flag = "❌" if regressed else "  "
+        print(f" {flag} {bench + '.' + metric:<40} {old:>14,.3f} → {current:>14,.3f}  {change:+7.1%}")
+
+
+# =====================================================
+# COMMAND LINE
+# =====================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the training / loading / prediction benchmarks")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes for a fast check")
+    parser.add_argument("--samples", type=int, default=None, help="training samples per disease")
+    parser.add_argument("--texts", type=int, default=None, help="extraction corpus size")
+    parser.add_argument("--calls", type=int, default=None, help="predict_disease calls")
+    parser.add_argument("--rows", type=int, default=None, help="batch rows (default 1,000,000)")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dataset", default=os.path.join(ROOT, "backend", "medical_dataset.csv"))
+    parser.add_argument("--model", default="model.joblib", help="batch model (trained if missing)")
+    parser.add_argument("--encoder", default="label_encoder.joblib")
+    parser.add_argument("--only", default=None,
+                        help="comma-separated subset of train,artifact_load,extraction,predict,batch,explain")
+    parser.add_argument("--out", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=None,
+                        help=f"baseline JSON to compare with (default {DEFAULT_BASELINE} if present)")
+    parser.add_argument("--save-baseline", action="store_true", help="also save results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    samples = args.samples or (50 if args.quick else 1000)
+    n_texts = args.texts or (2_000 if args.quick else 20_000)
+    calls = args.calls or (200 if args.quick else 2_000)
+    rows = args.rows or (100_000 if args.quick else 1_000_000)
+    selected = set(args.only.split(",")) if args.only else None
+    model_path = os.path.abspath(args.model)
+    encoder_path = os.path.abspath(args.encoder)
+    dataset = os.path.abspath(args.dataset)
+
+    results = {}
+    errors = {}
+    texts = make_corpus(n_texts, args.seed)
+    cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory(prefix="benchmarks_") as workdir:
+        # predict_disease and the training artifacts use the working directory
+        os.chdir(workdir)
+        try:
+            def run(name, fn, *fn_args):
+                if selected and name not in selected:
+                    return
+                print(f"⏳ {name}...", flush=True)
+                try:
+                    results[name] = fn(*fn_args)
+                except (OSError, ValueError) as e:
+                    errors[name] = str(e)
+                    print(f"   ⚠️  skipped: {e}")
+
+            run("train", bench_train, workdir, samples, args.seed)
+
+            artifacts = [os.path.join(workdir, name)
+                         for name in ("disease_model.joblib", "scaler.joblib", "feature_cols.joblib")]
+            artifacts += [model_path, encoder_path]
+            run("artifact_load", bench_artifact_load,
+                [path for path in artifacts if os.path.exists(path)], args.repeat)
+
+            vitals_df = pd.read_csv(os.path.join(ROOT, "backend", "vitals.csv"))
+            run("extraction", bench_extraction, texts, args.repeat, vitals_df)
+
+            if os.path.exists(os.path.join(workdir, "disease_model.joblib")):
+                run("predict", bench_predict, texts, calls)
+
+            def batch():
+                model, X, _ = load_batch_model(dataset, model_path, encoder_path, workdir, args.seed)
+                return bench_batch(model, X, rows, args.chunk_size)
+
+            run("batch", batch)
+
+            def explain():
+                model, X, _ = load_batch_model(dataset, model_path, encoder_path, workdir, args.seed)
+                return bench_explain(model, X, min(rows, 100_000), args.chunk_size)
+
+            run("explain", explain)
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": git_commit(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "versions": library_versions(),
+            "settings": {"samples_per_disease": samples, "texts": n_texts, "calls": calls,
+                         "rows": rows, "chunk_size": args.chunk_size, "repeat": args.repeat,
+                         "seed": args.seed, "dataset": os.path.basename(dataset)},
+            "errors": errors,
+        },
+        "results": results,
+    }
+
+    print()
+    for bench, metrics in results.items():
+        print(f"📊 {bench}")
+        for metric, value in metrics.items():
+            print(f"   {metric:<28} {value:,.3f}" if isinstance(value, float) else f"   {metric:<28} {value:,}")
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {args.out}")
+
+    status = 0
+    baseline_path = args.baseline or (DEFAULT_BASELINE if os.path.exists(DEFAULT_BASELINE) else None)
+    if baseline_path and not args.save_baseline:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        if baseline["meta"]["settings"] != report["meta"]["settings"]:
+            print("⚠️  Baseline was recorded with different settings; comparison is approximate")
+        rows_cmp = compare(results, baseline["results"], args.tolerance)
+        print_comparison(rows_cmp, args.tolerance)
+        regressions = [row for row in rows_cmp if row[-1]]
+        if regressions:
+            print(f"\n❌ {len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}")
+            status = 1
+        else:
+            print("\n✅ No regressions against the baseline")
+
+    if args.save_baseline:
+        with open(DEFAULT_BASELINE, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Baseline saved to {DEFAULT_BASELINE}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
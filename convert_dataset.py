@@ -0,0 +1,70 @@
+# convert_dataset.py
+# -------------------------------------------------------
+# ONE-TIME CONVERSION OF medical_dataset.csv TO PARQUET / ARROW
+# -------------------------------------------------------
+#
+# Usage:
+#   python convert_dataset.py medical_dataset.csv medical_dataset.parquet
+#   python convert_dataset.py medical_dataset.csv medical_dataset.arrow --compare
+#
+# The columnar file stores the declared schema from medical_data.py:
+# float32 vitals, int8 symptom flags and the disease label. Every training
+# script (and batch_predict.py / stream_train.py) accepts it wherever it
+# accepts the CSV. Parquet is the smaller file. Arrow is written
+# uncompressed and is memory-mapped on load, so reading it costs almost
+# no parsing at all.
+#
+# --compare loads both files and prints load time and in-memory size:
+# plain pd.read_csv for the CSV against read_patients() for the columnar
+# copy.
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+from medical_data import to_columnar, read_patients
+
+
+def _measure(load):
+    start = time.perf_counter()
+    df = load()
+    return df, time.perf_counter() - start, df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a patient CSV/JSONL file to Parquet or Arrow")
+    parser.add_argument("input", help="CSV or JSONL file with the medical_dataset.csv columns")
+    parser.add_argument("output", help=".parquet or .arrow / .feather")
+    parser.add_argument("--chunk-size", type=int, default=200_000)
+    parser.add_argument("--compare", action="store_true", help="compare load time and memory")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        print(f"❌ ERROR: {args.input} NOT FOUND.")
+        return 1
+
+    print(f"⏳ Converting {args.input} → {args.output}...")
+    start = time.perf_counter()
+    try:
+        rows = to_columnar(args.input, args.output, args.chunk_size)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"✅ {rows:,} rows in {time.perf_counter() - start:.2f}s "
+          f"({os.path.getsize(args.input) / 1e6:,.1f} MB → {os.path.getsize(args.output) / 1e6:,.1f} MB on disk)")
+
+    if args.compare:
+        _, csv_s, csv_mb = _measure(lambda: pd.read_csv(args.input))
+        _, col_s, col_mb = _measure(lambda: read_patients(args.output))
+        print(f"\n{'':>16}{'load (s)':>10}{'memory (MB)':>14}")
+        print(f"{'pd.read_csv':>16}{csv_s:>10.3f}{csv_mb:>14.1f}")
+        print(f"{'read_patients':>16}{col_s:>10.3f}{col_mb:>14.1f}")
+        print(f"\n   {csv_s / max(col_s, 1e-9):.1f}x faster, {csv_mb / max(col_mb, 1e-9):.1f}x less memory")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+# estimators.py
+# -------------------------------------------------------
+# CHOOSE THE DISEASE CLASSIFIER + COMPARE THEIR COST
+# -------------------------------------------------------
+#
+# Usage:
+#   python estimators.py medical_dataset.csv
+#   python estimators.py medical_dataset.csv --estimators random_forest,hist_gb --report report.json
+#   python estimators.py medical_dataset.csv --min-accuracy 0.95 --model model.joblib
+#
+# Every training entry point builds its classifier with make_estimator(),
+# so the model type is a name instead of a hard-coded class:
+#
+#   random_forest   RandomForestClassifier (the original model)
+#   extra_trees     ExtraTreesClassifier: random split points, faster to fit
+#   hist_gb         HistGradientBoostingClassifier: binned features and
+#                   shallow boosted trees, a much smaller artifact and a
+#                   cheaper path per row
+#
+# medical_disease_prediction.py reads the ESTIMATOR environment variable,
+# backend/train_model.py and tune_model.py take it as a parameter/--estimator.
+# Only the two forests can be explained (explain.py), compiled
+# (forest_compile.py) or grown (update_model.py); with hist_gb those fall
+# back to plain predict_proba or refuse with an error.
+#
+# The CLI fits each estimator on the same split of the dataset and prints,
+# per model: fit time, size of the joblib artifact, time to load it, median
+# latency of a one-row predict_proba, batch throughput and test accuracy.
+# With --min-accuracy it saves the fastest single-row model that reaches
+# the bar as --model / --encoder (model.joblib, the file the other scripts
+# load).
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ESTIMATORS = {
+    "random_forest": ("sklearn.ensemble", "RandomForestClassifier",
+                      {"n_estimators": 200, "random_state": 42}),
+    "extra_trees": ("sklearn.ensemble", "ExtraTreesClassifier",
+                    {"n_estimators": 200, "random_state": 42}),
+    "hist_gb": ("sklearn.ensemble", "HistGradientBoostingClassifier",
+                {"max_iter": 200, "early_stopping": True, "random_state": 42}),
+}
+
+FORESTS = ("random_forest", "extra_trees")
+
+
+def make_estimator(name="random_forest", **params):
+    """A new, unfitted classifier by name; `params` override the defaults.
+
+    Parameters the estimator does not take (e.g. n_estimators for hist_gb,
+    n_jobs for hist_gb) are dropped, so one MODEL_PARAMS dict can be used
+    for every choice.
+    """
+    import importlib
+    import inspect
+
+    if name not in ESTIMATORS:
+        raise ValueError(f"Unknown estimator {name!r} (choose from {', '.join(ESTIMATORS)})")
+    module, cls_name, defaults = ESTIMATORS[name]
+    cls = getattr(importlib.import_module(module), cls_name)
+    accepted = inspect.signature(cls).parameters
+    merged = {**defaults, **params}
+    return cls(**{key: value for key, value in merged.items() if key in accepted})
+
+
+def is_forest(model):
+    """True for a fitted RandomForest / ExtraTrees classifier"""
+    estimators = getattr(model, "estimators_", None)
+    return bool(estimators) and hasattr(estimators[0], "tree_")
+
+
+# =====================================================
+# COMPARISON
+# =====================================================
+
+def measure(model, X_test, y_test, batch_rows=100_000, repeats=200):
+    """Cost of one fitted model (a Pipeline or bare classifier).
+
+    Returns a dict with artifact_mb, load_s, single_row_ms (median of
+    `repeats` one-row predict_proba calls), batch_rows_per_s (predict_proba
+    on ~batch_rows rows) and accuracy on (X_test, y_test).
+    """
+    import joblib
+
+    fd, path = tempfile.mkstemp(suffix=".joblib")
+    os.close(fd)
+    try:
+        joblib.dump(model, path)
+        artifact_mb = os.path.getsize(path) / 1e6
+        start = time.perf_counter()
+        model = joblib.load(path)
+        load_s = time.perf_counter() - start
+    finally:
+        os.remove(path)
+
+    row = X_test.iloc[:1]
+    model.predict_proba(row)   # warm-up
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_proba(row)
+        latencies.append(time.perf_counter() - start)
+
+    reps = max(1, batch_rows // len(X_test))
+    batch = X_test.iloc[np.tile(np.arange(len(X_test)), reps)]
+    start = time.perf_counter()
+    model.predict_proba(batch)
+    batch_s = time.perf_counter() - start
+
+    return {
+        "artifact_mb": artifact_mb,
+        "load_s": load_s,
+        "single_row_ms": float(np.median(latencies)) * 1000,
+        "batch_rows_per_s": len(batch) / max(batch_s, 1e-9),
+        "accuracy": float(np.mean(model.predict(X_test) == y_test)),
+    }
+
+
+def compare(names, build, X_train, y_train, X_test, y_test, **measure_args):
+    """Fit build(name) for every name and measure it.
+
+    `build` returns an unfitted model (e.g. a Pipeline around
+    make_estimator(name)). Returns (report rows, {name: fitted model}).
+    """
+    report, fitted = [], {}
+    for name in names:
+        print(f"⏳ {name}...")
+        model = build(name)
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_s = time.perf_counter() - start
+        report.append({"estimator": name, "fit_s": fit_s, **measure(model, X_test, y_test, **measure_args)})
+        fitted[name] = model
+    return report, fitted
+
+
+def print_report(report):
+    print(f"\n{'estimator':<15}{'fit (s)':>9}{'size (MB)':>11}{'load (s)':>10}"
+          f"{'1 row (ms)':>12}{'batch rows/s':>14}{'accuracy':>10}")
+    for row in report:
+        print(f"{row['estimator']:<15}{row['fit_s']:>9.2f}{row['artifact_mb']:>11.2f}{row['load_s']:>10.3f}"
+              f"{row['single_row_ms']:>12.2f}{row['batch_rows_per_s']:>14,.0f}{row['accuracy']:>10.3f}")
+
+
+def cheapest(report, min_accuracy):
+    """Report row with the lowest single-row latency among those reaching
+    min_accuracy, or None"""
+    eligible = [row for row in report if row["accuracy"] >= min_accuracy]
+    return min(eligible, key=lambda row: row["single_row_ms"]) if eligible else None
+
+
+def main(argv=None):
+    import argparse
+    import json
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import LabelEncoder, StandardScaler
+    from sklearn.compose import ColumnTransformer
+    from sklearn.pipeline import Pipeline
+    from artifact_cache import manifest_key, manifest_next_to, save_artifacts
+    from medical_data import read_patients, numeric_cols, symptom_cols
+
+    parser = argparse.ArgumentParser(description="Compare the disease classifiers on one dataset")
+    parser.add_argument("data", help="CSV/Parquet/Arrow file with the medical_dataset.csv columns")
+    parser.add_argument("--estimators", default=",".join(ESTIMATORS), help="comma-separated names")
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--report", default=None, help="also save the report as JSON")
+    parser.add_argument("--min-accuracy", type=float, default=None,
+                        help="save the fastest model with at least this accuracy")
+    parser.add_argument("--model", default="model.joblib")
+    parser.add_argument("--encoder", default="label_encoder.joblib")
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.estimators.split(",") if name.strip()]
+    unknown = [name for name in names if name not in ESTIMATORS]
+    if unknown or not names:
+        print(f"❌ Unknown estimator(s): {', '.join(unknown) or '(none given)'} "
+              f"(choose from {', '.join(ESTIMATORS)})")
+        return 1
+    if not os.path.exists(args.data):
+        print(f"❌ ERROR: {args.data} NOT FOUND.")
+        return 1
+
+    df = read_patients(args.data)
+    missing = [col for col in numeric_cols + symptom_cols + ["disease"] if col not in df.columns]
+    if missing:
+        print(f"❌ Missing column(s): {', '.join(missing)}")
+        return 1
+    df = df.dropna(subset=numeric_cols + ["disease"])
+    if df.empty:
+        print(f"❌ No labelled rows in {args.data}")
+        return 1
+
+    X = df[numeric_cols + symptom_cols]
+    le = LabelEncoder()
+    y = le.fit_transform(df["disease"].astype(str))
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=args.test_size, random_state=args.seed, stratify=y)
+    print(f"📊 {len(X_train):,} training rows, {len(X_test):,} test rows, {len(le.classes_)} diseases\n")
+
+    def build(name):
+        preprocess = ColumnTransformer([("scale", StandardScaler(), numeric_cols)], remainder="passthrough")
+        return Pipeline([("pre", preprocess), ("clf", make_estimator(name, random_state=args.seed))])
+
+    report, fitted = compare(names, build, X_train, y_train, X_test, y_test)
+    print_report(report)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report saved to {args.report}")
+
+    if args.min_accuracy is not None:
+        best = cheapest(report, args.min_accuracy)
+        if best is None:
+            print(f"\n⚠️  No estimator reached accuracy {args.min_accuracy:.3f}; nothing saved")
+            return 1
+        key = manifest_key(inputs=[args.data], feature_cols=numeric_cols + symptom_cols,
+                           params={"estimator": best["estimator"], "seed": args.seed,
+                                   "test_size": args.test_size})
+        save_artifacts({args.model: fitted[best["estimator"]], args.encoder: le},
+                       manifest_next_to(args.model), key, "estimators.py")
+        print(f"\n✅ {best['estimator']} is the fastest with accuracy ≥ {args.min_accuracy:.3f}")
+        print(f"💾 Saved as {args.model} + {args.encoder}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
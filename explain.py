@@ -0,0 +1,256 @@
+# explain.py
+# -------------------------------------------------------
+# WHICH VITALS / SYMPTOMS DROVE EACH PREDICTED DISEASE
+# -------------------------------------------------------
+#
+# Usage:
+#   python explain.py patients.csv                  # top-3 diseases + drivers per row
+#   python explain.py patients.csv --rows 5 --drivers 5
+#
+# Tree contribution attribution: every node of a tree holds the class
+# distribution of the training rows that reached it. When a row moves from
+# a node to its child, the difference between the two distributions is
+# credited to the feature that was split on. Summed over the path and
+# averaged over the trees:
+#
+#   predict_proba(row) = bias + sum over features of contribution[feature]
+#
+# where bias is the class distribution at the roots (the training prior).
+#
+# Only the per-node change is stored: for every node, its class
+# distribution minus its parent's, credited to the parent's split feature.
+# Explaining a batch is one forest.apply() call; from each leaf the path is
+# walked up to the root (one vectorized step per depth level for all rows
+# and trees), and a sparse (rows*features x nodes) path matrix times the
+# (nodes x classes) deltas sums them per feature in compiled code. The
+# contributions telescope to leaf - root, so bias + their sum matches
+# predict_proba to ~1e-12. The probabilities themselves are summed from the
+# leaf distributions in tree order, like predict_proba, so ties rank the
+# same way. Deltas and leaf distributions take about 1.5x the memory of
+# the forest's own value arrays; the earlier table of contributions summed
+# per leaf was n_features / 2 times bigger and does not fit in memory for
+# forests grown on millions of rows.
+
+import sys
+
+import numpy as np
+from scipy import sparse
+
+
+def node_contributions(forest):
+    """Per-node class distribution deltas of a fitted forest.
+
+    Returns (delta, parent, split_feature, leaf_value, leaf_row, offsets,
+    bias), nodes of all trees numbered one after another:
+      delta          float64 (n_nodes, n_classes): value[node] - value[parent],
+                     divided by the number of trees (zero at the roots)
+      parent         int32 parent of every node, -1 at the roots
+      split_feature  int32 feature the parent splits on (0 at the roots,
+                     whose delta is zero)
+      leaf_value     float64 (n_leaves, n_classes) leaf distributions, also
+                     divided by the number of trees
+      leaf_row       int32 row of leaf_value for every node, -1 if internal
+      offsets        first node of every tree in that numbering
+      bias           mean class distribution at the roots
+    """
+    if not hasattr(getattr(forest, "estimators_", [None])[0], "tree_"):
+        raise ValueError(f"Can only explain a random forest / extra trees model, not {type(forest).__name__}")
+    n_trees = len(forest.estimators_)
+    deltas, parents, split_features, leaf_values, leaf_rows, offsets, roots = ([] for _ in range(7))
+    n_nodes = n_leaves = 0
+
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        value = tree.value[:, 0, :]
+        value = value / value.sum(axis=1, keepdims=True)
+
+        internal = np.flatnonzero(tree.children_left != -1)
+        parent = np.full(tree.node_count, -1, dtype=np.int32)
+        parent[tree.children_left[internal]] = internal
+        parent[tree.children_right[internal]] = internal
+        child = parent >= 0
+        split_feature = np.zeros(tree.node_count, dtype=np.int32)
+        split_feature[child] = tree.feature[parent[child]]
+        delta = np.zeros_like(value)
+        delta[child] = (value[child] - value[parent[child]]) / n_trees
+
+        is_leaf = tree.children_left == -1
+        leaf_row = np.full(tree.node_count, -1, dtype=np.int32)
+        leaf_row[is_leaf] = np.arange(is_leaf.sum()) + n_leaves
+
+        deltas.append(delta)
+        parents.append(np.where(child, parent + n_nodes, -1).astype(np.int32))
+        split_features.append(split_feature)
+        leaf_values.append(value[is_leaf] / n_trees)
+        leaf_rows.append(leaf_row)
+        offsets.append(n_nodes)
+        roots.append(value[0])
+        n_nodes += tree.node_count
+        n_leaves += int(is_leaf.sum())
+
+    return (np.concatenate(deltas), np.concatenate(parents), np.concatenate(split_features),
+            np.concatenate(leaf_values), np.concatenate(leaf_rows), np.array(offsets),
+            np.mean(roots, axis=0))
+
+
+class ForestExplainer:
+    """Batched tree contributions for a fitted RandomForestClassifier /
+    ExtraTreesClassifier.
+
+    `preprocess` (optional) is applied to X before the forest, e.g. the
+    scaler step of model.joblib. `feature_names` are the forest's input
+    columns, `classes` the labels behind forest.classes_.
+    """
+
+    path_rows = 1024   # rows per path matrix (~50 MB for 200 trees of depth ~25)
+
+    def __init__(self, forest, feature_names=None, classes=None, preprocess=None):
+        self.forest = forest
+        self.preprocess = preprocess
+        if feature_names is None:
+            feature_names = getattr(forest, "feature_names_in_", range(forest.n_features_in_))
+        self.feature_names = [str(name) for name in feature_names]
+        self.classes = np.asarray(forest.classes_ if classes is None else classes)
+        (self.node_delta, self.parent, self.split_feature, self.leaf_value,
+         self.leaf_row, self.offsets, self.bias) = node_contributions(forest)
+
+    @classmethod
+    def from_pipeline(cls, model, label_encoder=None):
+        """model.joblib Pipeline (ColumnTransformer scaler + forest)"""
+        pre, forest = model.named_steps["pre"], model.named_steps["clf"]
+        names = [name.split("__", 1)[-1] for name in pre.get_feature_names_out()]
+        classes = label_encoder.inverse_transform(forest.classes_) if label_encoder is not None else None
+        return cls(forest, names, classes, preprocess=pre)
+
+    @property
+    def nbytes(self):
+        """Memory taken by the per-node tables"""
+        return sum(table.nbytes for table in (self.node_delta, self.parent, self.split_feature,
+                                              self.leaf_value, self.leaf_row))
+
+    def contributions(self, X, block_rows=8192):
+        """(proba (n_rows, n_classes), contributions (n_rows, n_features, n_classes)).
+
+        proba matches predict_proba; bias + contributions.sum(axis=1)
+        matches it up to float32 rounding.
+        """
+        if self.preprocess is not None:
+            X = self.preprocess.transform(X)
+        n_rows = X.shape[0]
+        n_features, n_classes = len(self.feature_names), len(self.bias)
+
+        proba = np.zeros((n_rows, n_classes))
+        contrib = np.zeros((n_rows, n_features, n_classes), dtype=np.float32)
+        for start in range(0, n_rows, block_rows):
+            # apply() has a large fixed cost per call, the path matrix grows
+            # with rows * trees * depth: walk the paths in smaller pieces
+            leaves = (self.forest.apply(X[start:start + block_rows]) + self.offsets).astype(np.int32)
+            for offset in range(0, len(leaves), self.path_rows):
+                piece = leaves[offset:offset + self.path_rows]
+                rows = slice(start + offset, start + offset + len(piece))
+                for tree in range(piece.shape[1]):       # whole piece per step
+                    proba[rows] += self.leaf_value[self.leaf_row[piece[:, tree]]]
+                contrib[rows] = self._path_sums(piece)
+        return proba, contrib
+
+    def _path_sums(self, leaves):
+        """Summed deltas per (row, feature, class) of the paths to `leaves`
+        (rows x trees, global node ids)"""
+        n_block, n_features = len(leaves), len(self.feature_names)
+        nodes = leaves.ravel()
+        rows = np.repeat(np.arange(n_block, dtype=np.int32) * n_features, leaves.shape[1])
+
+        # Walk every path up to its root: each node adds its delta to
+        # (row, feature its parent split on)
+        cells, path = [], []
+        while nodes.size:
+            cells.append(rows + self.split_feature[nodes])
+            path.append(nodes)
+            up = self.parent[nodes]
+            keep = up >= 0
+            nodes, rows = up[keep], rows[keep]
+        cells, path = np.concatenate(cells), np.concatenate(path)
+        on_path = sparse.coo_matrix((np.ones(len(path)), (cells, path)),
+                                    shape=(n_block * n_features, len(self.node_delta)))
+        return (on_path @ self.node_delta).reshape(n_block, n_features, -1)
+
+    def explain(self, X, k=3, block_rows=8192):
+        """Top-k classes per row and the contributions towards each of them.
+
+        Returns (top (n_rows, k) class indices, proba (n_rows, n_classes),
+        contributions (n_rows, k, n_features)).
+        """
+        proba, contrib = self.contributions(X, block_rows)
+        k = min(k, proba.shape[1])
+        top = np.argsort(-proba, axis=1, kind="stable")[:, :k]
+        picked = np.take_along_axis(contrib, top[:, None, :], axis=2)   # (rows, features, k)
+        return top, proba, picked.transpose(0, 2, 1)
+
+
+def top_drivers(contributions, feature_names, n=3):
+    """The n features with the largest |contribution| as (name, value) pairs,
+    largest first; zero contributions are left out"""
+    contributions = np.asarray(contributions)
+    order = np.argsort(-np.abs(contributions), kind="stable")[:n]
+    return [(feature_names[i], float(contributions[i])) for i in order if contributions[i] != 0]
+
+
+def format_drivers(drivers):
+    """"fever +12.3, systolic_bp -4.0" (percentage points)"""
+    return ", ".join(f"{name} {value * 100:+.1f}" for name, value in drivers)
+
+
+def driver_strings(contributions, feature_names, n=3):
+    """format_drivers(top_drivers(row)) for every row of a
+    (n_rows, n_features) array, ranked for all rows at once"""
+    contributions = np.asarray(contributions)
+    order = np.argsort(-np.abs(contributions), axis=1, kind="stable")[:, :n]
+    values = np.take_along_axis(contributions, order, axis=1)
+    return [", ".join(f"{feature_names[i]} {value * 100:+.1f}" for i, value in zip(idx, vals) if value != 0)
+            for idx, vals in zip(order.tolist(), values.tolist())]
+
+
+def main(argv=None):
+    import argparse
+    import os
+    import joblib
+    from medical_data import iter_patient_chunks, prepare_features
+
+    parser = argparse.ArgumentParser(description="Explain the top predicted diseases of some patients")
+    parser.add_argument("input", help="CSV or JSONL file with the medical_dataset.csv columns")
+    parser.add_argument("--model", default="model.joblib")
+    parser.add_argument("--encoder", default="label_encoder.joblib")
+    parser.add_argument("--rows", type=int, default=10, help="patients to explain")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--drivers", type=int, default=3, help="features listed per disease")
+    args = parser.parse_args(argv)
+
+    for path in (args.input, args.model, args.encoder):
+        if not os.path.exists(path):
+            print(f"❌ ERROR: {path} NOT FOUND.")
+            return 1
+
+    explainer = ForestExplainer.from_pipeline(joblib.load(args.model), joblib.load(args.encoder))
+    chunk = next(iter_patient_chunks(args.input, args.rows), None)
+    if chunk is None or chunk.empty:
+        print(f"❌ No rows in {args.input}")
+        return 1
+    try:
+        X = prepare_features(chunk)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    top, proba, contrib = explainer.explain(X, args.top_k)
+    for row in range(len(X)):
+        print(f"\n📋 Patient {chunk.index[row]}")
+        for rank, cls in enumerate(top[row]):
+            drivers = top_drivers(contrib[row, rank], explainer.feature_names, args.drivers)
+            print(f"   {rank + 1}. {explainer.classes[cls]:<20} {proba[row, cls] * 100:5.1f}%   "
+                  f"{format_drivers(drivers)}")
+    print("\n   (drivers in percentage points relative to the training prior)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,427 @@
+# forest_compile.py
+# -------------------------------------------------------
+# COMPILE A TRAINED RANDOM FOREST INTO FLAT NUMPY ARRAYS
+# -------------------------------------------------------
+#
+# Usage:
+#   python forest_compile.py                              # model.joblib -> model_compiled.npz
+#   python forest_compile.py --check medical_dataset.csv  # + compare with predict_proba
+#   python forest_compile.py --backend --model backend/disease_model.joblib \
+#       --scaler backend/scaler.joblib --feature-cols backend/feature_cols.joblib \
+#       --out backend/disease_model_compiled.npz
+#   python forest_compile.py --out model_compiled/     # .npy directory, see below
+#
+# All trees are concatenated into one set of contiguous arrays: split
+# feature, threshold, left/right child and the class distribution of every
+# leaf. The StandardScaler's mean/scale are stored in the same artifact, so
+# raw vitals go straight in. CompiledForest below only needs NumPy to score
+# them: neither sklearn nor pandas is needed at prediction time.
+#
+# Scaling is applied to the row (one vector op) instead of being folded into
+# every threshold, because sklearn compares float32((x - mean) / scale)
+# with the threshold. Rewriting thresholds in raw units changes the result
+# for values sitting exactly on a split, which is common for integer vitals.
+# Like StandardScaler, the arithmetic runs in the input's dtype: float32
+# vitals (the read_patients() schema) are scaled in float32, anything else
+# in float64. Doing the float32 rows in float64 moves values across splits
+# too. A DataFrame is scaled in float32 when all of its scaled columns are
+# float32, since that is the array the pipeline's scaler receives.
+#
+# An --out path without the .npz suffix is written as a directory of .npy
+# files instead. CompiledForest.load(path, mmap_mode="r") memory-maps those,
+# so any number of worker processes share one physical copy of the forest
+# through the page cache (see pool_predict.py).
+
+import json
+import os
+import sys
+
+import numpy as np
+
+
+class CompiledForest:
+    """A random forest stored as flat arrays, evaluated with NumPy only.
+
+    Nodes of all trees share one index space. Leaves point to themselves
+    with an infinite threshold, so a row that is already at a leaf stays
+    there while the others keep walking down.
+    """
+
+    ARRAYS = ("feature", "threshold", "left", "right", "missing_left",
+              "leaf_id", "leaf_value", "roots", "mean", "scale")
+
+    def __init__(self, feature, threshold, left, right, missing_left, leaf_id,
+                 leaf_value, roots, mean, scale, classes, feature_names, max_depth,
+                 _feature=None, _children=None):
+        self.feature = feature            # int32 raw input column per node
+        self.threshold = threshold        # float64 threshold on the scaled value
+        self.left = left                  # int32 global index of left child
+        self.right = right                # int32 global index of right child
+        self.missing_left = missing_left  # bool, NaN goes left at this node
+        self.leaf_id = leaf_id            # int32 row in leaf_value (-1 if internal)
+        self.leaf_value = leaf_value      # float64 (n_leaves, n_classes) distributions
+        self.roots = roots                # int32 root node of every tree
+        self.mean = mean                  # float64 per input column (0 if unscaled)
+        self.scale = scale                # float64 per input column (1 if unscaled)
+        self.classes = np.asarray(classes)
+        self.feature_names = [str(name) for name in feature_names]
+        self.max_depth = int(max_depth)
+        if _feature is None or _children is None:
+            self._prepare()
+        else:  # already derived, e.g. memory-mapped from a saved directory
+            self._feature, self._children = _feature, _children
+
+    def _prepare(self):
+        """Derived lookup arrays used by apply()"""
+        self._feature = self.feature.astype(np.intp)
+        # children[2 * node + go_left] -> next node
+        self._children = np.stack([self.right, self.left], axis=1).astype(np.intp).ravel()
+
+    @property
+    def nbytes(self):
+        """Memory taken by the node and leaf arrays"""
+        return sum(getattr(self, name).nbytes for name in self.ARRAYS + ("_feature", "_children"))
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    # -------------------------------------------------
+    # SAVE / LOAD
+    # -------------------------------------------------
+
+    def save(self, path):
+        """Write the forest as one uncompressed .npz artifact, or as a
+        directory of .npy files when `path` does not end in .npz"""
+        if not str(path).endswith(".npz"):
+            return self.save_dir(path)
+        np.savez(path, classes=self.classes.astype(str),
+                 feature_names=np.array(self.feature_names, dtype=str),
+                 max_depth=np.array(self.max_depth),
+                 **{name: getattr(self, name) for name in self.ARRAYS})
+
+    def save_dir(self, path):
+        """One .npy per array (derived lookups included) plus meta.json,
+        so load(path, mmap_mode="r") maps everything without copying"""
+        os.makedirs(path, exist_ok=True)
+        arrays = {name: getattr(self, name) for name in self.ARRAYS}
+        arrays.update(feature_lookup=self._feature, children_lookup=self._children)
+        for name, array in arrays.items():
+            np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(array))
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"classes": [str(c) for c in self.classes],
+                       "feature_names": self.feature_names,
+                       "max_depth": self.max_depth}, f, indent=2)
+
+    def replace_dir(self, path):
+        """save_dir() into a fresh directory, then swap it in for `path`.
+        Workers that memory-mapped the old files keep reading them until
+        they reload; their pages are never overwritten in place."""
+        import shutil
+        import tempfile
+
+        path = os.path.abspath(path)
+        tmp_path = tempfile.mkdtemp(dir=os.path.dirname(path), prefix=".tmp_" + os.path.basename(path))
+        try:
+            self.save_dir(tmp_path)
+            old_path = None
+            if os.path.exists(path):
+                old_path = tempfile.mkdtemp(dir=os.path.dirname(path), prefix=".old_" + os.path.basename(path))
+                os.replace(path, old_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+        if old_path:
+            shutil.rmtree(old_path, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path, mmap_mode=None):
+        """Load a .npz artifact or a save_dir() directory.
+
+        mmap_mode ("r") only applies to directories: .npz members are
+        always read into private memory.
+        """
+        if os.path.isdir(path):
+            return cls._load_dir(path, mmap_mode)
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in cls.ARRAYS}
+            return cls(classes=data["classes"], feature_names=data["feature_names"].tolist(),
+                       max_depth=int(data["max_depth"]), **arrays)
+
+    @classmethod
+    def _load_dir(cls, path, mmap_mode=None):
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+                  for name in cls.ARRAYS}
+        derived = {f"_{name}": np.load(os.path.join(path, f"{name}_lookup.npy"), mmap_mode=mmap_mode)
+                   for name in ("feature", "children")}
+        return cls(classes=meta["classes"], feature_names=meta["feature_names"],
+                   max_depth=meta["max_depth"], **arrays, **derived)
+
+    # -------------------------------------------------
+    # PREDICTION
+    # -------------------------------------------------
+
+    @property
+    def scaled_cols(self):
+        """Input columns the scaler was fitted on"""
+        scaled = (self.mean != 0) | (self.scale != 1)
+        return [name for name, is_scaled in zip(self.feature_names, scaled) if is_scaled]
+
+    def _as_matrix(self, X):
+        if isinstance(X, dict):
+            X = [X.get(name, np.nan) for name in self.feature_names]
+        elif hasattr(X, "columns"):
+            X = X[self.feature_names].to_numpy(dtype=scaling_dtype(X, self.scaled_cols))
+        X = np.asarray(X)
+        if X.dtype != np.float32:
+            X = X.astype(np.float64)
+        return X.reshape(1, -1) if X.ndim == 1 else X
+
+    def transform(self, X):
+        """Scale raw features exactly like StandardScaler (in the input's
+        float32 / float64 dtype) + the forest's float32 cast"""
+        X = self._as_matrix(X)
+        return ((X - self.mean.astype(X.dtype)) / self.scale.astype(X.dtype)).astype(np.float32)
+
+    def apply(self, X, trees=slice(None)):
+        """Leaf node reached by every row in every tree: (n_rows, n_trees)"""
+        X = self.transform(X)
+        n_rows, n_features = X.shape
+        values = X.ravel()
+        roots = self.roots[trees].astype(np.intp)
+        n_trees = len(roots)
+
+        # Walk all (row, tree) pairs together. For batches, pairs that reached
+        # a leaf are dropped so deep trees do not slow down the shallow ones;
+        # for a few rows that bookkeeping costs more than it saves.
+        leaves = np.tile(roots, n_rows)
+        active = np.arange(n_rows * n_trees)
+        offsets = np.repeat(np.arange(n_rows) * n_features, n_trees)
+        nodes = leaves.copy()
+        check_nan = np.isnan(values).any()
+        compact = n_rows > 8
+
+        for _ in range(self.max_depth):
+            x = values[offsets + self._feature[nodes]]
+            go_left = x <= self.threshold[nodes]
+            if check_nan:
+                go_left |= np.isnan(x) & self.missing_left[nodes]
+            nodes = self._children[2 * nodes + go_left]
+
+            if not compact:
+                continue
+            done = self.leaf_id[nodes] >= 0
+            if done.any():
+                leaves[active[done]] = nodes[done]
+                keep = ~done
+                active, offsets, nodes = active[keep], offsets[keep], nodes[keep]
+                if not len(active):
+                    break
+        leaves[active] = nodes
+        return leaves.reshape(n_rows, n_trees)
+
+    def predict_proba(self, X, block_rows=2048):
+        """Class probabilities like sklearn's predict_proba.
+
+        X is an array of raw (unscaled) features in `feature_names` order, a
+        single row, or a dict of feature name -> value.
+        """
+        X = self._as_matrix(X)
+        proba = np.empty((len(X), len(self.classes)))
+        for start in range(0, len(X), block_rows):
+            leaf_ids = self.leaf_id[self.apply(X[start:start + block_rows])]
+            proba[start:start + block_rows] = np.take(self.leaf_value, leaf_ids, axis=0).mean(axis=1)
+        return proba
+
+    def predict(self, X):
+        return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def scaling_dtype(frame, scaled_cols):
+    """dtype StandardScaler works in for these columns of a DataFrame:
+    float32 if all of them are float32, float64 otherwise"""
+    return np.float32 if all(frame[col].dtype == np.float32 for col in scaled_cols) else np.float64
+
+
+def is_stale(path, *sources):
+    """True if the compiled forest at `path` (.npz or save_dir() directory)
+    is missing or older than any existing file it was compiled from"""
+    if os.path.isdir(path):
+        path = os.path.join(path, "meta.json")  # save_dir() writes it last
+    if not os.path.exists(path):
+        return True
+    built = os.path.getmtime(path)
+    return any(os.path.exists(source) and os.path.getmtime(source) > built for source in sources)
+
+
+# =====================================================
+# EXPORT FROM SKLEARN
+# =====================================================
+
+def compile_forest(forest, feature_names, classes=None, mean=None, scale=None):
+    """Flatten a fitted RandomForestClassifier / ExtraTreesClassifier.
+
+    `mean` and `scale` (one entry per model input feature, identity when
+    None) describe a StandardScaler applied before the forest.
+    """
+    if not hasattr(getattr(forest, "estimators_", [None])[0], "tree_"):
+        raise ValueError(f"Can only compile a random forest / extra trees model, not {type(forest).__name__}")
+    n_features = len(feature_names)
+    mean = np.zeros(n_features) if mean is None else np.asarray(mean, dtype=np.float64)
+    scale = np.ones(n_features) if scale is None else np.asarray(scale, dtype=np.float64)
+    classes = forest.classes_ if classes is None else classes
+
+    features, thresholds, lefts, rights, missing, leaf_ids, leaf_values, roots = ([] for _ in range(8))
+    offset = n_leaves = max_depth = 0
+
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        is_leaf = tree.children_left == -1
+        own = np.arange(tree.node_count) + offset
+
+        feature = np.where(is_leaf, 0, tree.feature)
+
+        features.append(feature.astype(np.int32))
+        thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+        lefts.append(np.where(is_leaf, own, tree.children_left + offset).astype(np.int32))
+        rights.append(np.where(is_leaf, own, tree.children_right + offset).astype(np.int32))
+        missing_left = getattr(tree, "missing_go_to_left", np.zeros(tree.node_count))
+        missing.append(np.asarray(missing_left).astype(bool))
+
+        leaf_id = np.full(tree.node_count, -1, dtype=np.int32)
+        leaf_id[is_leaf] = np.arange(is_leaf.sum()) + n_leaves
+        leaf_ids.append(leaf_id)
+        value = tree.value[is_leaf, 0, :]
+        leaf_values.append(value / value.sum(axis=1, keepdims=True))
+
+        roots.append(offset)
+        offset += tree.node_count
+        n_leaves += int(is_leaf.sum())
+        max_depth = max(max_depth, tree.max_depth)
+
+    return CompiledForest(
+        feature=np.concatenate(features), threshold=np.concatenate(thresholds),
+        left=np.concatenate(lefts), right=np.concatenate(rights),
+        missing_left=np.concatenate(missing), leaf_id=np.concatenate(leaf_ids),
+        leaf_value=np.concatenate(leaf_values), roots=np.array(roots, dtype=np.int32),
+        mean=mean, scale=scale, classes=classes, feature_names=feature_names, max_depth=max_depth,
+    )
+
+
+def compile_pipeline(model, label_encoder=None):
+    """Compile the model.joblib Pipeline (ColumnTransformer scaler + forest)"""
+    pre, forest = model.named_steps["pre"], model.named_steps["clf"]
+    raw_names = list(pre.feature_names_in_)
+
+    # Input column, mean and scale for every column the forest sees
+    out_cols, mean, scale = [], [], []
+    for name, transformer, cols in pre.transformers_:
+        if isinstance(transformer, str) and transformer == "drop":
+            continue
+        cols = [raw_names[c] if isinstance(c, (int, np.integer)) else c for c in cols]
+        # Newer sklearn stores passthrough columns as an identity FunctionTransformer
+        passthrough = (transformer == "passthrough" if isinstance(transformer, str)
+                       else type(transformer).__name__ == "FunctionTransformer"
+                       and getattr(transformer, "func", None) is None)
+        if passthrough:
+            out_cols += cols
+            mean += [0.0] * len(cols)
+            scale += [1.0] * len(cols)
+        elif hasattr(transformer, "scale_") and hasattr(transformer, "mean_"):
+            out_cols += cols
+            mean += list(transformer.mean_ if transformer.mean_ is not None else np.zeros(len(cols)))
+            scale += list(transformer.scale_ if transformer.scale_ is not None else np.ones(len(cols)))
+        else:
+            raise ValueError(f"Cannot fold transformer {name!r} into the forest")
+
+    compiled = compile_forest(forest, out_cols, mean=mean, scale=scale)
+
+    # Trees index the forest's input order; remap to the raw column order
+    position = np.array([raw_names.index(col) for col in out_cols])
+    compiled.feature = position.astype(np.int32)[compiled.feature]
+    compiled._prepare()
+    compiled.mean = np.zeros(len(raw_names))
+    compiled.scale = np.ones(len(raw_names))
+    compiled.mean[position] = mean
+    compiled.scale[position] = scale
+    compiled.feature_names = raw_names
+
+    if label_encoder is not None:
+        compiled.classes = label_encoder.inverse_transform(forest.classes_)
+    return compiled
+
+
+def compile_backend_model(model, scaler, feature_cols):
+    """Compile backend/train_model.py artifacts (forest + scaler on the vitals)"""
+    mean = np.zeros(len(feature_cols))
+    scale = np.ones(len(feature_cols))
+    scaled_cols = list(getattr(scaler, "feature_names_in_", feature_cols[:len(scaler.mean_)]))
+    for i, col in enumerate(scaled_cols):
+        mean[feature_cols.index(col)] = scaler.mean_[i]
+        scale[feature_cols.index(col)] = scaler.scale_[i]
+    return compile_forest(model, feature_cols, mean=mean, scale=scale)
+
+
+# =====================================================
+# COMMAND LINE
+# =====================================================
+
+def main(argv=None):
+    import argparse
+    import joblib
+
+    parser = argparse.ArgumentParser(description="Export the trained forest as flat NumPy arrays")
+    parser.add_argument("--model", default="model.joblib")
+    parser.add_argument("--encoder", default="label_encoder.joblib")
+    parser.add_argument("--backend", action="store_true",
+                        help="compile backend/train_model.py artifacts instead")
+    parser.add_argument("--scaler", default="scaler.joblib", help="with --backend")
+    parser.add_argument("--feature-cols", default="feature_cols.joblib", help="with --backend")
+    parser.add_argument("--out", default="model_compiled.npz",
+                        help="a .npz file, or any other path for a directory of .npy files")
+    parser.add_argument("--check", default=None,
+                        help="CSV of patients to compare against predict_proba")
+    args = parser.parse_args(argv)
+
+    model = joblib.load(args.model)
+    try:
+        if args.backend:
+            feature_cols = joblib.load(args.feature_cols)
+            compiled = compile_backend_model(model, joblib.load(args.scaler), feature_cols)
+        else:
+            compiled = compile_pipeline(model, joblib.load(args.encoder))
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    compiled.save(args.out)
+    print(f"✅ Compiled {compiled.n_trees} trees ({len(compiled.feature):,} nodes) → {args.out}")
+
+    if args.check:
+        import pandas as pd
+        from medical_data import read_patients
+
+        # float64 as pd.read_csv gives it, float32 as read_patients() does
+        for label, df in (("float64", pd.read_csv(args.check)), ("float32", read_patients(args.check))):
+            if args.backend:
+                X = df[feature_cols]
+                Xs = X.copy()
+                scaler = joblib.load(args.scaler)
+                Xs[list(scaler.feature_names_in_)] = scaler.transform(X[list(scaler.feature_names_in_)])
+                expected = model.predict_proba(Xs)
+            else:
+                from medical_data import prepare_features
+                X = prepare_features(df)
+                expected = model.predict_proba(X)
+            diff = np.abs(compiled.predict_proba(X) - expected).max()
+            print(f"   max |compiled - predict_proba| on {len(X):,} {label} rows: {diff:.2e}")
+            if diff > 1e-6:
+                print(f"❌ Compiled forest does not match predict_proba on {label} input")
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,295 @@
+# generate_dataset.py
+# -------------------------------------------------------
+# SYNTHETIC PATIENTS FITTED TO medical_dataset.csv, AT ANY SCALE
+# -------------------------------------------------------
+#
+# Usage:
+#   python generate_dataset.py --rows 10000000 --out big.csv
+#   python generate_dataset.py --rows 10000000 --out big.parquet --workers 8
+#   python generate_dataset.py --source medical_dataset.csv --save-profile profile.json --rows 0
+#   python generate_dataset.py --profile profile.json --rows 1000000 --out big.arrow
+#
+# Fitting (once, from --source) builds a profile for every disease:
+#   - its share of the rows
+#   - the mean vector and covariance matrix of the numeric_cols vitals,
+#     their observed min / max and missing-value rate
+#   - the frequency of every combination of the 10 symptom flags (1024
+#     patterns), so symptoms that go together keep going together. 5% of
+#     the mass is spread by the independent per-symptom rates, so
+#     combinations that the source never shows can still appear.
+# Vitals and symptoms are drawn independently given the disease. Vitals
+# are multivariate normal, clipped to the observed range and rounded to the
+# decimals the source uses.
+#
+# Rows are produced in chunks of --chunk-rows. Chunk i always uses the i-th
+# child of the --seed SeedSequence, so the output is the same for any
+# number of workers. Workers generate and format chunks in parallel; the
+# main process writes them in order and keeps at most 2 chunks per worker
+# in flight, so memory does not grow with --rows. The output has the
+# medical_dataset.csv columns: CSV, or Parquet / Arrow with the typed
+# schema of medical_data.py.
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from medical_data import numeric_cols, symptom_cols, PARQUET_EXTENSIONS, ARROW_EXTENSIONS
+from resource_usage import peak_rss_mb, format_mb
+
+PATTERN_SMOOTHING = 0.05
+
+
+# =====================================================
+# FITTING
+# =====================================================
+
+def _decimals(values, most=4):
+    """Fewest decimals that represent every value exactly"""
+    values = values[~np.isnan(values)]
+    for d in range(most + 1):
+        if np.allclose(values * 10 ** d, np.round(values * 10 ** d), rtol=0, atol=1e-6):
+            return d
+    return most
+
+
+def fit_profile(df, smoothing=PATTERN_SMOOTHING):
+    """Per-disease distributions of a patient table (medical_dataset.csv columns)"""
+    from medical_data import apply_schema
+
+    missing = [col for col in numeric_cols + symptom_cols + ["disease"] if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing column(s) in source: {', '.join(missing)}")
+    df = apply_schema(df[numeric_cols + symptom_cols + ["disease"]].copy())
+    df = df[df["disease"].notna()]
+    if df.empty:
+        raise ValueError("Source has no labelled rows to fit")
+
+    vitals_all = df[numeric_cols].to_numpy(dtype=np.float64)
+    bit_values = 1 << np.arange(len(symptom_cols))
+    profile = {
+        "numeric_cols": numeric_cols,
+        "symptom_cols": symptom_cols,
+        "decimals": [_decimals(vitals_all[:, j]) for j in range(len(numeric_cols))],
+        "rows": len(df),
+        "diseases": [],
+    }
+    for disease, group in df.groupby("disease", observed=True):
+        vitals = group[numeric_cols].to_numpy(dtype=np.float64)
+        symptoms = group[symptom_cols].to_numpy(dtype=np.int64)
+
+        mean = np.nanmean(vitals, axis=0)
+        filled = np.where(np.isnan(vitals), mean, vitals)
+        cov = np.cov(filled, rowvar=False) if len(group) > 1 else np.zeros((len(mean), len(mean)))
+
+        patterns = np.bincount(symptoms @ bit_values, minlength=1 << len(symptom_cols)) / len(group)
+        rates = symptoms.mean(axis=0)
+        bits = (np.arange(len(patterns))[:, None] >> np.arange(len(symptom_cols))) & 1
+        independent = np.prod(np.where(bits, rates, 1 - rates), axis=1)
+        patterns = (1 - smoothing) * patterns + smoothing * independent
+
+        profile["diseases"].append({
+            "name": str(disease),
+            "weight": len(group) / len(df),
+            "mean": mean.tolist(),
+            "cov": cov.tolist(),
+            "low": np.nanmin(vitals, axis=0).tolist(),
+            "high": np.nanmax(vitals, axis=0).tolist(),
+            "missing": np.isnan(vitals).mean(axis=0).tolist(),
+            "patterns": (patterns / patterns.sum()).tolist(),
+        })
+    return profile
+
+
+# =====================================================
+# GENERATION
+# =====================================================
+
+def _prepared(profile):
+    """Arrays used by generate_chunk, computed once per process"""
+    diseases = profile["diseases"]
+    factors = []
+    for d in diseases:
+        # Symmetric square root instead of Cholesky: works for singular
+        # covariances (constant columns, collinear vitals)
+        w, v = np.linalg.eigh(np.asarray(d["cov"]))
+        factors.append(v * np.sqrt(np.clip(w, 0, None)))
+    weights = np.array([d["weight"] for d in diseases])
+    return {
+        "names": np.array([d["name"] for d in diseases], dtype=object),
+        "weights": weights / weights.sum(),
+        "mean": [np.asarray(d["mean"]) for d in diseases],
+        "factor": factors,
+        "low": [np.asarray(d["low"]) for d in diseases],
+        "high": [np.asarray(d["high"]) for d in diseases],
+        "missing": [np.asarray(d["missing"]) for d in diseases],
+        "patterns": [np.asarray(d["patterns"]) for d in diseases],
+        "decimals": np.asarray(profile["decimals"]),
+    }
+
+
+def generate_chunk(prepared, n, seed):
+    """n rows as a DataFrame with the medical_dataset.csv columns.
+
+    `seed` is anything np.random.default_rng accepts (a SeedSequence child).
+    """
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    counts = rng.multinomial(n, prepared["weights"])
+    n_vitals, n_symptoms = len(numeric_cols), len(symptom_cols)
+    vitals = np.empty((n, n_vitals))
+    symptoms = np.empty((n, n_symptoms), dtype=np.int8)
+    labels = np.empty(n, dtype=np.intp)
+
+    start = 0
+    for d, count in enumerate(counts):
+        rows = slice(start, start + count)
+        z = rng.standard_normal((count, n_vitals))
+        block = prepared["mean"][d] + z @ prepared["factor"][d].T
+        block = np.clip(block, prepared["low"][d], prepared["high"][d])
+        block[rng.random((count, n_vitals)) < prepared["missing"][d]] = np.nan
+        vitals[rows] = block
+
+        codes = rng.choice(len(prepared["patterns"][d]), size=count, p=prepared["patterns"][d])
+        symptoms[rows] = (codes[:, None] >> np.arange(n_symptoms)) & 1
+        labels[rows] = d
+        start += count
+
+    # Diseases come out in blocks; shuffle so chunks look like real files
+    order = rng.permutation(n)
+    scale = 10.0 ** prepared["decimals"]
+    vitals = np.round(vitals[order] * scale) / scale
+
+    frame = {}
+    for j, col in enumerate(numeric_cols):
+        column = vitals[:, j]
+        if prepared["decimals"][j] == 0 and not np.isnan(column).any():
+            column = column.astype(np.int64)
+        frame[col] = column
+    for j, col in enumerate(symptom_cols):
+        frame[col] = symptoms[order, j]
+    frame["disease"] = prepared["names"][labels[order]]
+    return pd.DataFrame(frame)
+
+
+_worker = {}
+
+
+def _init_worker(profile):
+    _worker["prepared"] = _prepared(profile)
+
+
+def _make_chunk(n, seed, as_csv):
+    chunk = generate_chunk(_worker["prepared"], n, seed)
+    if as_csv:
+        return chunk.to_csv(index=False, header=False).encode("utf-8")
+    return chunk
+
+
+def generate(profile, rows, out, seed=42, chunk_rows=100_000, workers=1):
+    """Write `rows` generated rows to `out` (.csv, .parquet or .arrow).
+
+    Returns the number of rows written.
+    """
+    lower = str(out).lower()
+    as_csv = not lower.endswith(PARQUET_EXTENSIONS + ARROW_EXTENSIONS)
+    sizes = [min(chunk_rows, rows - start) for start in range(0, rows, chunk_rows)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    def chunks():
+        if workers <= 1:
+            _init_worker(profile)
+            for n, s in zip(sizes, seeds):
+                yield _make_chunk(n, s, as_csv)
+            return
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(profile,)) as pool:
+            pending = deque()
+            jobs = iter(zip(sizes, seeds))
+            for n, s in jobs:
+                pending.append(pool.submit(_make_chunk, n, s, as_csv))
+                if len(pending) >= 2 * workers:
+                    break
+            while pending:
+                result = pending.popleft().result()
+                for n, s in jobs:   # refill one slot
+                    pending.append(pool.submit(_make_chunk, n, s, as_csv))
+                    break
+                yield result
+
+    if not as_csv:
+        from medical_data import write_columnar
+        return write_columnar(chunks(), out)
+
+    written = 0
+    with open(out, "wb") as f:
+        f.write((",".join(numeric_cols + symptom_cols + ["disease"]) + "\n").encode("utf-8"))
+        for n, data in zip(sizes, chunks()):
+            f.write(data)
+            written += n
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic patients fitted to a dataset")
+    parser.add_argument("--source", default="medical_dataset.csv", help="dataset to fit (CSV/Parquet/Arrow)")
+    parser.add_argument("--profile", default=None, help="use a saved profile instead of fitting --source")
+    parser.add_argument("--save-profile", default=None, help="write the fitted profile as JSON")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--out", default="synthetic_patients.csv", help=".csv, .parquet or .arrow")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=1, help="processes generating chunks")
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        if not os.path.exists(args.profile):
+            print(f"❌ ERROR: {args.profile} NOT FOUND.")
+            return 1
+        with open(args.profile, encoding="utf-8") as f:
+            profile = json.load(f)
+    else:
+        if not os.path.exists(args.source):
+            print(f"❌ ERROR: {args.source} NOT FOUND.")
+            return 1
+        from medical_data import read_patients
+        try:
+            profile = fit_profile(read_patients(args.source))
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+        print(f"✅ Fitted {len(profile['diseases'])} diseases on {profile['rows']:,} rows of {args.source}")
+
+    if args.save_profile:
+        with open(args.save_profile, "w", encoding="utf-8") as f:
+            json.dump(profile, f)
+        print(f"💾 Profile saved to {args.save_profile}")
+    if args.rows <= 0:
+        return 0
+
+    print(f"⏳ Generating {args.rows:,} rows → {args.out} "
+          f"({args.workers} worker(s), chunks of {args.chunk_rows:,})...")
+    start = time.perf_counter()
+    try:
+        rows = generate(profile, args.rows, args.out, args.seed, args.chunk_rows, args.workers)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    elapsed = time.perf_counter() - start
+    print(f"✅ {rows:,} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/sec, "
+          f"{os.path.getsize(args.out) / 1e6:,.1f} MB)")
+    peak = peak_rss_mb()
+    if peak is not None:   # not available on Windows
+        print(f"📊 Peak memory of the writer process: {format_mb(peak)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
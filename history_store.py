@@ -0,0 +1,531 @@
+# history_store.py
+# -------------------------------------------------------
+# APPEND-ONLY PER-PATIENT HISTORY (VITALS, SYMPTOMS, PREDICTIONS)
+# -------------------------------------------------------
+#
+# Usage:
+#   python batch_predict.py patients.csv out.csv --id-col patient_id --history history/
+#   python history_store.py history/ last P001 -n 10
+#   python history_store.py history/ range P001 --start 2024-01-01 --end 2024-02-01
+#   python history_store.py history/ rolling P001 systolic_bp --window 5
+#   python history_store.py history/ summary P001
+#   python history_store.py history/ compact
+#
+# Every scored record is one fixed-size row: the time, the numeric_cols
+# vitals (float32), the symptom_cols flags (int8) and the predicted
+# distribution over the classes (float32). Each patient has a folder:
+#
+#   <root>/meta.json                 column names and classes of the store
+#   <root>/p_<id>/index.json         the sealed segments, oldest first
+#   <root>/p_<id>/active_<seq>.bin   rows appended since the last seal
+#   <root>/p_<id>/seg_<seq>/         a sealed segment: ts.npy, vitals.npy,
+#                                    symptoms.npy, proba.npy
+#
+# Appends go to the end of the active file as raw bytes (no parsing and no
+# rewriting), so writing costs one buffered write per patient per batch.
+# After segment_rows rows the active file is sealed: sorted by time and
+# written as column files that queries memory-map. index.json keeps the
+# time span and per-vital count/sum/sum of squares/min/max of every
+# segment. A range query only opens the segments that overlap the range.
+# summary() takes whole segments from those totals without reading them.
+# last(n) reads segments backwards from the newest one.
+#
+# compact() merges runs of small sealed segments into larger ones. Every
+# step writes the new files first and then swaps index.json atomically. A
+# crash leaves either the old or the new segment list, never a mix. There
+# is one writer per store. Any number of readers can query it, but rows
+# still buffered by the writer are only visible to the writer until
+# flush() or close().
+
+import json
+import os
+import shutil
+import sys
+import time
+import warnings
+from collections import OrderedDict
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+from artifact_cache import atomic_write
+from medical_data import numeric_cols, symptom_cols
+
+def _seconds(value):
+    """Epoch seconds from a number, datetime/Timestamp or ISO date string"""
+    if value is None or isinstance(value, (int, float, np.integer, np.floating)):
+        return value
+    if isinstance(value, str):
+        import pandas as pd
+        value = pd.Timestamp(value)
+    return value.timestamp()
+
+
+def _write_json(path, obj):
+    def write(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(obj, f)
+    atomic_write(path, write)
+
+
+def _empty_stats(n_vitals):
+    return {"count": [0] * n_vitals, "sum": [0.0] * n_vitals, "sumsq": [0.0] * n_vitals,
+            "min": [None] * n_vitals, "max": [None] * n_vitals}
+
+
+def _vital_stats(vitals):
+    """Per-column totals of a (rows, vitals) block, NaN ignored"""
+    present = ~np.isnan(vitals)
+    values = np.where(present, vitals, 0).astype(np.float64)
+    stats = {"count": present.sum(axis=0).tolist(), "sum": values.sum(axis=0).tolist(),
+             "sumsq": (values ** 2).sum(axis=0).tolist()}
+    with np.errstate(all="ignore"):
+        low = np.where(present, vitals, np.inf).min(axis=0) if len(vitals) else np.full(vitals.shape[1], np.inf)
+        high = np.where(present, vitals, -np.inf).max(axis=0) if len(vitals) else np.full(vitals.shape[1], -np.inf)
+    stats["min"] = [float(v) if np.isfinite(v) else None for v in low]
+    stats["max"] = [float(v) if np.isfinite(v) else None for v in high]
+    return stats
+
+
+def _merge_stats(total, stats):
+    for i in range(len(total["count"])):
+        total["count"][i] += stats["count"][i]
+        total["sum"][i] += stats["sum"][i]
+        total["sumsq"][i] += stats["sumsq"][i]
+        for key, pick in (("min", min), ("max", max)):
+            values = [v for v in (total[key][i], stats[key][i]) if v is not None]
+            total[key][i] = pick(values) if values else None
+    return total
+
+
+class HistoryStore:
+    """Per-patient history of scored records, see the header for the layout.
+
+    `classes` fixes the columns of the stored distributions; an existing
+    store keeps the classes it was created with.
+    """
+
+    def __init__(self, root, classes=None, segment_rows=4096, compact_rows=1 << 20, max_open=256):
+        self.root = root
+        self.segment_rows = segment_rows
+        self.compact_rows = compact_rows
+        self.max_open = max_open
+        os.makedirs(root, exist_ok=True)
+
+        meta_path = os.path.join(root, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            if classes is not None and [str(c) for c in classes] != meta["classes"]:
+                raise ValueError(f"{root} stores classes {meta['classes']}, not {list(classes)}")
+        else:
+            if classes is None:
+                raise ValueError(f"{root} is a new store: the classes are needed")
+            meta = {"numeric_cols": numeric_cols, "symptom_cols": symptom_cols,
+                    "classes": [str(c) for c in classes]}
+            _write_json(meta_path, meta)
+        self.numeric_cols = meta["numeric_cols"]
+        self.symptom_cols = meta["symptom_cols"]
+        self.classes = meta["classes"]
+        self.dtype = np.dtype([("ts", "<f8"),
+                               ("vitals", "<f4", (len(self.numeric_cols),)),
+                               ("symptoms", "i1", (len(self.symptom_cols),)),
+                               ("proba", "<f4", (len(self.classes),))])
+
+        self._open = OrderedDict()   # patient -> open active file (LRU)
+        self._indexes = {}           # patient -> index.json contents
+        self._pending = {}           # patient -> rows in the active file
+
+    # -------------------------------------------------
+    # FILES
+    # -------------------------------------------------
+
+    def _dir(self, patient):
+        return os.path.join(self.root, "p_" + quote(str(patient), safe=""))
+
+    def _index(self, patient):
+        if patient not in self._indexes:
+            path = os.path.join(self._dir(patient), "index.json")
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self._indexes[patient] = json.load(f)
+            except FileNotFoundError:
+                self._indexes[patient] = {"next_seq": 0, "segments": []}
+        return self._indexes[patient]
+
+    def _write_index(self, patient, index):
+        _write_json(os.path.join(self._dir(patient), "index.json"), index)
+        self._indexes[patient] = index
+
+    def _active_path(self, patient):
+        return os.path.join(self._dir(patient), f"active_{self._index(patient)['next_seq']:08d}.bin")
+
+    def _recover(self, patient):
+        """Before the first write: drop active files that were already sealed
+        and a torn last row. Readers never change files; they ignore both."""
+        folder = self._dir(patient)
+        self._pending[patient] = 0
+        next_seq = self._index(patient)["next_seq"]
+        for name in os.listdir(folder):
+            if name.startswith("active_") and int(name[7:15]) < next_seq:
+                os.remove(os.path.join(folder, name))     # sealed before a crash
+        active = os.path.join(folder, f"active_{next_seq:08d}.bin")
+        if os.path.exists(active):
+            size = os.path.getsize(active)
+            if size % self.dtype.itemsize:
+                os.truncate(active, size - size % self.dtype.itemsize)
+            self._pending[patient] = os.path.getsize(active) // self.dtype.itemsize
+
+    def _file(self, patient):
+        f = self._open.get(patient)
+        if f is not None:
+            self._open.move_to_end(patient)
+            return f
+        os.makedirs(self._dir(patient), exist_ok=True)
+        if patient not in self._pending:
+            self._recover(patient)
+        f = open(self._active_path(patient), "ab")
+        self._open[patient] = f
+        if len(self._open) > self.max_open:
+            self._open.popitem(last=False)[1].close()
+        return f
+
+    def _close_file(self, patient):
+        f = self._open.pop(patient, None)
+        if f is not None:
+            f.close()
+
+    # -------------------------------------------------
+    # WRITING
+    # -------------------------------------------------
+
+    def append(self, patient, vitals, symptoms, proba, ts=None):
+        """Append one record; vitals / symptoms may be dicts keyed by column"""
+        if isinstance(vitals, dict):
+            vitals = [vitals.get(col, np.nan) for col in self.numeric_cols]
+        if isinstance(symptoms, dict):
+            symptoms = [symptoms.get(col, 0) for col in self.symptom_cols]
+        self.append_batch([patient], np.atleast_2d(np.asarray(vitals, dtype=np.float32)),
+                          np.atleast_2d(symptoms), np.atleast_2d(proba), ts if ts is None else [ts])
+
+    def append_batch(self, patients, vitals, symptoms, proba, ts=None):
+        """Append one record per entry of `patients` (rows of the arrays).
+
+        ts: epoch seconds per row (or anything _seconds() understands);
+        defaults to now.
+        """
+        patients = np.asarray(patients).astype(str)
+        n = len(patients)
+        records = np.empty(n, dtype=self.dtype)
+        if ts is None:
+            records["ts"] = time.time()
+        else:
+            ts = np.asarray(ts)
+            records["ts"] = ts if ts.dtype.kind in "iuf" else [_seconds(t) for t in ts]
+        records["vitals"] = vitals
+        records["symptoms"] = np.nan_to_num(np.asarray(symptoms, dtype=np.float32)).astype(np.int8)
+        records["proba"] = proba
+
+        # One write per patient: rows grouped by patient, append order kept
+        order = np.argsort(patients, kind="stable")
+        ids, starts = np.unique(patients[order], return_index=True)
+        for patient, rows in zip(ids, np.split(order, starts[1:])):
+            self._file(patient).write(records[rows].tobytes())
+            self._pending[patient] += len(rows)
+            if self._pending[patient] >= self.segment_rows:
+                self.seal(patient)
+        return n
+
+    def flush(self):
+        for f in self._open.values():
+            f.flush()
+
+    def close(self):
+        for patient in list(self._open):
+            self._close_file(patient)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def seal(self, patient):
+        """Turn the patient's active file into a sorted, memory-mappable segment"""
+        self._close_file(patient)
+        index = self._index(patient)
+        active = self._active_path(patient)
+        records = self._read_active(patient)
+        if not len(records):
+            return
+        records = records[np.argsort(records["ts"], kind="stable")]
+        name = f"seg_{index['next_seq']:08d}"
+        self._write_segment(patient, name, records)
+
+        segment = self._segment_entry(name, records)
+        self._write_index(patient, {"next_seq": index["next_seq"] + 1,
+                                    "segments": index["segments"] + [segment]})
+        os.remove(active)
+        self._pending[patient] = 0
+
+    def _write_segment(self, patient, name, records):
+        folder = self._dir(patient)
+        tmp = os.path.join(folder, f".tmp_{name}")
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for column in ("ts", "vitals", "symptoms", "proba"):
+            # Column-major, so one vital over many rows is contiguous
+            np.save(os.path.join(tmp, f"{column}.npy"), np.asfortranarray(records[column]))
+        target = os.path.join(folder, name)
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp, target)
+
+    @staticmethod
+    def _segment_entry(name, records):
+        return {"name": name, "rows": len(records),
+                "t_min": float(records["ts"].min()), "t_max": float(records["ts"].max()),
+                "stats": _vital_stats(records["vitals"])}
+
+    def compact(self, patient=None):
+        """Merge runs of sealed segments smaller than compact_rows (for one
+        patient or all of them). Returns the number of segments removed."""
+        if patient is None:
+            return sum(self.compact(p) for p in self.patients())
+        self.seal(patient)
+        index = self._index(patient)
+        segments, merged, removed = index["segments"], [], 0
+        compactions = index.get("compactions", 0) + 1
+        i = 0
+        while i < len(segments):
+            run = [segments[i]]
+            while (i + len(run) < len(segments)
+                   and sum(s["rows"] for s in run) + segments[i + len(run)]["rows"] <= self.compact_rows):
+                run.append(segments[i + len(run)])
+            i += len(run)
+            if len(run) == 1:
+                merged.append(run[0])
+                continue
+            records = np.concatenate([self._load_segment(patient, s["name"]) for s in run])
+            records = records[np.argsort(records["ts"], kind="stable")]
+            name = f"{run[0]['name'].split('.')[0]}.{compactions}"
+            self._write_segment(patient, name, records)
+            merged.append(self._segment_entry(name, records))
+            removed += len(run) - 1
+
+        if removed:
+            old = {s["name"] for s in segments} - {s["name"] for s in merged}
+            self._write_index(patient, {**index, "segments": merged, "compactions": compactions})
+            for name in old:
+                shutil.rmtree(os.path.join(self._dir(patient), name), ignore_errors=True)
+        return removed
+
+    # -------------------------------------------------
+    # READING
+    # -------------------------------------------------
+
+    def patients(self):
+        return sorted(unquote(name[2:]) for name in os.listdir(self.root)
+                      if name.startswith("p_") and os.path.isdir(os.path.join(self.root, name)))
+
+    def _read_active(self, patient):
+        f = self._open.get(patient)
+        if f is not None:
+            f.flush()
+        path = self._active_path(patient)
+        if not os.path.exists(path) or os.path.getsize(path) < self.dtype.itemsize:
+            return np.empty(0, dtype=self.dtype)
+        rows = os.path.getsize(path) // self.dtype.itemsize
+        return np.array(np.memmap(path, dtype=self.dtype, mode="r", shape=(rows,)))
+
+    def _load_segment(self, patient, name, rows=slice(None)):
+        folder = os.path.join(self._dir(patient), name)
+        columns = {column: np.load(os.path.join(folder, f"{column}.npy"), mmap_mode="r")
+                   for column in ("ts", "vitals", "symptoms", "proba")}
+        ts = columns["ts"][rows]
+        records = np.empty(len(ts), dtype=self.dtype)
+        for column, values in columns.items():
+            records[column] = values[rows]
+        return records
+
+    def _as_result(self, records):
+        return {"ts": records["ts"], "vitals": records["vitals"],
+                "symptoms": records["symptoms"], "proba": records["proba"]}
+
+    def last(self, patient, n=10):
+        """The patient's n most recently appended records, oldest first"""
+        index = self._index(patient)
+        parts = [self._read_active(patient)[-n:]] if n else []
+        have = len(parts[0]) if parts else 0
+        for segment in reversed(index["segments"]):
+            if have >= n:
+                break
+            take = min(n - have, segment["rows"])
+            parts.append(self._load_segment(patient, segment["name"], slice(segment["rows"] - take, None)))
+            have += take
+        records = np.concatenate(parts[::-1]) if parts else np.empty(0, dtype=self.dtype)
+        return self._as_result(records)
+
+    def _range_records(self, patient, start=None, end=None):
+        start = -np.inf if start is None else _seconds(start)
+        end = np.inf if end is None else _seconds(end)
+        parts = []
+        for segment in self._index(patient)["segments"]:
+            if segment["t_max"] < start or segment["t_min"] > end:
+                continue
+            ts = np.load(os.path.join(self._dir(patient), segment["name"], "ts.npy"), mmap_mode="r")
+            lo, hi = np.searchsorted(ts, start, "left"), np.searchsorted(ts, end, "right")
+            if hi > lo:
+                parts.append(self._load_segment(patient, segment["name"], slice(lo, hi)))
+        active = self._read_active(patient)
+        parts.append(active[(active["ts"] >= start) & (active["ts"] <= end)])
+        records = np.concatenate(parts)
+        return records[np.argsort(records["ts"], kind="stable")]
+
+    def range(self, patient, start=None, end=None):
+        """Records with start <= ts <= end (inclusive), in time order"""
+        return self._as_result(self._range_records(patient, start, end))
+
+    def rolling(self, patient, column, window=5, start=None, end=None):
+        """Trailing mean / std / min / max of one vital over `window` records,
+        for every record in the range. NaNs are skipped."""
+        col = self.numeric_cols.index(column)
+        records = self._range_records(patient, start, end)
+        values = records["vitals"][:, col].astype(np.float64)
+        present = ~np.isnan(values)
+
+        def trailing(x):
+            total = np.concatenate([[0.0], np.cumsum(x)])
+            lo = np.maximum(np.arange(1, len(x) + 1) - window, 0)
+            return total[1:] - total[lo]
+
+        n = trailing(present.astype(np.float64))
+        clean = np.where(present, values, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = trailing(clean) / n
+            std = np.sqrt(np.maximum(trailing(clean ** 2) / n - mean ** 2, 0))
+
+        padded = np.concatenate([np.full(window - 1, np.nan), values])
+        windows = np.lib.stride_tricks.sliding_window_view(padded, window)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)   # all-NaN windows
+            low, high = np.nanmin(windows, axis=1), np.nanmax(windows, axis=1)
+        return {"ts": records["ts"], "value": values, "count": n,
+                "mean": mean, "std": std, "min": low, "max": high}
+
+    def summary(self, patient, start=None, end=None):
+        """count / mean / std / min / max of every vital over a time range.
+
+        Segments entirely inside the range are taken from index.json; only
+        the ones cut by it (and the active rows) are read.
+        """
+        lo = -np.inf if start is None else _seconds(start)
+        hi = np.inf if end is None else _seconds(end)
+        total = _empty_stats(len(self.numeric_cols))
+        partial = []
+        for segment in self._index(patient)["segments"]:
+            if segment["t_max"] < lo or segment["t_min"] > hi:
+                continue
+            if lo <= segment["t_min"] and segment["t_max"] <= hi:
+                _merge_stats(total, segment["stats"])
+            else:
+                partial.append(segment)
+
+        vital_parts = []
+        for segment in partial:
+            ts = np.load(os.path.join(self._dir(patient), segment["name"], "ts.npy"), mmap_mode="r")
+            a, b = np.searchsorted(ts, lo, "left"), np.searchsorted(ts, hi, "right")
+            vitals = np.load(os.path.join(self._dir(patient), segment["name"], "vitals.npy"), mmap_mode="r")
+            vital_parts.append(np.asarray(vitals[a:b]))
+        active = self._read_active(patient)
+        vital_parts.append(active["vitals"][(active["ts"] >= lo) & (active["ts"] <= hi)])
+        _merge_stats(total, _vital_stats(np.concatenate(vital_parts)))
+
+        out = {}
+        for i, col in enumerate(self.numeric_cols):
+            count = total["count"][i]
+            mean = total["sum"][i] / count if count else None
+            var = max(total["sumsq"][i] / count - mean ** 2, 0.0) if count else None
+            out[col] = {"count": count, "mean": mean, "std": var ** 0.5 if count else None,
+                        "min": total["min"][i], "max": total["max"][i]}
+        return out
+
+
+# =====================================================
+# COMMAND LINE
+# =====================================================
+
+def _print_records(store, result):
+    import pandas as pd
+
+    if not len(result["ts"]):
+        print("   (no records)")
+        return
+    frame = pd.DataFrame(result["vitals"], columns=store.numeric_cols)
+    frame.insert(0, "time", pd.to_datetime(result["ts"], unit="s").strftime("%Y-%m-%d %H:%M:%S"))
+    top = np.argmax(result["proba"], axis=1)
+    frame["top_disease"] = np.asarray(store.classes)[top]
+    frame["probability"] = np.round(result["proba"][np.arange(len(top)), top] * 100, 1)
+    print(frame.to_string(index=False))
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query or compact a per-patient history store")
+    parser.add_argument("root", help="store folder (written by batch_predict.py --history)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("last", help="most recent records")
+    p.add_argument("patient")
+    p.add_argument("-n", type=int, default=10)
+    p = sub.add_parser("range", help="records in a time range")
+    p.add_argument("patient")
+    p.add_argument("--start", default=None)
+    p.add_argument("--end", default=None)
+    p = sub.add_parser("rolling", help="trailing statistics of one vital")
+    p.add_argument("patient")
+    p.add_argument("column", choices=numeric_cols)
+    p.add_argument("--window", type=int, default=5)
+    p.add_argument("--start", default=None)
+    p.add_argument("--end", default=None)
+    p = sub.add_parser("summary", help="statistics of every vital")
+    p.add_argument("patient")
+    p.add_argument("--start", default=None)
+    p.add_argument("--end", default=None)
+    p = sub.add_parser("compact", help="merge small segments")
+    p.add_argument("patient", nargs="?", default=None)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(os.path.join(args.root, "meta.json")):
+        print(f"❌ ERROR: no history store at {args.root}")
+        return 1
+    store = HistoryStore(args.root)
+    if getattr(args, "patient", None) and args.patient not in store.patients():
+        print(f"❌ No history for patient {args.patient}")
+        return 1
+
+    if args.command == "last":
+        _print_records(store, store.last(args.patient, args.n))
+    elif args.command == "range":
+        _print_records(store, store.range(args.patient, args.start, args.end))
+    elif args.command == "rolling":
+        import pandas as pd
+        result = store.rolling(args.patient, args.column, args.window, args.start, args.end)
+        frame = pd.DataFrame({k: v for k, v in result.items() if k != "ts"})
+        frame.insert(0, "time", pd.to_datetime(result["ts"], unit="s").strftime("%Y-%m-%d %H:%M:%S"))
+        print(frame.round(2).to_string(index=False))
+    elif args.command == "summary":
+        for col, stats in store.summary(args.patient, args.start, args.end).items():
+            if stats["count"]:
+                print(f"   {col:<14} n={stats['count']:<6} mean={stats['mean']:.2f}  std={stats['std']:.2f}  "
+                      f"min={stats['min']:.2f}  max={stats['max']:.2f}")
+            else:
+                print(f"   {col:<14} n=0")
+    else:
+        start = time.perf_counter()
+        removed = store.compact(args.patient)
+        print(f"✅ Compacted: {removed} segment(s) merged away ({time.perf_counter() - start:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,25 +2,16 @@
 # TEXT-BASED INPUT DISEASE PREDICTION SYSTEM
 # ---------------------------------------------
 
-import re
-import numpy as np
 import pandas as pd
 import joblib
 
-# Load model + encoder
-model = joblib.load("model.joblib")
-le = joblib.load("label_encoder.joblib")
-
-# Columns used
-numeric_cols = [
-    "age","blood_sugar","cholesterol","thyroid_tsh","wbc","rbc",
-    "platelets","systolic_bp","diastolic_bp"
-]
+from medical_data import parse_vitals_text, parse_symptoms_text
+from metrics import stage, dump_metrics
 
-symptom_cols = [
-    "cough","fever","headache","chest_pain","vomiting",
-    "dizziness","fatigue","shortness_of_breath","sore_throat","runny_nose"
-]
+# Load model + encoder
+with stage("load_artifacts"):
+    model = joblib.load("model.joblib")
+    le = joblib.load("label_encoder.joblib")
 
 print("\n------------------------------------------------")
 print("        🔍 TEXT BASED DISEASE PREDICTION")
@@ -34,15 +25,8 @@ print("Example: age: 45, blood_sugar: 110, cholesterol: 200\n")
 
 vitals_text = input("Vitals: ").lower()
 
-user_vitals = {}
-
-for col in numeric_cols:
-    pattern = rf"{col}\s*[:=]\s*([0-9.]+)"
-    match = re.search(pattern, vitals_text)
-    if match:
-        user_vitals[col] = float(match.group(1))
-    else:
-        user_vitals[col] = np.nan     # Missing values allowed
+with stage("extract_vitals"):
+    user_vitals = parse_vitals_text(vitals_text)
 
 
 # ---------------------------------------------------------
@@ -53,30 +37,30 @@ print("Example: I have fever, cough and headache.\n")
 
 symptoms_text = input("Symptoms: ").lower()
 
-user_symptoms = {}
-
-for col in symptom_cols:
-    # If the symptom word appears anywhere → mark 1
-    if col.replace("_", " ") in symptoms_text:
-        user_symptoms[col] = 1
-    elif col in symptoms_text:
-        user_symptoms[col] = 1
-    else:
-        user_symptoms[col] = 0
+# If the symptom word appears anywhere → mark 1
+with stage("extract_symptoms"):
+    user_symptoms = parse_symptoms_text(symptoms_text)
 
 
 # ---------------------------------------------------------
 # 3) MERGE INTO A SINGLE ROW FOR PREDICTION
 # ---------------------------------------------------------
 user_data = {**user_vitals, **user_symptoms}
-user_df = pd.DataFrame([user_data])
+with stage("build_dataframe"):
+    user_df = pd.DataFrame([user_data])
 
 # ---------------------------------------------------------
 # 4) PREDICT DISEASE
 # ---------------------------------------------------------
-pred_encoded = model.predict(user_df)[0]
+# Same as model.predict, split so scaling and the forest are timed apart
+with stage("scale"):
+    scaled = model.named_steps["pre"].transform(user_df)
+with stage("predict"):
+    pred_encoded = model.named_steps["clf"].predict(scaled)[0]
 predicted = le.inverse_transform([pred_encoded])[0]
 
 print("\n------------------------------------------------")
 print(f" 🧠 PREDICTION RESULT: You may have ➜ {predicted}")
-print("------------------------------------------------\n")
\ No newline at end of file
+print("------------------------------------------------\n")
+
+dump_metrics()  # only when METRICS_OUT is set
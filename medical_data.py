@@ -0,0 +1,268 @@
+# medical_data.py
+# -------------------------------------------------------
+# SHARED COLUMNS + LOADERS FOR medical_dataset.csv STYLE FILES
+# -------------------------------------------------------
+#
+# pandas is imported inside the loaders only, so the column lists and the
+# text parsers can be used by predict_cli.py without paying for pandas.
+#
+# Patient tables use a declared schema instead of pandas' inferred
+# int64/float64/object columns: float32 vitals, int8 symptom flags and a
+# categorical disease label. Besides CSV/JSONL, every loader reads the
+# columnar copies written by convert_dataset.py: Parquet (.parquet) or
+# uncompressed Arrow IPC (.arrow/.feather), which is memory-mapped.
+# pyarrow is only imported for those.
+
+import re
+
+# Columns used
+numeric_cols = [
+    "age","blood_sugar","cholesterol","thyroid_tsh","wbc","rbc",
+    "platelets","systolic_bp","diastolic_bp"
+]
+
+symptom_cols = [
+    "cough","fever","headache","chest_pain","vomiting",
+    "dizziness","fatigue","shortness_of_breath","sore_throat","runny_nose"
+]
+
+feature_cols = numeric_cols + symptom_cols
+
+# Declared column types
+VITAL_DTYPE = "float32"
+SYMPTOM_DTYPE = "int8"
+schema_dtypes = {
+    **{col: VITAL_DTYPE for col in numeric_cols},
+    **{col: SYMPTOM_DTYPE for col in symptom_cols},
+    "disease": "category",
+}
+
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+ARROW_EXTENSIONS = (".arrow", ".feather", ".ipc")
+
+
+# -------------------------------------------------------
+# FREE TEXT ("age: 45, blood_sugar: 110" / "fever and cough")
+# -------------------------------------------------------
+
+# Precompiled once: a single scan over the paragraph finds every
+# "<vital>: <value>" pair / every symptom word (longest names first)
+vitals_re = re.compile(
+    r"(?=(" + "|".join(sorted(numeric_cols, key=len, reverse=True)) + r")\s*[:=]\s*([0-9.]+))"
+)
+symptom_words = {}
+for col in symptom_cols:
+    symptom_words[col] = col
+    symptom_words[col.replace("_", " ")] = col
+symptoms_re = re.compile(
+    "(?=(" + "|".join(sorted(symptom_words, key=len, reverse=True)) + "))"
+)
+
+
+def parse_vitals_text(text):
+    """Vitals mentioned as "<col>: <value>"; missing ones are NaN"""
+    found = {}
+    for col, value in vitals_re.findall(text.lower()):
+        found.setdefault(col, value)      # first mention wins
+
+    vitals = {}
+    for col in numeric_cols:
+        if col in found:
+            vitals[col] = float(found[col])
+        else:
+            vitals[col] = float("nan")    # Missing values allowed
+    return vitals
+
+
+def parse_symptoms_text(text):
+    """1 for every symptom column mentioned anywhere in the text, else 0"""
+    mentioned = {symptom_words[word] for word in symptoms_re.findall(text.lower())}
+    return {col: 1 if col in mentioned else 0 for col in symptom_cols}
+
+
+def is_jsonl(path):
+    """True when the file should be read as JSON lines instead of CSV"""
+    return str(path).lower().endswith((".jsonl", ".ndjson", ".json"))
+
+
+def is_columnar(path):
+    """True for Parquet / Arrow IPC files"""
+    return str(path).lower().endswith(PARQUET_EXTENSIONS + ARROW_EXTENSIONS)
+
+
+def apply_schema(df):
+    """Cast the known columns of df to the declared schema (in place).
+
+    Vitals that are not numbers become NaN and missing symptom flags
+    become 0, as in the cleaning rules below.
+    """
+    import pandas as pd
+
+    vitals = [col for col in numeric_cols if col in df.columns]
+    symptoms = [col for col in symptom_cols if col in df.columns]
+    for col in vitals:
+        if df[col].dtype != VITAL_DTYPE:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(VITAL_DTYPE)
+    for col in symptoms:
+        if df[col].dtype != SYMPTOM_DTYPE:
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(SYMPTOM_DTYPE)
+    if "disease" in df.columns and not isinstance(df["disease"].dtype, pd.CategoricalDtype):
+        df["disease"] = df["disease"].astype("category")
+    return df
+
+
+def _read_typed_csv(path, **kwargs):
+    import pandas as pd
+
+    # Parse straight into the narrow types; symptoms as float32 first since
+    # a missing flag is NaN. Values that do not parse fall back to coercion.
+    dtypes = {**schema_dtypes, **{col: "float32" for col in symptom_cols}}
+    try:
+        return pd.read_csv(path, dtype=dtypes, **kwargs)
+    except (ValueError, TypeError):
+        return pd.read_csv(path, **kwargs)
+
+
+def read_patients(path, columns=None):
+    """Whole patient table (CSV, JSONL, Parquet or Arrow) with the declared schema"""
+    import pandas as pd
+
+    lower = str(path).lower()
+    if lower.endswith(PARQUET_EXTENSIONS):
+        import pyarrow.parquet as pq
+        df = pq.read_table(path, columns=columns, memory_map=True,
+                           read_dictionary=["disease"] if columns is None or "disease" in columns else None
+                           ).to_pandas()
+    elif lower.endswith(ARROW_EXTENSIONS):
+        import pyarrow as pa
+        with pa.memory_map(str(path)) as source:
+            table = pa.ipc.open_file(source).read_all()
+            df = (table.select(columns) if columns else table).to_pandas()
+    elif is_jsonl(path):
+        df = pd.read_json(path, lines=True)
+        df = df[columns] if columns else df
+    else:
+        df = _read_typed_csv(path, usecols=columns)
+    return apply_schema(df)
+
+
+def iter_patient_chunks(path, chunksize=50_000):
+    """Yield DataFrames of at most `chunksize` patients from a CSV, JSONL,
+    Parquet or Arrow file, every one with the declared schema"""
+    import pandas as pd
+
+    lower = str(path).lower()
+    if lower.endswith(PARQUET_EXTENSIONS):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path, memory_map=True).iter_batches(batch_size=chunksize):
+            yield apply_schema(batch.to_pandas())
+        return
+    if lower.endswith(ARROW_EXTENSIONS):
+        import pyarrow as pa
+        with pa.memory_map(str(path)) as source:
+            table = pa.ipc.open_file(source).read_all()   # zero-copy view of the file
+            for start in range(0, table.num_rows, chunksize):
+                yield apply_schema(table.slice(start, chunksize).to_pandas())
+        return
+
+    if is_jsonl(path):
+        reader = pd.read_json(path, lines=True, chunksize=chunksize)
+    else:
+        reader = pd.read_csv(path, chunksize=chunksize)
+
+    with reader:
+        for chunk in reader:
+            yield apply_schema(chunk)
+
+
+def prepare_features(chunk):
+    """Return the model input columns of a chunk with clean types.
+
+    Vitals that are missing or not numeric become NaN (the same as a vital
+    left out in mdp.py), symptom flags default to 0.
+    """
+    import pandas as pd
+
+    missing = [col for col in feature_cols if col not in chunk.columns]
+    if missing:
+        raise ValueError(f"Missing column(s) in input: {', '.join(missing)}")
+
+    X = chunk[feature_cols].copy()
+    X[numeric_cols] = X[numeric_cols].apply(pd.to_numeric, errors='coerce')
+    X[symptom_cols] = X[symptom_cols].fillna(0).astype(int)
+    return X
+
+
+def clean_chunk(df):
+    """Apply the training cleaning rules to a DataFrame (or one chunk of it).
+
+    Numeric columns are coerced to numbers, missing symptom flags become 0
+    and any row that still has a missing value is dropped. Returns (X, y).
+    """
+    import pandas as pd
+
+    missing = [col for col in feature_cols + ["disease"] if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing column in CSV: {', '.join(missing)}")
+
+    df = df[feature_cols + ["disease"]].copy()
+    df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, errors='coerce')
+    df[symptom_cols] = df[symptom_cols].fillna(0).astype(SYMPTOM_DTYPE)
+    df.dropna(inplace=True)
+
+    X = df[feature_cols]
+    if isinstance(df["disease"].dtype, pd.CategoricalDtype):
+        y = df["disease"].cat.remove_unused_categories()   # stays categorical
+    else:
+        y = df["disease"].astype(str)
+    return X, y
+
+
+# -------------------------------------------------------
+# ONE-TIME CONVERSION TO A COLUMNAR FILE
+# -------------------------------------------------------
+
+def to_columnar(src, dest, chunksize=200_000):
+    """Convert a CSV/JSONL patient file to Parquet or Arrow IPC chunk by chunk.
+
+    Returns the number of rows written. The disease label is stored as a
+    string column. Parquet dictionary-encodes it on disk, and the loaders
+    turn it back into a category.
+    """
+    rows = write_columnar(iter_patient_chunks(src, chunksize), dest)
+    if not rows:
+        raise ValueError(f"{src} has no rows")
+    return rows
+
+
+def write_columnar(chunks, dest):
+    """Write DataFrames (patient table chunks) one after another to a
+    Parquet or Arrow IPC file with the declared schema. Returns the rows."""
+    import pyarrow as pa
+
+    if not str(dest).lower().endswith(PARQUET_EXTENSIONS + ARROW_EXTENSIONS):
+        raise ValueError(f"Unknown columnar format for {dest} (use .parquet or .arrow)")
+    parquet = str(dest).lower().endswith(PARQUET_EXTENSIONS)
+
+    writer = schema = None
+    rows = 0
+    try:
+        for chunk in chunks:
+            chunk = apply_schema(chunk)
+            if "disease" in chunk.columns:
+                chunk["disease"] = chunk["disease"].astype(object)   # missing stays null
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                if parquet:
+                    import pyarrow.parquet as pq
+                    writer = pq.ParquetWriter(dest, schema, compression="snappy")
+                else:
+                    # Uncompressed so readers can memory-map it without copying
+                    writer = pa.ipc.new_file(dest, schema)
+            writer.write_table(table.cast(schema))
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
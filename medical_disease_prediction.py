@@ -9,10 +9,15 @@ from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
-from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report
 import joblib
 import os
+import time
+
+from artifact_cache import (manifest_key, stale_reasons, atomic_dump, write_manifest, load_manifest,
+                            MODEL_MANIFEST)
+from medical_data import read_patients
+from estimators import make_estimator, measure, print_report
 
 # -------------------------------------------------------
 # 1) LOAD DATASET (CSV must have correct columns)
@@ -27,8 +32,6 @@ if not os.path.exists(DATA_FILE):
     print("age, blood_sugar, cholesterol, thyroid_tsh, wbc, rbc, platelets, systolic_bp, diastolic_bp, cough, fever, headache, chest_pain, vomiting, dizziness, fatigue, shortness_of_breath, sore_throat, runny_nose, disease\n")
     exit()
 
-df = pd.read_csv(DATA_FILE)
-
 # Columns
 numeric_cols = [
     "age","blood_sugar","cholesterol","thyroid_tsh","wbc","rbc",
@@ -40,64 +43,109 @@ symptom_cols = [
     "dizziness","fatigue","shortness_of_breath","sore_throat","runny_nose"
 ]
 
-required = numeric_cols + symptom_cols + ["disease"]
-
-for col in required:
-    if col not in df.columns:
-        print(f"❌ Missing column in CSV: {col}")
-        exit()
-
-# clean types
-df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, errors='coerce')
-df[symptom_cols] = df[symptom_cols].fillna(0).astype(int)
-df.dropna(inplace=True)
-
-X = df[numeric_cols + symptom_cols]
-y = df["disease"].astype(str)
+MODEL_PARAMS = {"n_estimators": 200, "random_state": 42}
+# random_forest, extra_trees or hist_gb (see estimators.py, which also
+# compares their accuracy and speed)
+ESTIMATOR = os.environ.get("ESTIMATOR", "random_forest")
+# MEASURE=1 also reports size / load time / latency of the trained model
+# (a few extra seconds, the same figures as `python estimators.py DATA_FILE`)
+MEASURE = os.environ.get("MEASURE") == "1"
+TEST_SIZE = 0.2
 
 # -------------------------------------------------------
-# 2) LABEL ENCODER
+# REUSE THE SAVED MODEL IF NOTHING IT DEPENDS ON CHANGED
 # -------------------------------------------------------
-le = LabelEncoder()
-y_encoded = le.fit_transform(y)
+MANIFEST_FILE = MODEL_MANIFEST
+ARTIFACTS = ("model.joblib", "label_encoder.joblib")
 
-# -------------------------------------------------------
-# 3) TRAIN / TEST SPLIT
-# -------------------------------------------------------
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y_encoded, test_size=0.2, random_state=42, stratify=y_encoded
+cache_key = manifest_key(
+    inputs=[DATA_FILE],
+    feature_cols=numeric_cols + symptom_cols,
+    params={**MODEL_PARAMS, "estimator": ESTIMATOR, "test_size": TEST_SIZE},
 )
-
-# -------------------------------------------------------
-# 4) PREPROCESSING + MODEL PIPELINE
-# -------------------------------------------------------
-preprocess = ColumnTransformer([
-    ("scale", StandardScaler(), numeric_cols)  # symptoms are 0/1 already
-], remainder="passthrough")
-
-model = Pipeline([
-    ("pre", preprocess),
-    ("clf", RandomForestClassifier(n_estimators=200, random_state=42))
-])
-
-# -------------------------------------------------------
-# 5) TRAIN MODEL
-# -------------------------------------------------------
-print("\n⏳ Training model...")
-model.fit(X_train, y_train)
-
-# Evaluate
-preds = model.predict(X_test)
-acc = accuracy_score(y_test, preds)
-print(f"\n✅ Model trained successfully! Accuracy = {acc:.3f}")
-print("\nClassification Report:\n")
-print(classification_report(y_test, preds, target_names=le.classes_))
-
-# Save model
-joblib.dump(model, "model.joblib")
-joblib.dump(le, "label_encoder.joblib")
-print("\n💾 Model saved as model.joblib")
-print("💾 Label encoder saved as label_encoder.joblib")
+stale = stale_reasons(MANIFEST_FILE, cache_key, ARTIFACTS)
+
+# tune_model.py / stream_train.py / estimators.py record the model they
+# saved with other parameters: keep it if it was built from this dataset
+producer = (load_manifest(MANIFEST_FILE) or {}).get("producer")
+if producer and stale == ["params changed"]:
+    print(f"\n✅ model.joblib was built by {producer} from this dataset: reusing it "
+          f"(delete {MANIFEST_FILE} to retrain with MODEL_PARAMS)")
+    stale = []
+elif not stale:
+    print("\n✅ Dataset, features, parameters and libraries unchanged: reusing model.joblib")
+else:
+    print(f"\n⚙️  Retraining: {'; '.join(stale)}")
+
+    # Typed load: float32 vitals, int8 symptoms, categorical disease. DATA_FILE
+    # can also be a .parquet / .arrow copy made with convert_dataset.py
+    df = read_patients(DATA_FILE)
+
+    required = numeric_cols + symptom_cols + ["disease"]
+
+    for col in required:
+        if col not in df.columns:
+            print(f"❌ Missing column in CSV: {col}")
+            exit()
+
+    # clean types
+    df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, errors='coerce')
+    df[symptom_cols] = df[symptom_cols].fillna(0).astype("int8")
+    df.dropna(inplace=True)
+
+    X = df[numeric_cols + symptom_cols]
+    y = df["disease"].astype(str)
+
+    # -------------------------------------------------------
+    # 2) LABEL ENCODER
+    # -------------------------------------------------------
+    le = LabelEncoder()
+    y_encoded = le.fit_transform(y)
+
+    # -------------------------------------------------------
+    # 3) TRAIN / TEST SPLIT
+    # -------------------------------------------------------
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y_encoded, test_size=TEST_SIZE, random_state=42, stratify=y_encoded
+    )
+
+    # -------------------------------------------------------
+    # 4) PREPROCESSING + MODEL PIPELINE
+    # -------------------------------------------------------
+    preprocess = ColumnTransformer([
+        ("scale", StandardScaler(), numeric_cols)  # symptoms are 0/1 already
+    ], remainder="passthrough")
+
+    model = Pipeline([
+        ("pre", preprocess),
+        ("clf", make_estimator(ESTIMATOR, **MODEL_PARAMS))
+    ])
+
+    # -------------------------------------------------------
+    # 5) TRAIN MODEL
+    # -------------------------------------------------------
+    print(f"\n⏳ Training model ({ESTIMATOR})...")
+    fit_start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_s = time.perf_counter() - fit_start
+
+    # Evaluate
+    preds = model.predict(X_test)
+    acc = accuracy_score(y_test, preds)
+    print(f"\n✅ Model trained successfully! Accuracy = {acc:.3f}")
+    print("\nClassification Report:\n")
+    print(classification_report(y_test, preds, target_names=le.classes_))
+
+    # Size / load time / latency, comparable with `python estimators.py DATA_FILE`
+    if MEASURE:
+        print_report([{"estimator": ESTIMATOR, "fit_s": fit_s, **measure(model, X_test, y_test)}])
+
+    # Save model (atomically) + the manifest describing what it was built from
+    atomic_dump(model, "model.joblib")
+    atomic_dump(le, "label_encoder.joblib")
+    write_manifest(MANIFEST_FILE, cache_key, ARTIFACTS)
+    print("\n💾 Model saved as model.joblib")
+    print("💾 Label encoder saved as label_encoder.joblib")
 
 # -------------------------------------------------------
 # 6) USER INPUT PREDICTION
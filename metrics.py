@@ -0,0 +1,299 @@
+# metrics.py
+# -------------------------------------------------------
+# PER-STAGE TIMING, COUNTERS AND HISTOGRAMS (PROMETHEUS TEXT / JSON)
+# -------------------------------------------------------
+#
+# Usage:
+#   from metrics import stage, count, registry
+#
+#   with stage("predict_proba"):
+#       probabilities = model.predict_proba(user_df)
+#   count("predictions_total")
+#
+#   print(registry.to_prometheus())   # or registry.to_json()
+#
+# Every stage() block adds its duration to the histogram
+# stage_duration_seconds{stage="..."}. A block that raises is also counted
+# in stage_errors_total. Metrics are on by default. METRICS_ENABLED=0 (or
+# disable()) turns them off: stage() then returns one shared no-op
+# context manager, so an instrumented call costs a function call and a
+# flag check.
+#
+# Sampling profiler: with METRICS_PROFILE_EVERY=N, every Nth
+# profile_request() block runs under cProfile. The stats are written to
+# METRICS_PROFILE_DIR (default "profiles/") as .prof files; open them with
+# `python -m pstats` or snakeviz.
+#
+# dump_metrics() writes the registry to METRICS_OUT (.prom or .json) when
+# that variable is set, so scripts can export their timings on exit.
+
+import bisect
+import json
+import os
+import threading
+import time
+
+# Seconds; from 50 µs for scaling a row up to 10 s for a cold model load
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _number(value):
+    return "+Inf" if value == float("inf") else repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """Fixed upper-bound buckets, plus the sum and count of all observations"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def cumulative(self):
+        """[(upper bound, observations <= bound)] including +Inf"""
+        total, out = 0, []
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            total += n
+            out.append((bound, total))
+        return out
+
+
+class Registry:
+    """Named counters and histograms, keyed by metric name + labels"""
+
+    def __init__(self):
+        self._metrics = {}   # name -> (kind, help, {labels: metric})
+        self._lock = threading.Lock()
+
+    def _get(self, kind, name, help_text, labels, factory):
+        key = tuple(sorted(labels.items()))
+        family = self._metrics.get(name)
+        if family is None or key not in family[2]:
+            with self._lock:
+                family = self._metrics.setdefault(name, (kind, help_text, {}))
+                if family[0] != kind:
+                    raise ValueError(f"Metric {name!r} is already registered as a {family[0]}")
+                family[2].setdefault(key, factory())
+        return family[2][key]
+
+    def counter(self, name, help_text="", **labels):
+        return self._get("counter", name, help_text, labels, Counter)
+
+    def histogram(self, name, help_text="", buckets=DEFAULT_BUCKETS, **labels):
+        return self._get("histogram", name, help_text, labels, lambda: Histogram(buckets))
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+
+    def to_prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for name, (kind, help_text, series) in sorted(self._metrics.items()):
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, metric in sorted(series.items()):
+                if kind == "counter":
+                    lines.append(f"{name}{_label_text(labels)} {_number(metric.value)}")
+                    continue
+                for bound, n in metric.cumulative():
+                    lines.append(f"{name}_bucket{_label_text(labels, [('le', _number(bound))])} {n}")
+                lines.append(f"{name}_sum{_label_text(labels)} {_number(metric.sum)}")
+                lines.append(f"{name}_count{_label_text(labels)} {metric.count}")
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self):
+        out = {}
+        for name, (kind, _, series) in sorted(self._metrics.items()):
+            rows = []
+            for labels, metric in sorted(series.items()):
+                row = {"labels": dict(labels)}
+                if kind == "counter":
+                    row["value"] = metric.value
+                else:
+                    row.update(count=metric.count, sum=metric.sum,
+                               mean=metric.sum / metric.count if metric.count else None,
+                               buckets={_number(b): n for b, n in metric.cumulative()})
+                rows.append(row)
+            out[name] = {"type": kind, "series": rows}
+        return out
+
+    def to_json(self, indent=2):
+        return json.dumps(self.to_dict(), indent=indent)
+
+
+registry = Registry()
+
+_enabled = os.environ.get("METRICS_ENABLED", "1").lower() not in ("0", "false", "no", "off")
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+# =====================================================
+# STAGES
+# =====================================================
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("name", "_start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._start
+        registry.histogram("stage_duration_seconds", "Time spent in each named stage",
+                           stage=self.name).observe(elapsed)
+        if exc_type is not None:
+            registry.counter("stage_errors_total", "Stages that raised an exception",
+                             stage=self.name).inc()
+        return False
+
+
+def stage(name):
+    """Context manager timing one named stage (no-op while disabled)"""
+    return _Stage(name) if _enabled else _NULL_STAGE
+
+
+def count(name, amount=1, help_text="", **labels):
+    if _enabled:
+        registry.counter(name, help_text, **labels).inc(amount)
+
+
+# =====================================================
+# SAMPLING PROFILER
+# =====================================================
+
+class ProfileSampler:
+    """Run every `every`-th request under cProfile and save its stats"""
+
+    def __init__(self, every=100, out_dir="profiles"):
+        if every < 1:
+            raise ValueError("every must be >= 1")
+        self.every = every
+        self.out_dir = out_dir
+        self.last_path = None
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    def _should_sample(self):
+        with self._lock:
+            self._calls += 1
+            return self._calls % self.every == 0
+
+    def __call__(self, name="request"):
+        """Context manager: profiles this block if it is a sampled one"""
+        if not self._should_sample():
+            return _NULL_STAGE
+        return _Profiled(self, name)
+
+
+class _Profiled:
+    def __init__(self, sampler, name):
+        import cProfile
+        self.sampler = sampler
+        self.name = name
+        self.profile = cProfile.Profile()
+
+    def __enter__(self):
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.profile.disable()
+        os.makedirs(self.sampler.out_dir, exist_ok=True)
+        path = os.path.join(self.sampler.out_dir,
+                            f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self.sampler._calls}.prof")
+        self.profile.dump_stats(path)
+        self.sampler.last_path = path
+        count("profiles_captured_total", help_text="Requests captured by the sampling profiler")
+        return False
+
+
+_sampler = None
+if os.environ.get("METRICS_PROFILE_EVERY"):
+    _sampler = ProfileSampler(int(os.environ["METRICS_PROFILE_EVERY"]),
+                              os.environ.get("METRICS_PROFILE_DIR", "profiles"))
+
+
+def set_profiler(sampler):
+    """Install a ProfileSampler (or None to stop profiling)"""
+    global _sampler
+    _sampler = sampler
+
+
+def profile_request(name="request"):
+    """Profile this block if a sampler is installed and picks it"""
+    return _NULL_STAGE if _sampler is None else _sampler(name)
+
+
+# =====================================================
+# EXPORT
+# =====================================================
+
+def dump_metrics(path=None):
+    """Write the registry to `path` or $METRICS_OUT: .json, else Prometheus text"""
+    path = path or os.environ.get("METRICS_OUT")
+    if not path:
+        return None
+    text = registry.to_json() if path.endswith(".json") else registry.to_prometheus()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
@@ -0,0 +1,270 @@
+# pool_predict.py
+# -------------------------------------------------------
+# MULTI-PROCESS SCORING WITH ONE SHARED, MEMORY-MAPPED FOREST
+# -------------------------------------------------------
+#
+# Usage:
+#   python pool_predict.py patients.csv predictions.csv --workers 8
+#   python pool_predict.py patients.csv predictions.csv --workers 8 --compare
+#
+# Every worker of a plain process pool does its own joblib.load of
+# model.joblib, so the forest is held in memory once per worker. sklearn's
+# trees copy their arrays on unpickling, so joblib's own mmap_mode does not
+# help. Here the forest is compiled once (forest_compile.py) into a
+# directory of .npy files, and every worker memory-maps that directory
+# read-only. All workers read the same pages from the page cache, so there
+# is one physical copy of the forest no matter how many workers run.
+# Workers are spawned fresh and never import pandas or sklearn.
+#
+# --compare runs the same file through a pool of joblib.load workers too,
+# and prints the RSS / PSS / private memory of every worker for both modes.
+# PSS splits shared pages between the processes that map them, so the PSS
+# column is the fair per-worker cost.
+
+import argparse
+import collections
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from forest_compile import CompiledForest, is_stale, scaling_dtype
+from resource_usage import memory_breakdown_mb, format_mb
+
+
+# =====================================================
+# WORKER SIDE
+# =====================================================
+
+_worker = {}
+
+
+def _init_worker(mode, model_path, encoder_path):
+    if mode == "mmap":
+        model = CompiledForest.load(model_path, mmap_mode="r")
+        _worker["labels"] = np.asarray(model.classes)
+    else:
+        # The current approach: a private copy of the sklearn pipeline per worker
+        import joblib
+        import pandas as pd
+        from medical_data import feature_cols
+
+        model = joblib.load(model_path)
+        _worker["labels"] = joblib.load(encoder_path).inverse_transform(model.classes_)
+        _worker["to_frame"] = lambda X: pd.DataFrame(X, columns=feature_cols)
+    _worker["model"] = model
+
+
+def _labels():
+    return _worker["labels"]
+
+
+def _score(X):
+    if "to_frame" in _worker:
+        X = _worker["to_frame"](X)
+    return _worker["model"].predict_proba(X)
+
+
+def _probe(delay):
+    # The sleep keeps this worker busy so the other probes reach other workers
+    time.sleep(delay)
+    return os.getpid(), memory_breakdown_mb()
+
+
+# =====================================================
+# POOL
+# =====================================================
+
+def ensure_model_dir(path, model_path="model.joblib", encoder_path="label_encoder.joblib"):
+    """Create the memory-mappable model directory from model.joblib if it
+    is missing or older than the model.
+
+    Raises ValueError if the model is not a random forest / extra trees.
+    """
+    if os.path.isdir(path) and not is_stale(path, model_path, encoder_path):
+        return path
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Neither {path} nor {model_path} exists. Train a model first.")
+
+    import joblib
+    from forest_compile import compile_pipeline
+
+    if os.path.isdir(path):
+        print(f"⚙️  {model_path} is newer than {path}/, recompiling...")
+    else:
+        print(f"⚙️  Compiling {model_path} into {path}/ (one-time)...")
+    compile_pipeline(joblib.load(model_path), joblib.load(encoder_path)).replace_dir(path)
+    return path
+
+
+class ScoringPool:
+    """A fixed pool of worker processes serving predict_proba.
+
+    mode="mmap" shares one memory-mapped CompiledForest (model_path is a
+    directory written by CompiledForest.save_dir); mode="joblib" loads
+    model_path / encoder_path in every worker. Rows are raw feature arrays
+    in medical_data.feature_cols order; float32 arrays are scaled in float32
+    like the pipeline does with float32 vitals, anything else in float64.
+    """
+
+    def __init__(self, model_path, workers=None, mode="mmap", encoder_path="label_encoder.joblib"):
+        if mode not in ("mmap", "joblib"):
+            raise ValueError(f"Unknown pool mode: {mode}")
+        self.mode = mode
+        self.workers = workers or os.cpu_count()
+        start = time.perf_counter()
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker, initargs=(mode, model_path, encoder_path))
+        self.worker_memory()  # start every worker now rather than on first use
+        self.labels = self._pool.submit(_labels).result()
+        self.startup_s = time.perf_counter() - start
+
+    def submit(self, X):
+        """Score one request asynchronously; returns a Future of probabilities"""
+        X = np.asarray(X)
+        return self._pool.submit(_score, X if X.dtype == np.float32 else X.astype(np.float64))
+
+    def predict_proba(self, X, min_rows=1024):
+        """Score a batch, split across the workers"""
+        X = np.asarray(X)
+        pieces = max(1, min(self.workers, len(X) // min_rows))
+        futures = [self.submit(part) for part in np.array_split(X, pieces)]
+        return np.concatenate([f.result() for f in futures])
+
+    def worker_memory(self, delay=0.05):
+        """{pid: memory_breakdown_mb()} for every worker"""
+        memory = {}
+        for _ in range(5):
+            futures = [self._pool.submit(_probe, delay) for _ in range(self.workers)]
+            for future in futures:
+                pid, usage = future.result()
+                memory[pid] = usage
+            if len(memory) >= self.workers:
+                break
+        return memory
+
+    def close(self):
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def pool_batch_predict(pool, input_path, output_path, k=3, chunksize=10_000, id_col=None):
+    """Stream input_path through the pool into output_path, keeping row order.
+
+    Returns the number of rows scored.
+    """
+    from batch_predict import predictions_frame
+    from medical_data import iter_patient_chunks, prepare_features, is_jsonl, numeric_cols
+
+    jsonl = is_jsonl(output_path)
+    pending = collections.deque()
+    rows = 0
+
+    def write_oldest(f):
+        nonlocal rows
+        chunk, future = pending.popleft()
+        out = predictions_frame(future.result(), pool.labels, chunk, k, id_col)
+        if jsonl:
+            if len(out):
+                f.write(out.to_json(orient="records", lines=True).rstrip("\n") + "\n")
+        else:
+            out.to_csv(f, index=False, header=(rows == 0))
+        rows += len(out)
+
+    with open(output_path, "w", newline="", encoding="utf-8") as f:
+        for chunk in iter_patient_chunks(input_path, chunksize):
+            X = prepare_features(chunk)
+            X = X.to_numpy(dtype=scaling_dtype(X, numeric_cols))
+            pending.append((chunk, pool.submit(X)))
+            # Bounded read-ahead: at most two chunks in flight per worker
+            if len(pending) >= 2 * pool.workers:
+                write_oldest(f)
+        while pending:
+            write_oldest(f)
+
+    return rows
+
+
+# =====================================================
+# COMMAND LINE
+# =====================================================
+
+def print_memory_report(title, pool, elapsed, rows):
+    memory = pool.worker_memory()
+    print(f"\n📊 {title}: {pool.workers} workers, started in {pool.startup_s:.2f}s, "
+          f"{rows:,} rows in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/sec)")
+    print(f"   {'pid':>8}  {'RSS':>12}  {'PSS':>12}  {'private':>12}")
+    totals = collections.Counter()
+    for pid, usage in sorted(memory.items()):
+        usage = usage or {}
+        totals.update(usage)
+        print(f"   {pid:>8}  {format_mb(usage.get('rss')):>12}  {format_mb(usage.get('pss')):>12}  "
+              f"{format_mb(usage.get('private')):>12}")
+    if totals:
+        print(f"   {'total':>8}  {format_mb(totals['rss']):>12}  {format_mb(totals['pss']):>12}  "
+              f"{format_mb(totals['private']):>12}")
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score patients on a pool of workers sharing one model")
+    parser.add_argument("input", help="CSV or JSONL file with the medical_dataset.csv columns")
+    parser.add_argument("output", help="where to write predictions (.csv or .jsonl)")
+    parser.add_argument("--workers", type=int, default=None, help="default: all cores")
+    parser.add_argument("--model-dir", default="model_compiled",
+                        help="memory-mappable model directory (created from --model if missing)")
+    parser.add_argument("--model", default="model.joblib")
+    parser.add_argument("--encoder", default="label_encoder.joblib")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--id-col", default=None, help="input column copied to the output (e.g. patient_id)")
+    parser.add_argument("--compare", action="store_true",
+                        help="also run a joblib.load-per-worker pool and compare memory")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        print(f"❌ ERROR: {args.input} NOT FOUND.")
+        return 1
+
+    try:
+        model_dir = ensure_model_dir(args.model_dir, args.model, args.encoder)
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        return 1
+    except ValueError as e:  # not a forest, e.g. ESTIMATOR=hist_gb or stream_train.py
+        print(f"❌ Cannot compile {args.model}: {e}. Use batch_predict.py for this model.")
+        return 1
+
+    runs = [("joblib", args.model)] if args.compare else []
+    runs.append(("mmap", model_dir))
+    totals = {}
+    for mode, model_path in runs:
+        print(f"\n⏳ Scoring {args.input} on a '{mode}' pool...")
+        with ScoringPool(model_path, args.workers, mode, args.encoder) as pool:
+            start = time.perf_counter()
+            try:
+                rows = pool_batch_predict(pool, args.input, args.output, args.top_k,
+                                          args.chunk_size, args.id_col)
+            except ValueError as e:
+                print(f"❌ {e}")
+                return 1
+            totals[mode] = print_memory_report(mode, pool, time.perf_counter() - start, rows)
+
+    if args.compare and totals["joblib"] and totals["mmap"]:
+        print(f"\n✅ Total worker PSS: {format_mb(totals['joblib']['pss'])} with joblib.load, "
+              f"{format_mb(totals['mmap']['pss'])} with the shared memory-mapped forest")
+    print(f"💾 Predictions saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+# predict_cli.py
+# -------------------------------------------------------
+# FAST-STARTUP ONE-SHOT DISEASE PREDICTION (FOR SHELL SCRIPTS / CRON)
+# -------------------------------------------------------
+#
+# Usage:
+#   python predict_cli.py --vitals "age: 45, blood_sugar: 180" --symptoms "fever and cough"
+#   python predict_cli.py --features '{"age": 45, "fever": 1}' --json
+#
+# Only NumPy is imported on the prediction path: the forest is read from
+# the compiled artifact written by forest_compile.py (model_compiled.npz).
+# If that file does not exist yet, or model.joblib / label_encoder.joblib
+# are newer than it (a retrain, tune_model.py, stream_train.py, ...), they
+# are compiled (the only time joblib/sklearn get imported) and the artifact
+# is saved for the next run. pandas is never imported.
+#
+# See benchmarks/importtime.py for the -X importtime breakdown.
+
+import argparse
+import json
+import os
+import sys
+
+from forest_compile import CompiledForest, is_stale
+from medical_data import feature_cols, parse_vitals_text, parse_symptoms_text
+
+
+def load_compiled(path, model_path="model.joblib", encoder_path="label_encoder.joblib"):
+    """Load the compiled forest, (re)compiling it from the joblib model on
+    first use and whenever the model is newer.
+
+    Raises ValueError if the model is not a random forest / extra trees.
+    """
+    if not is_stale(path, model_path, encoder_path):
+        return CompiledForest.load(path)
+
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Neither {path} nor {model_path} exists. Train a model first.")
+
+    # Training-only dependencies, needed once per model to build the artifact
+    import joblib
+    from artifact_cache import atomic_write
+    from forest_compile import compile_pipeline
+
+    if os.path.exists(path):
+        print(f"⚙️  {model_path} is newer than {path}, recompiling...", file=sys.stderr)
+    else:
+        print(f"⚙️  {path} not found, compiling {model_path} (one-time)...", file=sys.stderr)
+    compiled = compile_pipeline(joblib.load(model_path), joblib.load(encoder_path))
+    atomic_write(path, compiled.save)
+    return compiled
+
+
+def top_predictions(compiled, features, k=3, min_probability=0.05):
+    """Top-k diseases above min_probability, in predict_disease's format"""
+    probabilities = compiled.predict_proba(features)[0]
+    results = []
+    for idx in probabilities.argsort()[::-1][:k]:
+        if probabilities[idx] > min_probability:
+            results.append({
+                'disease': str(compiled.classes[idx]),
+                'probability': float(probabilities[idx] * 100)
+            })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="One-shot disease prediction")
+    parser.add_argument("--vitals", default="", help='e.g. "age: 45, blood_sugar: 110"')
+    parser.add_argument("--symptoms", default="", help='e.g. "fever, cough and headache"')
+    parser.add_argument("--features", default=None,
+                        help="JSON object of feature values instead of free text")
+    parser.add_argument("--model", default="model_compiled.npz")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    if args.features:
+        features = {col: float("nan") for col in feature_cols}
+        features.update({k: float(v) for k, v in json.loads(args.features).items()})
+    else:
+        features = {**parse_vitals_text(args.vitals), **parse_symptoms_text(args.symptoms)}
+
+    try:
+        compiled = load_compiled(args.model)
+    except FileNotFoundError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    except ValueError as e:  # not a forest, e.g. ESTIMATOR=hist_gb or stream_train.py
+        print(f"❌ Cannot compile model.joblib: {e}. Use mdp.py for this model.", file=sys.stderr)
+        return 1
+
+    results = top_predictions(compiled, features, args.top_k)
+
+    if args.json:
+        print(json.dumps(results))
+    elif results:
+        for i, result in enumerate(results, 1):
+            print(f"{i}. {result['disease']:<20} → {result['probability']:.1f}% probability")
+    else:
+        print("Unable to make a confident prediction with the given data.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+# resource_usage.py
+# -------------------------------------------------------
+# PROCESS MEMORY HELPERS (RSS IN MB)
+# -------------------------------------------------------
+
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None if unknown)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def current_rss_mb():
+    """Current resident set size of this process in MB (Linux only, else None)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def memory_breakdown_mb():
+    """RSS, PSS and private memory of this process in MB (Linux only, else None).
+
+    PSS splits every shared page between the processes mapping it, so the
+    PSS of a pool of workers adds up to what the pool really costs.
+    """
+    wanted = {"Rss": "rss", "Pss": "pss", "Private_Clean": "private", "Private_Dirty": "private"}
+    usage = {"rss": 0.0, "pss": 0.0, "private": 0.0}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key = line.split(":")[0]
+                if key in wanted:
+                    usage[wanted[key]] += int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return usage
+
+
+def format_mb(value):
+    return "n/a" if value is None else f"{value:,.1f} MB"
@@ -0,0 +1,152 @@
+# stream_train.py
+# -------------------------------------------------------
+# OUT-OF-CORE TRAINING ON LARGE medical_dataset.csv FILES
+# -------------------------------------------------------
+#
+# Usage:
+#   python stream_train.py medical_dataset.csv --chunk-size 100000 --epochs 2
+#
+# The CSV is never loaded as a whole. Pass 1 reads it chunk by chunk to
+# collect the disease labels and fit the StandardScaler incrementally.
+# Pass 2 (repeated for each epoch) trains an SGD logistic-regression
+# classifier with partial_fit. Every chunk is cleaned with the same rules
+# as medical_disease_prediction.py.
+#
+# Accuracy is measured prequentially: each chunk is scored before the model
+# trains on it. Peak RSS and rows/sec are printed so you can check that
+# memory stays flat as the file grows.
+#
+# The model is recorded in model_manifest.json (artifact_cache.py), so
+# medical_disease_prediction.py keeps it instead of retraining.
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler, LabelEncoder
+
+from artifact_cache import manifest_key, manifest_next_to, save_artifacts
+from medical_data import numeric_cols, feature_cols, iter_patient_chunks, clean_chunk
+from resource_usage import peak_rss_mb, format_mb
+
+
+def _report(stage, rows, elapsed):
+    print(f"   {stage}: {rows:,} rows in {elapsed:.2f}s "
+          f"({rows / max(elapsed, 1e-9):,.0f} rows/sec), peak RSS {format_mb(peak_rss_mb())}")
+
+
+def fit_preprocessing(path, chunksize):
+    """Pass 1: label set + incrementally fitted scaler. Returns (pre, le, rows)."""
+    pre = None
+    labels = set()
+    rows = 0
+    for chunk in iter_patient_chunks(path, chunksize):
+        X, y = clean_chunk(chunk)
+        if X.empty:
+            continue
+        if pre is None:
+            pre = ColumnTransformer([
+                ("scale", StandardScaler(), numeric_cols)  # symptoms are 0/1 already
+            ], remainder="passthrough")
+            pre.fit(X)
+        else:
+            pre.named_transformers_["scale"].partial_fit(X[numeric_cols])
+        labels.update(y.unique())
+        rows += len(X)
+
+    if pre is None:
+        raise ValueError("No usable rows in the dataset after cleaning.")
+
+    le = LabelEncoder()
+    le.fit(sorted(labels))
+    return pre, le, rows
+
+
+def train_streaming(path, chunksize=100_000, epochs=1, alpha=1e-4, seed=42):
+    """Train a scaler + SGDClassifier pipeline without loading the whole CSV.
+
+    Returns (model, label_encoder, stats).
+    """
+    start = time.perf_counter()
+    pre, le, rows = fit_preprocessing(path, chunksize)
+    _report("pass 1 (labels + scaler)", rows, time.perf_counter() - start)
+
+    clf = SGDClassifier(loss="log_loss", alpha=alpha, random_state=seed)
+    classes = np.arange(len(le.classes_))
+    rng = np.random.default_rng(seed)
+
+    for epoch in range(1, epochs + 1):
+        epoch_start = time.perf_counter()
+        seen = correct = scored = 0
+        for chunk in iter_patient_chunks(path, chunksize):
+            X, y = clean_chunk(chunk)
+            if X.empty:
+                continue
+            Xt = pre.transform(X)
+            yt = le.transform(y)
+
+            # Prequential accuracy: score the chunk before learning from it
+            if seen:
+                correct += int((clf.predict(Xt) == yt).sum())
+                scored += len(yt)
+
+            order = rng.permutation(len(yt))
+            clf.partial_fit(Xt[order], yt[order], classes=classes)
+            seen += len(yt)
+
+        _report(f"epoch {epoch}", seen, time.perf_counter() - epoch_start)
+        if scored:
+            print(f"   epoch {epoch} prequential accuracy = {correct / scored:.3f}")
+
+    model = Pipeline([("pre", pre), ("clf", clf)])
+    elapsed = time.perf_counter() - start
+    stats = {
+        "rows": rows,
+        "seconds": elapsed,
+        "rows_per_sec": rows * (epochs + 1) / max(elapsed, 1e-9),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    return model, le, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train on a large CSV in chunks")
+    parser.add_argument("data", help="CSV/JSONL with the medical_dataset.csv columns")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--alpha", type=float, default=1e-4, help="SGD regularisation strength")
+    parser.add_argument("--model", default="model.joblib")
+    parser.add_argument("--encoder", default="label_encoder.joblib")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.data):
+        print(f"\n❌ ERROR: {args.data} NOT FOUND.")
+        return 1
+
+    print(f"\n⏳ Streaming training on {args.data} (chunks of {args.chunk_size:,} rows)...")
+    try:
+        model, le, stats = train_streaming(args.data, args.chunk_size, args.epochs, args.alpha)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(f"\n✅ Model trained on {stats['rows']:,} rows in {stats['seconds']:.2f}s "
+          f"({stats['rows_per_sec']:,.0f} rows/sec over all passes)")
+    print(f"   Peak RSS: {format_mb(stats['peak_rss_mb'])}")
+
+    key = manifest_key(inputs=[args.data], feature_cols=feature_cols,
+                       params={"estimator": "sgd_log_loss", "alpha": args.alpha, "epochs": args.epochs,
+                               "chunk_size": args.chunk_size})
+    save_artifacts({args.model: model, args.encoder: le}, manifest_next_to(args.model), key, "stream_train.py")
+    print(f"\n💾 Model saved as {args.model}")
+    print(f"💾 Label encoder saved as {args.encoder}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+# tune_model.py
+# -------------------------------------------------------
+# PARALLEL HYPERPARAMETER SWEEP WITH STRATIFIED K-FOLD CV
+# -------------------------------------------------------
+#
+# Usage:
+#   python tune_model.py medical_dataset.csv
+#   python tune_model.py medical_dataset.csv --n-estimators 100,200 --max-depth none,10 \
+#       --max-features sqrt,log2 --folds 5 --workers 8
+#   python tune_model.py medical_dataset.csv --estimator extra_trees
+#
+# Every (params, fold) pair runs as its own task on a process pool. The data
+# is cleaned and scaled once. The resulting arrays and fold indices are
+# saved to .npy files that every worker memory-maps, so a task only pickles
+# a few integers. Scaling once up front does not leak between folds for a
+# random forest (or extra trees, --estimator): a per-feature affine
+# transform does not change the splits.
+#
+# Prints a leaderboard of accuracy against fit and inference time, then
+# refits the best settings on all rows and saves model.joblib /
+# label_encoder.joblib, recorded in model_manifest.json (artifact_cache.py)
+# so medical_disease_prediction.py keeps the tuned model.
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from sklearn.compose import ColumnTransformer
+from sklearn.model_selection import StratifiedKFold
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler, LabelEncoder
+
+from artifact_cache import manifest_key, manifest_next_to, save_artifacts
+from medical_data import numeric_cols, feature_cols, clean_chunk, read_patients
+from estimators import make_estimator, FORESTS
+
+
+# =====================================================
+# WORKER SIDE
+# =====================================================
+
+_shared = {}
+
+
+def _init_worker(data_dir):
+    """Memory-map the preprocessed arrays once per worker process"""
+    _shared["X"] = np.load(os.path.join(data_dir, "X.npy"), mmap_mode="r")
+    _shared["y"] = np.load(os.path.join(data_dir, "y.npy"), mmap_mode="r")
+    _shared["folds"] = np.load(os.path.join(data_dir, "folds.npy"), mmap_mode="r")
+
+
+def _run_fold(param_idx, params, fold, seed, estimator="random_forest"):
+    """Fit one parameter set on one fold; returns timing and accuracy"""
+    X, y, folds = _shared["X"], _shared["y"], _shared["folds"]
+    test = folds == fold
+
+    clf = make_estimator(estimator, random_state=seed, n_jobs=1, **params)
+    start = time.perf_counter()
+    clf.fit(X[~test], y[~test])
+    fit_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    preds = clf.predict(X[test])
+    predict_s = time.perf_counter() - start
+
+    return {
+        "param_idx": param_idx,
+        "fold": fold,
+        "accuracy": float((preds == y[test]).mean()),
+        "fit_s": fit_s,
+        "predict_s": predict_s,
+        "n_test": int(test.sum()),
+    }
+
+
+# =====================================================
+# SWEEP
+# =====================================================
+
+def make_grid(n_estimators, max_depth, max_features):
+    keys = ("n_estimators", "max_depth", "max_features")
+    return [dict(zip(keys, combo)) for combo in itertools.product(n_estimators, max_depth, max_features)]
+
+
+def make_preprocess():
+    return ColumnTransformer([
+        ("scale", StandardScaler(), numeric_cols)  # symptoms are 0/1 already
+    ], remainder="passthrough")
+
+
+def run_sweep(X, y_encoded, grid, n_folds=5, workers=None, seed=42, estimator="random_forest"):
+    """Cross-validate every parameter set in `grid`; returns leaderboard rows"""
+    Xt = np.ascontiguousarray(make_preprocess().fit_transform(X), dtype=np.float32)
+
+    # One fold id per row, computed once and shared by every task
+    folds = np.empty(len(y_encoded), dtype=np.int8)
+    splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=seed)
+    for fold, (_, test_idx) in enumerate(splitter.split(Xt, y_encoded)):
+        folds[test_idx] = fold
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="tune_model_") as data_dir:
+        np.save(os.path.join(data_dir, "X.npy"), Xt)
+        np.save(os.path.join(data_dir, "y.npy"), np.asarray(y_encoded))
+        np.save(os.path.join(data_dir, "folds.npy"), folds)
+
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                                 initializer=_init_worker, initargs=(data_dir,)) as pool:
+            futures = [pool.submit(_run_fold, i, params, fold, seed, estimator)
+                       for i, params in enumerate(grid) for fold in range(n_folds)]
+            for done, future in enumerate(as_completed(futures), 1):
+                results.append(future.result())
+                print(f"\r   {done}/{len(futures)} fits done", end="", flush=True)
+        print()
+
+    leaderboard = []
+    for i, params in enumerate(grid):
+        rows = [r for r in results if r["param_idx"] == i]
+        acc = np.array([r["accuracy"] for r in rows])
+        n_test = sum(r["n_test"] for r in rows)
+        leaderboard.append({
+            **params,
+            "accuracy": float(acc.mean()),
+            "accuracy_std": float(acc.std()),
+            "fit_s": float(np.mean([r["fit_s"] for r in rows])),
+            "predict_us_per_row": 1e6 * sum(r["predict_s"] for r in rows) / max(n_test, 1),
+        })
+
+    leaderboard.sort(key=lambda r: (-r["accuracy"], r["fit_s"]))
+    return leaderboard
+
+
+def print_leaderboard(leaderboard, top=None):
+    print(f"\n{'rank':>4}  {'n_est':>5}  {'depth':>5}  {'features':>8}  "
+          f"{'accuracy':>14}  {'fit (s)':>8}  {'predict (µs/row)':>16}")
+    for rank, row in enumerate(leaderboard[:top], 1):
+        print(f"{rank:>4}  {row['n_estimators']:>5}  {str(row['max_depth']):>5}  "
+              f"{str(row['max_features']):>8}  {row['accuracy']:.3f} ± {row['accuracy_std']:.3f}  "
+              f"{row['fit_s']:>8.2f}  {row['predict_us_per_row']:>16.1f}")
+
+
+# =====================================================
+# COMMAND LINE
+# =====================================================
+
+def _parse_value(item):
+    """"none" -> None, "1" -> 1, "0.5" -> 0.5, anything else stays a string.
+    sklearn reads max_features=1 as one feature but 1.0 as all of them."""
+    if item.lower() == "none":
+        return None
+    for cast in (int, float):
+        try:
+            return cast(item)
+        except ValueError:
+            pass
+    return item    # e.g. max_features=sqrt
+
+
+def _parse_list(text):
+    return [_parse_value(item.strip()) for item in text.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grid search + k-fold CV for the disease model")
+    parser.add_argument("data", help="CSV/Parquet/Arrow file with the medical_dataset.csv columns")
+    parser.add_argument("--n-estimators", default="100,200,400")
+    parser.add_argument("--max-depth", default="none,10,20")
+    parser.add_argument("--max-features", default="sqrt,log2,none")
+    parser.add_argument("--estimator", choices=FORESTS, default="random_forest",
+                        help="forest to tune (estimators.py compares all model types)")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None, help="default: all cores")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--leaderboard", default=None, help="also save the leaderboard as JSON")
+    parser.add_argument("--model", default="model.joblib")
+    parser.add_argument("--encoder", default="label_encoder.joblib")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.data):
+        print(f"\n❌ ERROR: {args.data} NOT FOUND.")
+        return 1
+
+    try:
+        X, y = clean_chunk(read_patients(args.data))
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    if X.empty:
+        print("❌ No usable rows in the dataset after cleaning.")
+        return 1
+
+    le = LabelEncoder()
+    y_encoded = le.fit_transform(y)
+
+    grid = make_grid(_parse_list(args.n_estimators),
+                     _parse_list(args.max_depth),
+                     _parse_list(args.max_features))
+    print(f"\n⏳ {len(grid)} parameter sets × {args.folds} folds on {len(X):,} rows "
+          f"({args.workers or os.cpu_count()} workers)...")
+
+    start = time.perf_counter()
+    leaderboard = run_sweep(X, y_encoded, grid, args.folds, args.workers, args.seed, args.estimator)
+    print(f"✅ Sweep finished in {time.perf_counter() - start:.1f}s")
+    print_leaderboard(leaderboard)
+
+    if args.leaderboard:
+        with open(args.leaderboard, "w") as f:
+            json.dump(leaderboard, f, indent=2)
+        print(f"\n💾 Leaderboard saved as {args.leaderboard}")
+
+    best = {k: leaderboard[0][k] for k in ("n_estimators", "max_depth", "max_features")}
+    print(f"\n⏳ Refitting best settings on all rows: {best}")
+    model = Pipeline([
+        ("pre", make_preprocess()),
+        ("clf", make_estimator(args.estimator, random_state=args.seed, **best))
+    ])
+    model.fit(X, y_encoded)
+
+    key = manifest_key(inputs=[args.data], feature_cols=feature_cols,
+                       params={**best, "estimator": args.estimator, "seed": args.seed, "folds": args.folds})
+    save_artifacts({args.model: model, args.encoder: le}, manifest_next_to(args.model), key, "tune_model.py")
+    print(f"\n💾 Model saved as {args.model}")
+    print(f"💾 Label encoder saved as {args.encoder}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+# update_model.py
+# -------------------------------------------------------
+# GROW THE SAVED FOREST WITH NEW CASES INSTEAD OF RETRAINING
+# -------------------------------------------------------
+#
+# Usage:
+#   python update_model.py new_cases.csv
+#   python update_model.py new_cases.csv --new-trees 20 --max-trees 200
+#
+# The delta CSV has the medical_dataset.csv columns. The update:
+#   1. fits --new-trees trees on the delta rows only, using the forest's
+#      own hyperparameters and the saved (unchanged) scaler
+#   2. appends them to the saved forest
+#   3. drops the oldest trees so at most --max-trees remain
+# The cost depends on the delta, not on the rows the model saw before.
+#
+# Trees are kept oldest first in forest.estimators_, so pruning takes them
+# from the front. If the delta has diseases the label encoder does not
+# know, they are appended to the end of the encoder's classes, so every
+# existing disease keeps its class id. Every existing tree's leaf table
+# then gets (empty) columns for the new classes, so old and new trees vote
+# over the same class list.
+#
+# model.joblib, label_encoder.joblib and, if present, model_compiled.npz
+# and the model_compiled/ directory of pool_predict.py are each replaced
+# atomically (temp file / directory + rename), the encoder before the
+# model. Since old ids never move, a reader that loads the two files
+# around an update gets either a matching pair or the old model with the
+# new encoder, which labels the old model's classes the same way.
+#
+# If model_manifest.json (artifact_cache.py) described the model and
+# encoder that were updated, it is rewritten for the new ones: same
+# dataset key, the delta added to its "updates" list, and update_model.py
+# as producer. medical_disease_prediction.py then keeps the updated model
+# until the dataset itself changes; that full retrain should have the
+# delta appended to the dataset.
+
+import argparse
+import copy
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import LabelEncoder
+from sklearn.tree._tree import Tree
+
+from artifact_cache import (atomic_dump, atomic_write, file_sha256, library_versions, load_manifest,
+                            manifest_next_to, write_manifest)
+from medical_data import clean_chunk
+
+
+def _expand_tree_classes(estimator, positions, n_classes):
+    """Copy of a fitted tree whose class columns sit at `positions` of an
+    n_classes-wide table; the other columns are zero"""
+    state = estimator.tree_.__getstate__()
+    values = np.zeros((state["values"].shape[0], 1, n_classes))
+    values[:, 0, positions] = state["values"][:, 0, :]
+    state["values"] = values
+
+    tree = Tree(estimator.n_features_in_, np.array([n_classes], dtype=np.intp), 1)
+    tree.__setstate__(state)
+
+    expanded = copy.copy(estimator)
+    expanded.tree_ = tree
+    expanded.classes_ = np.arange(n_classes)
+    expanded.n_classes_ = n_classes
+    return expanded
+
+
+def update_forest(forest, new_trees, X_delta, y_delta, n_classes, max_trees, seed):
+    """Append `new_trees` trees fitted on the delta and prune the oldest.
+
+    Class ids in y_delta and forest.classes_ index the same (possibly
+    extended) label list of length n_classes. Returns (forest, added, pruned).
+    """
+    params = forest.get_params()
+    params.update(n_estimators=new_trees, random_state=seed, warm_start=False, oob_score=False)
+    delta_forest = RandomForestClassifier(**params).fit(X_delta, y_delta)
+
+    old_positions = np.asarray(forest.classes_, dtype=np.intp)
+    new_positions = np.asarray(delta_forest.classes_, dtype=np.intp)
+
+    estimators = list(forest.estimators_)
+    if len(old_positions) != n_classes or not np.array_equal(old_positions, np.arange(n_classes)):
+        estimators = [_expand_tree_classes(est, old_positions, n_classes) for est in estimators]
+    estimators += [_expand_tree_classes(est, new_positions, n_classes) for est in delta_forest.estimators_]
+
+    pruned = max(0, len(estimators) - max_trees)
+    forest.estimators_ = estimators[pruned:]
+    forest.n_estimators = len(forest.estimators_)
+    forest.classes_ = np.arange(n_classes)
+    forest.n_classes_ = n_classes
+    return forest, new_trees, pruned
+
+
+def extend_label_encoder(le, labels):
+    """LabelEncoder over le.classes_ with any new labels appended (sorted) at
+    the end, and the list of those labels. Existing labels keep their ids.
+
+    Classes past the original ones are not sorted; LabelEncoder maps string
+    labels through a lookup table, so transform / inverse_transform still
+    work."""
+    known = set(le.classes_)
+    new_labels = sorted(set(labels) - known)
+    if not new_labels:
+        return le, []
+    extended = LabelEncoder()
+    extended.classes_ = np.concatenate([le.classes_, new_labels])
+    return extended, new_labels
+
+
+def update_model(model, le, delta_df, new_trees=20, max_trees=200, seed=None):
+    """Grow a saved model (Pipeline of "pre" + "clf" forest, or a bare forest)
+    with trees fitted on delta_df. Returns (model, le, summary)."""
+    X, y = clean_chunk(delta_df)
+    if X.empty:
+        raise ValueError("No usable rows in the delta after cleaning.")
+
+    if hasattr(model, "named_steps"):
+        forest = model.named_steps["clf"]
+        X_delta = model.named_steps["pre"].transform(X)
+    else:
+        forest = model
+        X_delta = X[list(forest.feature_names_in_)] if hasattr(forest, "feature_names_in_") else X
+    if not isinstance(forest, RandomForestClassifier):
+        raise ValueError(f"Can only grow a RandomForestClassifier, not {type(forest).__name__}")
+
+    le, new_classes = extend_label_encoder(le, y.astype(str).unique())
+
+    seed = int(time.time()) if seed is None else seed
+    forest, added, pruned = update_forest(forest, new_trees, X_delta, le.transform(y),
+                                          len(le.classes_), max_trees, seed)
+    summary = {"rows": len(X), "added": added, "pruned": pruned,
+               "trees": forest.n_estimators, "new_classes": new_classes}
+    return model, le, summary
+
+
+def describes(manifest, paths):
+    """True if the manifest recorded exactly the files at `paths`"""
+    recorded = (manifest or {}).get("artifacts", {})
+    return all(recorded.get(os.path.basename(path)) == file_sha256(path) for path in paths)
+
+
+def record_update(manifest_path, manifest, artifacts, delta_path, summary):
+    """Rewrite the manifest for the updated artifacts: the dataset key it had,
+    the delta appended to "updates" and update_model.py as producer"""
+    key = {field: manifest.get(field) for field in ("inputs", "feature_cols", "params")}
+    key["versions"] = library_versions()   # the artifacts were just re-dumped
+    key["updates"] = manifest.get("updates", []) + [{
+        "input": os.path.basename(delta_path),
+        "sha256": file_sha256(delta_path),
+        "rows": summary["rows"],
+        "added": summary["added"],
+        "pruned": summary["pruned"],
+    }]
+    return write_manifest(manifest_path, key, artifacts, "update_model.py")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Add trees fitted on new cases to the saved forest")
+    parser.add_argument("delta", help="CSV of new labelled rows (medical_dataset.csv columns)")
+    parser.add_argument("--new-trees", type=int, default=20)
+    parser.add_argument("--max-trees", type=int, default=200, help="oldest trees beyond this are dropped")
+    parser.add_argument("--seed", type=int, default=None, help="default: a fresh seed per update")
+    parser.add_argument("--model", default="model.joblib")
+    parser.add_argument("--encoder", default="label_encoder.joblib")
+    parser.add_argument("--compiled", default="model_compiled.npz",
+                        help="recompiled (forest_compile.py) if it exists")
+    parser.add_argument("--model-dir", default="model_compiled",
+                        help="pool_predict.py's .npy directory, recompiled if it exists")
+    args = parser.parse_args(argv)
+
+    for path in (args.delta, args.model, args.encoder):
+        if not os.path.exists(path):
+            print(f"\n❌ ERROR: {path} NOT FOUND.")
+            return 1
+    if args.new_trees < 1 or args.max_trees < args.new_trees:
+        print("❌ --new-trees must be >= 1 and --max-trees >= --new-trees")
+        return 1
+
+    model = joblib.load(args.model)
+    le = joblib.load(args.encoder)
+    manifest_path = manifest_next_to(args.model)
+    manifest = load_manifest(manifest_path)
+    tracked = manifest is not None and describes(manifest, (args.model, args.encoder))
+
+    print(f"\n⏳ Fitting {args.new_trees} new trees on {args.delta}...")
+    start = time.perf_counter()
+    try:
+        model, le, summary = update_model(model, le, pd.read_csv(args.delta),
+                                          args.new_trees, args.max_trees, args.seed)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"✅ {summary['rows']:,} new rows: +{summary['added']} trees, "
+          f"-{summary['pruned']} oldest, {summary['trees']} in total "
+          f"({time.perf_counter() - start:.2f}s)")
+    if summary["new_classes"]:
+        print(f"   New diseases: {', '.join(summary['new_classes'])}")
+
+    # Encoder first: old class ids are unchanged, so it also labels the old model
+    atomic_dump(le, args.encoder)
+    atomic_dump(model, args.model)
+    print(f"\n💾 Model saved as {args.model}")
+    print(f"💾 Label encoder saved as {args.encoder}")
+    if tracked:
+        record_update(manifest_path, manifest, (args.model, args.encoder), args.delta, summary)
+        print(f"💾 Manifest updated: {manifest_path}")
+
+    refresh_npz = os.path.exists(args.compiled)
+    refresh_dir = os.path.isdir(args.model_dir)
+    if (refresh_npz or refresh_dir) and hasattr(model, "named_steps"):
+        from forest_compile import compile_pipeline
+        compiled = compile_pipeline(model, le)
+        if refresh_npz:
+            atomic_write(args.compiled, compiled.save)
+            print(f"💾 Compiled forest refreshed: {args.compiled}")
+        if refresh_dir:
+            compiled.replace_dir(args.model_dir)
+            print(f"💾 Compiled forest refreshed: {args.model_dir}/")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+# vital_rules.py
+# -------------------------------------------------------
+# vitals.csv COMPILED INTO A NUMERIC RULE TABLE
+# -------------------------------------------------------
+#
+# Usage:
+#   python vital_rules.py backend/vitals.csv                   # print the rules
+#   python vital_rules.py backend/vitals.csv --check rows.csv  # flag a file of patients
+#
+# vitals.csv describes every disease with free-text thresholds ("≥126
+# mg/dL", "<5.7%", "≥140", "Normal", "N/A"). compile_rules() parses every
+# cell once into one rule per (disease, vital). Each rule has an operator,
+# a numeric bound and a unit, stored as the interval of values that
+# satisfy it. "Normal", "N/A" and empty cells give no rule.
+#
+# RuleTable.evaluate() checks every rule for a whole batch at once: one
+# gather of the vitals columns plus two comparisons against the interval
+# arrays. A disease matches a row when every one of its rules whose vital
+# is present holds (min_score=1.0). At least one of those rules must also
+# be evidence of the disease: a lower bound or a range ("≥126 mg/dL",
+# "120-139"). Upper-bound-only cells such as Hypertension's "<100 mg/dL"
+# just describe the normal range. They can rule a disease out but never
+# flag it, so a lone normal fasting_blood_sugar is not reported as
+# Hypertension. Lower min_score to accept partial matches, or raise
+# min_rules to ask for more evaluated vitals. The matches are reported
+# next to the model output by DiseasePredictor / the inference server
+# ("vital_flags") and by batch_predict.py --rules.
+
+import re
+import sys
+
+import numpy as np
+
+RULE_RE = re.compile(r"^\s*(≥|≤|>=|<=|>|<|=)?\s*(\d+(?:\.\d+)?)\s*(?:[-–]\s*(\d+(?:\.\d+)?))?\s*(.*?)\s*$")
+NO_RULE = ("", "normal", "n/a", "na", "nan", "none", "-")
+
+# operator -> (low, high, low inclusive, high inclusive) for a bound b
+OPERATORS = {
+    "≥": lambda b: (b, np.inf, True, False),
+    ">=": lambda b: (b, np.inf, True, False),
+    ">": lambda b: (b, np.inf, False, False),
+    "≤": lambda b: (-np.inf, b, False, True),
+    "<=": lambda b: (-np.inf, b, False, True),
+    "<": lambda b: (-np.inf, b, False, False),
+    "=": lambda b: (b, b, True, True),
+}
+
+
+def parse_rule(text):
+    """(operator, bound, high, unit) of one vitals.csv cell, or None.
+
+    A plain number is "="; "120-139" is operator "range" with high=139.
+    Raises ValueError for text that is neither a rule nor a no-rule word.
+    """
+    text = str(text).strip()
+    if text.lower() in NO_RULE:
+        return None
+    match = RULE_RE.match(text)
+    if not match:
+        raise ValueError(f"Cannot parse vital rule {text!r}")
+    op, bound, high, unit = match.groups()
+    if high is not None:
+        return "range", float(bound), float(high), unit
+    return op or "=", float(bound), None, unit
+
+
+class RuleTable:
+    """Parallel arrays with one entry per rule.
+
+    columns    vitals the rules are about (vitals.csv column order)
+    diseases   one name per disease with at least one row in vitals.csv
+    disease    int index into `diseases`
+    column     int index into `columns`
+    low/high   interval of values that satisfy the rule
+    low_inc / high_inc   whether the interval ends are included
+    evidence   False for upper-bound-only rules ("<5.7%"), which describe
+               the normal range rather than the disease
+    op/bound/unit        the parsed text, for display
+    unparsed   (disease, column, text) cells that were not understood
+    blank      (disease, column) cells with no value at all
+    """
+
+    def __init__(self, columns, diseases, rules, unparsed=(), blank=()):
+        self.columns = list(columns)
+        self.diseases = list(diseases)
+        self.unparsed = list(unparsed)
+        self.blank = set(blank)
+        fields = ("disease", "column", "low", "high", "low_inc", "high_inc", "op", "bound", "unit")
+        values = list(zip(*rules)) if rules else [[] for _ in fields]
+        for name, column in zip(fields, values):
+            setattr(self, name, np.asarray(column))
+        self.disease = self.disease.astype(np.intp)
+        self.column = self.column.astype(np.intp)
+        self.low = self.low.astype(np.float64)
+        self.high = self.high.astype(np.float64)
+        self.low_inc = self.low_inc.astype(bool)
+        self.high_inc = self.high_inc.astype(bool)
+        self.evidence = np.isfinite(self.low)
+        # rules x diseases one-hot, to count hits per disease with one product
+        self._membership = np.zeros((len(self.disease), len(self.diseases)))
+        self._membership[np.arange(len(self.disease)), self.disease] = 1.0
+        self._evidence_membership = self._membership * self.evidence[:, None]
+        self._by_key = {(self.diseases[d], self.columns[c]): i
+                        for i, (d, c) in enumerate(zip(self.disease, self.column))}
+
+    def __len__(self):
+        return len(self.disease)
+
+    def rule(self, disease, column):
+        """Index of the rule for (disease, column), or None"""
+        return self._by_key.get((disease, column))
+
+    def _matrix(self, X):
+        """(n_rows, n_columns) float array; columns missing from a
+        DataFrame / dict rows are NaN (their rules are not evaluated)"""
+        if isinstance(X, dict):
+            X = [X]
+        if isinstance(X, list):
+            X = [[row.get(col, np.nan) for col in self.columns] for row in X]
+        elif hasattr(X, "columns"):
+            X = np.column_stack([X[col].to_numpy(dtype=np.float64) if col in X.columns
+                                 else np.full(len(X), np.nan) for col in self.columns])
+        X = np.asarray(X, dtype=np.float64)
+        return X.reshape(0, len(self.columns)) if X.size == 0 else np.atleast_2d(X)
+
+    def evaluate(self, X):
+        """(hits, present): (n_rows, n_rules) booleans. hits is False where
+        the vital is missing; present says where it was not."""
+        values = self._matrix(X)[:, self.column]
+        present = ~np.isnan(values)
+        above = (values > self.low) | (self.low_inc & (values == self.low))
+        below = (values < self.high) | (self.high_inc & (values == self.high))
+        return above & below & present, present
+
+    def _score(self, hits, present, min_score, min_rules):
+        evaluated = present @ self._membership
+        score = (hits @ self._membership) / np.maximum(evaluated, 1)
+        supported = (hits @ self._evidence_membership) > 0
+        return score, (evaluated >= max(min_rules, 1)) & (score >= min_score) & supported
+
+    def match(self, X, min_score=1.0, min_rules=1):
+        """(score, matched), both (n_rows, n_diseases): the share of a
+        disease's evaluated rules that hold, and whether score >= min_score
+        with at least min_rules rules evaluated and one evidence rule held"""
+        return self._score(*self.evaluate(X), min_score, min_rules)
+
+    def flags(self, X, min_score=1.0, min_rules=1):
+        """Per row: [{"disease": ..., "vitals": [columns whose evidence rule held]}]"""
+        hits, present = self.evaluate(X)
+        _, matched = self._score(hits, present, min_score, min_rules)
+
+        out = [[] for _ in range(len(matched))]
+        for row in np.flatnonzero(matched.any(axis=1)):   # most rows match nothing
+            for d in np.flatnonzero(matched[row]):
+                rules = np.flatnonzero((self.disease == d) & hits[row] & self.evidence)
+                out[row].append({"disease": self.diseases[d],
+                                 "vitals": [self.columns[c] for c in self.column[rules]]})
+        return out
+
+    def describe(self, i):
+        """"Diabetes: fasting_blood_sugar ≥ 126 mg/dL" for rule i"""
+        if self.op[i] == "range":
+            condition = f"{self.low[i]:g}-{self.high[i]:g}"
+        else:
+            condition = f"{self.op[i]} {float(self.bound[i]):g}"
+        unit = f" {self.unit[i]}" if self.unit[i] else ""
+        return f"{self.diseases[self.disease[i]]}: {self.columns[self.column[i]]} {condition}{unit}"
+
+    def sampling_range(self, disease, column):
+        """(low, high) that generate_training_data draws this vital from:
+        the first number of the cell +-5, 90-110 for Normal / N/A and
+        100 for blank (pd.read_csv turns "N/A" into NaN) or unparsed cells"""
+        i = self.rule(disease, column)
+        if i is not None:
+            return float(self.bound[i]) - 5, float(self.bound[i]) + 5
+        if (disease, column) in self.blank or any(d == disease and c == column for d, c, _ in self.unparsed):
+            return 100.0, 100.0
+        return 90.0, 110.0
+
+
+def compile_rules(vitals, columns=None):
+    """RuleTable from a vitals.csv path or DataFrame.
+
+    `columns` defaults to every column between "disease" and the
+    descriptive ones (age_group, notes).
+    """
+    import pandas as pd
+
+    df = pd.read_csv(vitals, dtype=str, keep_default_na=False) if isinstance(vitals, str) else vitals
+    if "disease" not in df.columns:
+        raise ValueError("vitals table needs a 'disease' column")
+    if columns is None:
+        columns = [col for col in df.columns if col not in ("disease", "age_group", "notes")]
+
+    diseases = list(dict.fromkeys(df["disease"]))
+    rules, unparsed, blank = [], [], []
+    for _, row in df.iterrows():
+        d = diseases.index(row["disease"])
+        for c, col in enumerate(columns):
+            if pd.isna(row[col]) or str(row[col]).strip().lower() in ("", "nan"):
+                blank.append((row["disease"], col))
+                continue
+            try:
+                parsed = parse_rule(row[col])
+            except ValueError:
+                unparsed.append((row["disease"], col, row[col]))
+                continue
+            if parsed is None:
+                continue
+            op, bound, high, unit = parsed
+            if op == "range":
+                low, high, low_inc, high_inc = bound, high, True, True
+            else:
+                low, high, low_inc, high_inc = OPERATORS[op](bound)
+            rules.append((d, c, low, high, low_inc, high_inc, op, bound, unit))
+    return RuleTable(columns, diseases, rules, unparsed, blank)
+
+
+def main(argv=None):
+    import argparse
+    import os
+    import time
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Compile vitals.csv into numeric rules")
+    parser.add_argument("vitals", nargs="?", default="vitals.csv")
+    parser.add_argument("--check", default=None, help="CSV of patients to flag")
+    parser.add_argument("--min-score", type=float, default=1.0,
+                        help="share of a disease's rules that must hold")
+    parser.add_argument("--min-rules", type=int, default=1,
+                        help="rules that must be evaluated (vital present) for a flag")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.vitals):
+        print(f"❌ ERROR: {args.vitals} NOT FOUND.")
+        return 1
+    table = compile_rules(args.vitals)
+    print(f"✅ {len(table)} rules for {len(table.diseases)} diseases over {', '.join(table.columns)}")
+    for i in range(len(table)):
+        print(f"   {table.describe(i)}")
+    for disease, col, text in table.unparsed:
+        print(f"   ⚠️  {disease}: {col} {text!r} not understood, ignored")
+
+    if args.check:
+        df = pd.read_csv(args.check)
+        start = time.perf_counter()
+        score, matched = table.match(df, args.min_score, args.min_rules)
+        elapsed = time.perf_counter() - start
+        print(f"\n📊 {len(df):,} rows flagged in {elapsed * 1000:.1f} ms")
+        for d, disease in enumerate(table.diseases):
+            print(f"   {disease:<14} {int(matched[:, d].sum()):>8,} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())